@@ -0,0 +1,38 @@
+# accounts/middleware.py
+
+from .roles import ROLE_SESSION_KEY, CUSTOMER_ID_SESSION_KEY, TENANT_ID_SESSION_KEY, role_current, store_role
+
+
+class RoleMiddleware:
+    """
+    Expose the logged-in user's role on the request from the session, so views
+    don't have to look up `customer_profile` (and its tailor) on every request.
+
+    Sets ``request.role`` ('tailor', 'customer' or None), ``request.customer_id``
+    and ``request.tenant_id``. The role is stored at login; sessions created
+    before this middleware existed are resolved once and then cached.
+    The session also keeps the user's role version, which saving or deleting
+    a linked customer bumps (signals.py), so linking, unlinking or deleting a
+    customer takes effect on the next request at the cost of one cache lookup.
+    The version lives in the default cache, so workers only see each other's
+    bumps when CACHE_URL points at a shared cache.
+    Must come after AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.role = None
+        request.customer_id = None
+        request.tenant_id = None
+
+        if request.user.is_authenticated:
+            session = request.session
+            if not role_current(session, request.user):
+                store_role(session, request.user)
+            request.role = session[ROLE_SESSION_KEY]
+            request.customer_id = session[CUSTOMER_ID_SESSION_KEY]
+            request.tenant_id = session[TENANT_ID_SESSION_KEY]
+
+        return self.get_response(request)
@@ -0,0 +1,56 @@
+# accounts/roles.py
+
+from tailor_app.cache import bump_version, current_version
+from tailor_app.models import Customer
+
+ROLE_TAILOR = 'tailor'
+ROLE_CUSTOMER = 'customer'
+
+# Session keys written at login and read back by RoleMiddleware
+ROLE_SESSION_KEY = '_role'
+CUSTOMER_ID_SESSION_KEY = '_role_customer_id'
+TENANT_ID_SESSION_KEY = '_role_tenant_id'
+ROLE_VERSION_SESSION_KEY = '_role_version'
+
+
+def resolve_role(user):
+    """
+    Work out whether a user is a tailor or a portal customer with a single
+    query. Returns (role, customer_id, tenant_id), where tenant_id is the id of
+    the tailor whose data the user works with.
+    """
+    profile = Customer.objects.filter(client_account=user).values_list('id', 'tailor_id').first()
+    if profile is None:
+        return ROLE_TAILOR, None, user.pk
+    customer_id, tailor_id = profile
+    return ROLE_CUSTOMER, customer_id, tailor_id
+
+
+def _role_version_key(user_id):
+    return f'role:{user_id}:version'
+
+
+def role_version(user_id):
+    """ Changes whenever a customer linked to the user is saved or deleted (see signals.py). """
+    return current_version(_role_version_key(user_id))
+
+
+def invalidate_role(user_id):
+    """ Make sessions re-resolve the user's role on their next request. """
+    bump_version(_role_version_key(user_id))
+
+
+def role_current(session, user):
+    """ Whether the role stored in the session is still valid; a cache lookup, no query. """
+    return ROLE_SESSION_KEY in session and session.get(ROLE_VERSION_SESSION_KEY) == role_version(user.pk)
+
+
+def store_role(session, user):
+    # Read before resolving, so a change made in between is picked up next time.
+    version = role_version(user.pk)
+    role, customer_id, tenant_id = resolve_role(user)
+    session[ROLE_VERSION_SESSION_KEY] = version
+    session[ROLE_SESSION_KEY] = role
+    session[CUSTOMER_ID_SESSION_KEY] = customer_id
+    session[TENANT_ID_SESSION_KEY] = tenant_id
+    return role
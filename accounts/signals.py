@@ -0,0 +1,28 @@
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from tailor_app.models import Customer
+from .roles import invalidate_role, store_role
+
+@receiver(user_logged_in)
+def cache_role_in_session(sender, request, user, **kwargs):
+    """ Resolve the user's role once at login and keep it in the session. """
+    if request is not None and hasattr(request, 'session'):
+        store_role(request.session, user)
+
+@receiver(pre_save, sender=Customer)
+def remember_client_account(sender, instance, raw=False, **kwargs):
+    """ Note the user the customer was linked to before this save, for invalidate_customer_role. """
+    instance._previous_client_account_id = None
+    if instance.pk is not None and not raw:
+        instance._previous_client_account_id = (
+            Customer.objects.filter(pk=instance.pk).values_list('client_account_id', flat=True).first()
+        )
+
+@receiver([post_save, post_delete], sender=Customer)
+def invalidate_customer_role(sender, instance, **kwargs):
+    """ Sessions of the users linked to the customer, before and after, re-resolve their role. """
+    user_ids = {instance.client_account_id, getattr(instance, '_previous_client_account_id', None)} - {None}
+    for user_id in user_ids:
+        invalidate_role(user_id)
@@ -4,6 +4,7 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import login, logout
 # Import our new custom forms
 from .forms import CustomUserCreationForm, CustomAuthenticationForm
+from .roles import ROLE_SESSION_KEY, ROLE_CUSTOMER
 
 def signup_view(request):
     if request.method == 'POST':
@@ -26,7 +27,8 @@ def login_view(request):
             user = form.get_user()
             login(request, user)
             
-            if hasattr(user, 'customer_profile'):
+            # The role was resolved and stored in the session during login()
+            if request.session.get(ROLE_SESSION_KEY) == ROLE_CUSTOMER:
                 return redirect('portal:dashboard')
             else:
                 return redirect('tailor_app:dashboard')
@@ -0,0 +1,61 @@
+# portal/dashboard.py
+
+from django.db.models import Count, Q
+
+from tailor_app.cache import cached_value, get_cache
+from tailor_app.models import ArchivedOrder, Order, Appointment
+
+RECENT_ORDERS = 5
+
+
+def dashboard_cache_key(customer_id):
+    return f'portal:dashboard:{customer_id}'
+
+
+def invalidate_dashboard(customer_id):
+    get_cache().delete(dashboard_cache_key(customer_id))
+
+
+def build_dashboard(customer_id):
+    """
+    Everything the portal dashboard shows, in four queries: conditional
+    aggregates for the order counters (archived orders count as past ones),
+    the few most recent orders, and the upcoming appointments split by status
+    in Python.
+    """
+    orders = Order.objects.filter(customer_id=customer_id)
+    counts = orders.aggregate(
+        total=Count('id'),
+        pending=Count('id', filter=Q(status__in=['Pending', 'In Progress'])),
+        completed=Count('id', filter=Q(status='Completed')),
+    )
+    archived = ArchivedOrder.objects.filter(customer_id=customer_id).aggregate(
+        total=Count('id'),
+        completed=Count('id', filter=Q(status='Completed')),
+    )
+    recent_orders = list(orders.order_by('-created_at')[:RECENT_ORDERS])
+
+    confirmed_appointments = []
+    pending_appointments = []
+    appointments = Appointment.objects.filter(
+        customer_id=customer_id, status__in=['Confirmed', 'Requested']
+    ).order_by('start_time')
+    for appt in appointments:
+        if appt.status == 'Confirmed':
+            confirmed_appointments.append(appt)
+        else:
+            pending_appointments.append(appt)
+
+    return {
+        'recent_orders': recent_orders,
+        'total_orders': counts['total'] + archived['total'],
+        'pending_orders': counts['pending'],
+        'completed_orders': counts['completed'] + archived['completed'],
+        'confirmed_appointments': confirmed_appointments,
+        'pending_appointments': pending_appointments,
+    }
+
+
+def get_dashboard(customer_id):
+    """ Cached build_dashboard(); cleared by portal.signals on any change. """
+    return cached_value(dashboard_cache_key(customer_id), lambda: build_dashboard(customer_id))
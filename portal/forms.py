@@ -1,8 +1,9 @@
 # portal/forms.py
 from django import forms
+from tailor_app.forms import AppointmentSlotMixin
 from tailor_app.models import Appointment
 
-class AppointmentRequestForm(forms.ModelForm):
+class AppointmentRequestForm(AppointmentSlotMixin, forms.ModelForm):
     class Meta:
         model = Appointment
         fields = ['title', 'start_time', 'end_time', 'notes']
@@ -12,3 +13,7 @@ class AppointmentRequestForm(forms.ModelForm):
             'title': forms.TextInput(attrs={'class': 'block w-full mt-1 text-sm dark:border-gray-600 dark:bg-gray-700 focus:border-purple-400 focus:outline-none focus:shadow-outline-purple dark:text-gray-300 dark:focus:shadow-outline-gray form-input'}),
             'notes': forms.Textarea(attrs={'class': 'block w-full mt-1 text-sm dark:text-gray-300 dark:border-gray-600 dark:bg-gray-700 form-textarea focus:border-purple-400 focus:outline-none focus:shadow-outline-purple dark:focus:shadow-outline-gray', 'rows': 3}),
         }
+
+    def __init__(self, *args, **kwargs):
+        self.tailor_id = kwargs.pop('tailor_id', None)
+        super().__init__(*args, **kwargs)
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from tailor_app.models import Order, Appointment
+from tailor_app.signals import bulk_created
+from .dashboard import invalidate_dashboard
+
+@receiver([post_save, post_delete], sender=Order)
+@receiver([post_save, post_delete], sender=Appointment)
+def invalidate_portal_dashboard(sender, instance, **kwargs):
+    """ A customer's dashboard is rebuilt after any change to their orders or appointments. """
+    invalidate_dashboard(instance.customer_id)
+
+@receiver(bulk_created, sender=Order)
+@receiver(bulk_created, sender=Appointment)
+def invalidate_portal_dashboards_after_bulk_create(sender, customer_ids, **kwargs):
+    for customer_id in customer_ids:
+        invalidate_dashboard(customer_id)
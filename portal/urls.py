@@ -10,4 +10,5 @@ urlpatterns = [
     path('orders/<int:pk>/', views.portal_order_detail, name='order_detail'),
     path('profile/', views.portal_profile, name='profile'),
     path('appointments/request/', views.request_appointment, name='request_appointment'),
+    path('appointments/availability/', views.availability_api, name='availability_api'),
 ]
@@ -1,76 +1,93 @@
 # portal/views.py
+from datetime import timedelta
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from tailor_app.models import Order, Measurement, Appointment
+from django.db import transaction
+from django.http import Http404, JsonResponse
+from django.utils import timezone
+from accounts.roles import ROLE_CUSTOMER
+from tailor_app import archive, scheduling
+from tailor_app.models import Customer, Measurement
+from .dashboard import get_dashboard
 from .forms import AppointmentRequestForm
 
+MAX_SUGGESTED_SLOTS = 12
+
+# request.role, request.customer_id and request.tenant_id are set from the
+# session by accounts.middleware.RoleMiddleware, so none of these views need to
+# look up the user's customer profile or its tailor.
+
 @login_required
 def portal_dashboard(request):
     # Ensure the logged-in user has a customer profile
-    if not hasattr(request.user, 'customer_profile'):
+    if request.role != ROLE_CUSTOMER:
         # Handle case where user is not a client (e.g., a tailor is logged in)
         # Redirect them or show an error
         return redirect('tailor_app:dashboard') 
 
-    customer = request.user.customer_profile
-
-    orders = Order.objects.filter(customer=customer).order_by('-created_at')
-
-    confirmed_appointments = Appointment.objects.filter(customer=customer, status='Confirmed').order_by('start_time')
-    pending_appointments = Appointment.objects.filter(customer=customer, status='Requested').order_by('start_time')
-
-    context = {
-        'customer': customer,
-        'orders': orders,
-        'pending_orders': orders.filter(status__in=['Pending', 'In Progress']).count(),
-        'completed_orders': orders.filter(status='Completed').count(),
-        'confirmed_appointments': confirmed_appointments,
-        'pending_appointments': pending_appointments,
-    }
+    context = get_dashboard(request.customer_id)
     return render(request, 'portal/dashboard.html', context)
 
 @login_required
 def portal_order_list(request):
-    if not hasattr(request.user, 'customer_profile'):
+    if request.role != ROLE_CUSTOMER:
         return redirect('tailor_app:dashboard')
         
-    customer = request.user.customer_profile
-    orders = Order.objects.filter(customer=customer).order_by('-created_at')
+    orders = archive.order_history(customer_id=request.customer_id)
     return render(request, 'portal/order_list.html', {'orders': orders})
 
 @login_required
 def portal_order_detail(request, pk):
-    if not hasattr(request.user, 'customer_profile'):
+    if request.role != ROLE_CUSTOMER:
         return redirect('tailor_app:dashboard')
         
-    customer = request.user.customer_profile
-    order = get_object_or_404(Order, pk=pk, customer=customer)
+    order = archive.find_order(pk, customer_id=request.customer_id)
+    if order is None:
+        raise Http404("No order with that id.")
     return render(request, 'portal/order_detail.html', {'order': order})
 
 @login_required
 def portal_profile(request):
-    if not hasattr(request.user, 'customer_profile'):
+    if request.role != ROLE_CUSTOMER:
         return redirect('tailor_app:dashboard')
         
-    customer = request.user.customer_profile
-    measurements = Measurement.objects.filter(customer=customer)
+    customer = get_object_or_404(Customer, pk=request.customer_id)
+    measurements = Measurement.objects.filter(customer_id=request.customer_id).current()
     return render(request, 'portal/profile.html', {'customer': customer, 'measurements': measurements})
 
 @login_required
 def request_appointment(request):
+    if request.role != ROLE_CUSTOMER:
+        return redirect('tailor_app:dashboard')
+
     if request.method == 'POST':
-        form = AppointmentRequestForm(request.POST)
-        if form.is_valid():
-            appointment = form.save(commit=False)
-            # Link to the logged-in customer and their tailor
-            appointment.customer = request.user.customer_profile
-            appointment.tailor = request.user.customer_profile.tailor
-            # CRITICAL: Set the status to 'Requested'
-            appointment.status = 'Requested'
-            appointment.save()
-            return redirect('portal:dashboard')
+        with transaction.atomic():
+            form = AppointmentRequestForm(request.POST, tailor_id=request.tenant_id)
+            if form.is_valid():
+                appointment = form.save(commit=False)
+                # Link to the logged-in customer and their tailor
+                appointment.customer_id = request.customer_id
+                appointment.tailor_id = request.tenant_id
+                # CRITICAL: Set the status to 'Requested'
+                appointment.status = 'Requested'
+                appointment.save()
+                return redirect('portal:dashboard')
     else:
-        form = AppointmentRequestForm()
-    
-    return render(request, 'portal/request_appointment.html', {'form': form})
+        form = AppointmentRequestForm(tailor_id=request.tenant_id)
 
+    # The next week's openings, so the customer can pick a time that's free
+    today = timezone.localdate()
+    free_slots = scheduling.free_slots(request.tenant_id, today, today + timedelta(days=6))[:MAX_SUGGESTED_SLOTS]
+    return render(request, 'portal/request_appointment.html', {'form': form, 'free_slots': free_slots})
+
+@login_required
+def availability_api(request):
+    """ Free slots in the customer's tailor's calendar (same parameters as the tailor-side API). """
+    if request.role != ROLE_CUSTOMER:
+        return JsonResponse({'error': "Only customers can use this endpoint."}, status=403)
+    try:
+        options = scheduling.parse_availability_params(request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    slots = scheduling.free_slots(request.tenant_id, **options)
+    return JsonResponse({'slots': [{'start': start.isoformat(), 'end': end.isoformat()} for start, end in slots]})
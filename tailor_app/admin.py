@@ -1,10 +1,10 @@
 # tailor_app/admin.py
 
 from django.contrib import admin
-from .models import Customer, Order, Measurement, OrderImage
+from .models import Customer, Order, Measurement, OrderImage, StandardSize
 
 admin.site.register(Customer)
 admin.site.register(Order)
 admin.site.register(Measurement)
 admin.site.register(OrderImage)
-
+admin.site.register(StandardSize)
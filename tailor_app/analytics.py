@@ -0,0 +1,162 @@
+# tailor_app/analytics.py
+
+"""
+Task cycle-time analytics.
+
+A task's cycle time is how long it took once it could start: from the
+completion of the previous task of the same order (or the task's creation,
+for the first one) to its own completion. A workflow's cycle time is the
+whole run of a finished order, from its first task's creation to its last
+completion.
+
+``summarize()`` reads a tailor's task history in one query, works the
+numbers out over NumPy arrays (no per-task Python loop) and replaces the
+tailor's TaskCycleSummary rows. It is meant to run nightly via
+``manage.py summarize_task_cycles``; the analytics page only reads the
+summary table.
+"""
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OrderTask, TaskCycleSummary
+
+THROUGHPUT_WEEKS = 12
+PERCENTILES = (50, 90)
+
+
+def task_history(tailor_id):
+    """ Every task of the tailor's orders with its template and timestamps, in one query. """
+    return OrderTask.objects.filter(order__customer__tailor_id=tailor_id).values_list(
+        'order_id', 'task_definition_id', 'task_definition__template_id', 'created_at', 'completed_at',
+    ).order_by()
+
+
+def _seconds(values):
+    return np.fromiter((np.nan if v is None else v.timestamp() for v in values), dtype=float, count=len(values))
+
+
+def _grouped_percentiles(groups, values, count):
+    """
+    Percentiles of ``values`` within each of ``count`` groups, as an array of
+    shape (count, len(PERCENTILES)); NaN for empty groups. Linear
+    interpolation, like np.percentile.
+    """
+    order = np.lexsort((values, groups))
+    groups, values = groups[order], values[order]
+    sizes = np.bincount(groups, minlength=count)
+    offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    result = np.full((count, len(PERCENTILES)), np.nan)
+    present = sizes > 0
+    for j, q in enumerate(PERCENTILES):
+        rank = offsets[present] + (sizes[present] - 1) * q / 100
+        low = np.floor(rank).astype(int)
+        high = np.ceil(rank).astype(int)
+        result[present, j] = values[low] + (values[high] - values[low]) * (rank - low)
+    return result
+
+
+def _group_stats(keys, hours, finished_at, now):
+    """ Statistics of ``hours`` per distinct key; ``finished_at`` places each sample in a week. """
+    if not len(keys):
+        return {}
+    unique, groups = np.unique(keys, return_inverse=True)
+    count = len(unique)
+    percentiles = _grouped_percentiles(groups, hours, count)
+    samples = np.bincount(groups, minlength=count)
+    means = np.bincount(groups, weights=hours, minlength=count) / samples
+    weeks_ago = ((now - finished_at) // (7 * 86400)).astype(int)
+    recent = (weeks_ago >= 0) & (weeks_ago < THROUGHPUT_WEEKS)
+    weekly = np.bincount(
+        groups[recent] * THROUGHPUT_WEEKS + (THROUGHPUT_WEEKS - 1 - weeks_ago[recent]),
+        minlength=count * THROUGHPUT_WEEKS,
+    ).reshape(count, THROUGHPUT_WEEKS)
+    return {
+        int(key): {
+            'samples': int(samples[i]),
+            'p50_hours': float(percentiles[i, 0]),
+            'p90_hours': float(percentiles[i, 1]),
+            'mean_hours': float(means[i]),
+            'weekly_completions': weekly[i].tolist(),
+        }
+        for i, key in enumerate(unique)
+    }
+
+
+def cycle_times(rows, now=None):
+    """
+    Work out per-task and per-workflow statistics from ``task_history`` rows.
+    Returns (task stats, workflow stats): dicts keyed by task definition id
+    and template id with ``samples``, ``p50_hours``, ``p90_hours``,
+    ``mean_hours`` and ``weekly_completions`` (the last THROUGHPUT_WEEKS
+    weeks, oldest first).
+    """
+    now = (now or timezone.now()).timestamp()
+    rows = list(rows)
+    if not rows:
+        return {}, {}
+    order_ids, definition_ids, template_ids, created, completed = (list(column) for column in zip(*rows))
+    order_ids = np.array(order_ids)
+    definition_ids = np.array(definition_ids)
+    template_ids = np.array(template_ids)
+    created = _seconds(created)
+    completed = _seconds(completed)
+    done = ~np.isnan(completed)
+
+    # Sort each order's completed tasks by completion; each one starts when
+    # the one before it in the same order finished.
+    idx = np.flatnonzero(done)
+    idx = idx[np.lexsort((completed[idx], order_ids[idx]))]
+    finished_at = completed[idx]
+    previous = np.concatenate(([np.nan], finished_at[:-1]))
+    same_order = np.concatenate(([False], order_ids[idx][1:] == order_ids[idx][:-1]))
+    started_at = np.where(same_order, np.fmax(previous, created[idx]), created[idx])
+    hours = np.clip(finished_at - started_at, 0, None) / 3600
+
+    tasks = _group_stats(definition_ids[idx], hours, finished_at, now)
+
+    # Orders whose tasks are all complete, one workflow run each.
+    order_keys, order_groups = np.unique(order_ids, return_inverse=True)
+    open_tasks = np.bincount(order_groups, weights=~done, minlength=len(order_keys))
+    first_created = np.full(len(order_keys), np.inf)
+    np.minimum.at(first_created, order_groups, created)
+    last_completed = np.full(len(order_keys), -np.inf)
+    np.maximum.at(last_completed, order_groups[done], completed[done])
+    order_template = np.zeros(len(order_keys), dtype=template_ids.dtype)
+    order_template[order_groups] = template_ids
+    finished = open_tasks == 0
+    run_hours = np.clip(last_completed - first_created, 0, None) / 3600
+    workflows = _group_stats(order_template[finished], run_hours[finished], last_completed[finished], now)
+    return tasks, workflows
+
+
+def summarize(tailor_id, now=None):
+    """ Recompute the tailor's TaskCycleSummary rows. Returns how many were written. """
+    now = now or timezone.now()
+    rows = list(task_history(tailor_id))
+    template_of = {definition_id: template_id for _, definition_id, template_id, _, _ in rows}
+    tasks, workflows = cycle_times(rows, now)
+
+    # The bottleneck of each workflow is its task with the longest median.
+    bottlenecks = {}
+    for definition_id, stats in tasks.items():
+        template_id = template_of[definition_id]
+        best = bottlenecks.get(template_id)
+        if best is None or stats['p50_hours'] > tasks[best]['p50_hours']:
+            bottlenecks[template_id] = definition_id
+
+    summaries = [
+        TaskCycleSummary(
+            tailor_id=tailor_id, template_id=template_of[definition_id], task_definition_id=definition_id,
+            is_bottleneck=bottlenecks[template_of[definition_id]] == definition_id, computed_at=now, **stats,
+        )
+        for definition_id, stats in tasks.items()
+    ] + [
+        TaskCycleSummary(tailor_id=tailor_id, template_id=template_id, computed_at=now, **stats)
+        for template_id, stats in workflows.items()
+    ]
+    with transaction.atomic():
+        TaskCycleSummary.objects.filter(tailor_id=tailor_id).delete()
+        TaskCycleSummary.objects.bulk_create(summaries)
+    return len(summaries)
@@ -0,0 +1,210 @@
+# tailor_app/api.py
+
+"""
+Versioned JSON API (api/v1/) over a tailor's customers, orders, measurements,
+appointments, inventory and tasks.
+
+Query parameters on list and detail reads:
+
+* ``fields=id,name,phone`` - sparse fieldset. Without expansions the query
+  uses ``.values()`` on exactly those columns; with expansions it uses
+  ``.only()`` so related rows can be attached.
+* ``expand=customer,tasks`` - include related objects. Forward relations are
+  joined with ``select_related``, reverse ones fetched with one
+  ``prefetch_related`` query per expansion, each limited to the columns shown.
+* ``cursor`` / ``limit`` - keyset pagination on the primary key. The cursor is
+  an opaque signed token returned as ``next``.
+
+Responses carry an ETag; ``If-None-Match`` gets a 304, and ``If-Match`` on a
+PATCH/DELETE must match the current representation or the write gets a 412.
+Writes go through the same forms as the HTML views (see SyncModel in sync.py).
+A PATCH to a measurement records a new reading and returns it, with its new
+id; measurements can't be deleted, so their history is kept.
+"""
+
+from django.core import signing
+from django.db.models import Prefetch
+
+from .models import Order, Measurement, OrderTask
+from .sync import SYNC_MODELS_BY_NAME
+
+CURSOR_SALT = 'tailor_app.api'
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class Expansion:
+    """ A related object or list that can be requested with ?expand=. """
+
+    def __init__(self, path, fields, prefetch_model=None, back_fk=None):
+        self.path = path
+        self.fields = fields
+        # Reverse relations are prefetched; forward ones are joined.
+        self.prefetch_model = prefetch_model
+        self.back_fk = back_fk
+
+    @property
+    def is_prefetch(self):
+        return self.prefetch_model is not None
+
+    def serialize(self, obj):
+        related = getattr(obj, self.path)
+        if self.is_prefetch:
+            return [{f: getattr(item, f) for f in self.fields} for item in related.all()]
+        if related is None:
+            return None
+        return {f: getattr(related, f) for f in self.fields}
+
+
+class Resource:
+    def __init__(self, name, spec, fields, expansions=None):
+        self.name = name
+        self.spec = spec
+        self.fields = fields
+        self.expansions = expansions or {}
+
+    def parse_fields(self, value):
+        if not value:
+            return list(self.fields)
+        requested = [f.strip() for f in value.split(',') if f.strip()]
+        unknown = set(requested) - set(self.fields)
+        if unknown:
+            raise ApiError(f"Unknown fields: {', '.join(sorted(unknown))}. Available: {', '.join(self.fields)}.")
+        # The primary key is always returned; it's what the cursor pages on.
+        return ['id'] + [f for f in requested if f != 'id']
+
+    def parse_expand(self, value):
+        if not value:
+            return []
+        requested = [e.strip() for e in value.split(',') if e.strip()]
+        unknown = set(requested) - set(self.expansions)
+        if unknown:
+            raise ApiError(f"Unknown expansions: {', '.join(sorted(unknown))}. Available: {', '.join(self.expansions) or 'none'}.")
+        return requested
+
+    def plan(self, user, fields, expand):
+        """
+        Build the queryset for a read. Returns (queryset, uses_values): plain
+        reads are .values() dicts, expanded reads are .only() instances with
+        their select_related/prefetch_related attached.
+        """
+        queryset = self.spec.queryset(user)
+        if not expand:
+            return queryset.values(*fields), True
+
+        only = list(fields)
+        for name in expand:
+            expansion = self.expansions[name]
+            if expansion.is_prefetch:
+                related = expansion.prefetch_model.objects.only(*expansion.fields, expansion.back_fk)
+                queryset = queryset.prefetch_related(Prefetch(expansion.path, queryset=related))
+            else:
+                queryset = queryset.select_related(expansion.path)
+                only.append(expansion.path)
+                only.extend(f'{expansion.path}__{f}' for f in expansion.fields)
+        return queryset.only(*only), False
+
+    def serialize(self, obj, fields, expand, uses_values):
+        if uses_values:
+            return obj
+        row = {f: getattr(obj, f) for f in fields}
+        for name in expand:
+            row[name] = self.expansions[name].serialize(obj)
+        return row
+
+    def list(self, user, params):
+        fields = self.parse_fields(params.get('fields'))
+        expand = self.parse_expand(params.get('expand'))
+        try:
+            limit = max(1, min(int(params.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE))
+        except ValueError:
+            raise ApiError("limit must be an integer.")
+
+        queryset, uses_values = self.plan(user, fields, expand)
+        cursor = params.get('cursor')
+        if cursor:
+            try:
+                after = signing.loads(cursor, salt=CURSOR_SALT)['after']
+            except (signing.BadSignature, KeyError, TypeError):
+                raise ApiError("Invalid cursor.")
+            queryset = queryset.filter(pk__gt=after)
+
+        rows = list(queryset.order_by('pk')[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        results = [self.serialize(row, fields, expand, uses_values) for row in rows]
+        next_cursor = None
+        if has_more:
+            next_cursor = signing.dumps({'after': results[-1]['id']}, salt=CURSOR_SALT)
+        return {'results': results, 'next': next_cursor}
+
+    def detail(self, user, pk, params):
+        fields = self.parse_fields(params.get('fields'))
+        expand = self.parse_expand(params.get('expand'))
+        queryset, uses_values = self.plan(user, fields, expand)
+        obj = queryset.filter(pk=pk).first()
+        if obj is None:
+            raise ApiError("Not found.", status=404)
+        return self.serialize(obj, fields, expand, uses_values)
+
+    def get_for_update(self, user, pk):
+        obj = self.spec.queryset(user).select_for_update().filter(pk=pk).first()
+        if obj is None:
+            raise ApiError("Not found.", status=404)
+        return obj
+
+    def representation(self, obj):
+        """ Full default representation, used for write responses and If-Match. """
+        return self.spec.model.objects.filter(pk=obj.pk).values(*self.fields).first()
+
+
+_customer = Expansion('customer', ['id', 'name', 'phone'])
+
+RESOURCES = {resource.name: resource for resource in [
+    Resource(
+        'customers', SYNC_MODELS_BY_NAME['customer'],
+        ['id', 'name', 'phone', 'email', 'address', 'created_at', 'updated_at'],
+        {
+            'measurements': Expansion('measurements', ['id', 'name', 'value'], Measurement, 'customer'),
+            'orders': Expansion('orders', ['id', 'item', 'status', 'due_date'], Order, 'customer'),
+        },
+    ),
+    Resource(
+        'orders', SYNC_MODELS_BY_NAME['order'],
+        ['id', 'customer_id', 'item', 'status', 'due_date', 'notes', 'fabric_details',
+         'price', 'amount_paid', 'created_at', 'updated_at'],
+        {
+            'customer': _customer,
+            'tasks': Expansion('tasks', ['id', 'task_definition_id', 'is_completed', 'completed_at'], OrderTask, 'order'),
+        },
+    ),
+    Resource(
+        'measurements', SYNC_MODELS_BY_NAME['measurement'],
+        ['id', 'customer_id', 'name', 'value', 'created_at', 'updated_at'],
+        {'customer': _customer},
+    ),
+    Resource(
+        'appointments', SYNC_MODELS_BY_NAME['appointment'],
+        ['id', 'customer_id', 'title', 'start_time', 'end_time', 'status', 'notes', 'recurrence', 'updated_at'],
+        {'customer': _customer},
+    ),
+    Resource(
+        'inventory', SYNC_MODELS_BY_NAME['inventoryitem'],
+        ['id', 'name', 'supplier_id', 'quantity_in_stock', 'cost_per_unit', 'reorder_level', 'updated_at'],
+        {'supplier': Expansion('supplier', ['id', 'name', 'phone'])},
+    ),
+    Resource(
+        'tasks', SYNC_MODELS_BY_NAME['ordertask'],
+        ['id', 'order_id', 'task_definition_id', 'is_completed', 'completed_at', 'created_at', 'updated_at'],
+        {
+            'task_definition': Expansion('task_definition', ['id', 'name', 'order']),
+            'order': Expansion('order', ['id', 'item', 'status', 'due_date']),
+        },
+    ),
+]}
@@ -0,0 +1,171 @@
+# tailor_app/archive.py
+
+"""
+Hot/cold archival of closed orders and past appointments.
+
+``manage.py archive_records`` moves rows older than settings.ARCHIVE_AFTER_DAYS
+out of the tables the day-to-day views scan:
+
+* orders that are Cancelled, or Completed and fully paid, and haven't changed
+  since the cutoff -> ArchivedOrder, with their tasks, materials and image
+  metadata frozen as JSON, and their payments -> ArchivedPayment
+* one-off appointments that ended before the cutoff -> ArchivedAppointment
+  (a recurring series is a single row however long it runs, so it stays)
+
+Each chunk is copied and deleted in one transaction, so a row is always in
+exactly one of the two places. Archived rows keep their ids.
+
+Reads that must see both go through ``order_history()`` (one UNION query over
+both tables), ``find_order()`` and ``archived_appointments()``. Image files
+are left where they are.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Value
+from django.db.models.fields import BooleanField
+from django.utils import timezone
+
+from .models import (
+    Appointment, ArchivedAppointment, ArchivedOrder, ArchivedPayment,
+    Order, OrderImage, OrderMaterial, OrderTask, Payment,
+)
+from .scheduling import MAX_APPOINTMENT_LENGTH
+
+DEFAULT_CHUNK_SIZE = 500
+HISTORY_FIELDS = (
+    'id', 'customer_id', 'customer__name', 'item', 'status', 'due_date',
+    'price', 'amount_paid', 'created_at', 'balance', 'archived',
+)
+
+
+def cutoff(days=None):
+    return timezone.now() - timedelta(days=settings.ARCHIVE_AFTER_DAYS if days is None else days)
+
+
+def archivable_orders(before):
+    return Order.objects.filter(
+        Q(status='Cancelled') | Q(status='Completed', amount_paid__gte=F('price')),
+        updated_at__lt=before,
+    )
+
+
+def archivable_appointments(before):
+    return Appointment.objects.filter(recurrence='', end_time__lt=before)
+
+
+def _group(rows):
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row.pop('order_id'), []).append(row)
+    return grouped
+
+
+def _archive_order_chunk(before, chunk_size):
+    with transaction.atomic():
+        ids = list(archivable_orders(before).order_by('pk').values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return 0
+        tasks = _group(OrderTask.objects.filter(order_id__in=ids).values(
+            'order_id', 'task_definition__name', 'task_definition__order', 'is_completed', 'completed_at', 'created_at',
+        ).order_by('task_definition__order', 'pk'))
+        materials = _group(OrderMaterial.objects.filter(order_id__in=ids).values(
+            'order_id', 'material_id', 'material__name', 'quantity_used', 'material__cost_per_unit',
+        ).order_by('pk'))
+        images = _group(OrderImage.objects.filter(order_id__in=ids).values(
+            'order_id', 'image', 'caption', 'uploaded_at',
+        ).order_by('pk'))
+
+        ArchivedOrder.objects.bulk_create([
+            ArchivedOrder(
+                id=order.pk, tailor_id=order.customer.tailor_id, customer_id=order.customer_id,
+                item=order.item, status=order.status, due_date=order.due_date, notes=order.notes,
+                fabric_details=order.fabric_details, created_at=order.created_at, updated_at=order.updated_at,
+                price=order.price, amount_paid=order.amount_paid, material_cost=order.material_cost,
+                details={
+                    'tasks': tasks.get(order.pk, []),
+                    'materials': materials.get(order.pk, []),
+                    'images': images.get(order.pk, []),
+                },
+            )
+            for order in Order.objects.filter(pk__in=ids).with_profit().select_related('customer')
+        ])
+        ArchivedPayment.objects.bulk_create([
+            ArchivedPayment(
+                id=payment.pk, order_id=payment.order_id, tailor_id=payment.tailor_id, amount=payment.amount,
+                method=payment.method, paid_at=payment.paid_at, note=payment.note, created_at=payment.created_at,
+            )
+            for payment in Payment.objects.filter(order_id__in=ids)
+        ])
+        # Cascades to tasks, materials, images and payments, and leaves sync
+        # tombstones so offline clients drop their copies.
+        Order.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def _archive_appointment_chunk(before, chunk_size):
+    with transaction.atomic():
+        appointments = list(archivable_appointments(before).order_by('pk')[:chunk_size])
+        if not appointments:
+            return 0
+        ArchivedAppointment.objects.bulk_create([
+            ArchivedAppointment(
+                id=appt.pk, tailor_id=appt.tailor_id, customer_id=appt.customer_id, title=appt.title,
+                start_time=appt.start_time, end_time=appt.end_time, status=appt.status, notes=appt.notes,
+            )
+            for appt in appointments
+        ])
+        Appointment.objects.filter(pk__in=[appt.pk for appt in appointments]).delete()
+    return len(appointments)
+
+
+def archive(days=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """ Archive everything older than ``days``, one chunk per transaction. Returns (orders, appointments). """
+    before = cutoff(days)
+    totals = []
+    for archive_chunk in (_archive_order_chunk, _archive_appointment_chunk):
+        total = 0
+        while True:
+            moved = archive_chunk(before, chunk_size)
+            total += moved
+            if moved < chunk_size:
+                break
+        totals.append(total)
+    return tuple(totals)
+
+
+# --- Unified reads ---
+
+def order_history(**filters):
+    """
+    Hot and archived orders matching ``filters`` (e.g. customer_id=...,
+    customer__tailor_id=...) as dicts with HISTORY_FIELDS, newest first, in
+    one UNION query.
+    """
+    def rows(model, archived):
+        return model.objects.filter(**filters).annotate(
+            balance=F('price') - F('amount_paid'),
+            archived=Value(archived, output_field=BooleanField()),
+        ).values(*HISTORY_FIELDS)
+
+    return rows(Order, False).union(rows(ArchivedOrder, True), all=True).order_by('-created_at')
+
+
+def find_order(pk, **filters):
+    """ The hot Order, else the ArchivedOrder, with this id and ``filters``; None if neither. """
+    return (
+        Order.objects.filter(pk=pk, **filters).first()
+        or ArchivedOrder.objects.filter(pk=pk, **filters).first()
+    )
+
+
+def archived_appointments(tailor_id, start, end):
+    """ Archived appointments overlapping [start, end), from the (tailor, start_time) index. """
+    return ArchivedAppointment.objects.filter(
+        tailor_id=tailor_id,
+        start_time__gt=start - MAX_APPOINTMENT_LENGTH,
+        start_time__lt=end,
+        end_time__gt=start,
+    ).order_by('start_time')
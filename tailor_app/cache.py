@@ -0,0 +1,132 @@
+# tailor_app/cache.py
+
+"""
+Per-tailor versioned caching.
+
+Every tailor has a namespace version stored in the cache. Cache keys for that
+tailor's lists and fragments embed the current version, so bumping it (done by
+the post_save/post_delete receivers in signals.py) makes all of the tailor's
+entries unreachable at once. Stale entries are never deleted explicitly; they
+age out of the bounded LRU backend.
+
+Entries that depend on only part of a tailor's data (e.g. the profit summary,
+which only orders feed) are cached under a ``scope`` with its own version as
+well. Bumping the scope invalidates just those entries; bumping the tailor's
+version still invalidates everything.
+"""
+
+import hashlib
+import threading
+import time
+
+from django.core.cache import caches
+from django.conf import settings
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+# Entries built from orders and their materials (signals.py bumps it)
+ORDERS_SCOPE = 'orders'
+
+
+def get_cache():
+    return caches[getattr(settings, 'TENANT_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'TENANT_CACHE_TIMEOUT', 600)
+
+
+def _record(counter):
+    with _stats_lock:
+        _stats[counter] += 1
+
+
+def cache_stats():
+    """ Hit/miss/invalidation counters for this process. """
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+    return stats
+
+
+def _version_key(tailor_id, scope=None):
+    return f'tenant:{tailor_id}:version' if scope is None else f'tenant:{tailor_id}:{scope}:version'
+
+
+def current_version(key):
+    """ The version number stored under ``key``, creating it if missing. """
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock rather than 1 so that a version evicted from the
+        # cache can't come back as a number old entries were stored under.
+        version = time.time_ns()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_version(key):
+    """ Move the version stored under ``key`` on, so nothing matches the old one. """
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def tenant_version(tailor_id, scope=None):
+    """ Current namespace (or ``scope``) version for a tailor, creating it if missing. """
+    return current_version(_version_key(tailor_id, scope))
+
+
+def bump_tenant_version(tailor_id, scope=None):
+    """ Invalidate everything cached for a tailor, or only their entries in ``scope``. """
+    bump_version(_version_key(tailor_id, scope))
+    _record('invalidations')
+
+
+def tenant_key(tailor_id, name, *vary_on, scope=None):
+    """ Build a versioned key for one of a tailor's cached entries. """
+    key = f'tenant:{tailor_id}:{tenant_version(tailor_id)}:{name}'
+    if scope is not None:
+        key = f'{key}:{scope}.{tenant_version(tailor_id, scope)}'
+    if vary_on:
+        digest = hashlib.md5(':'.join(str(v) for v in vary_on).encode(), usedforsecurity=False)
+        key = f'{key}:{digest.hexdigest()}'
+    return key
+
+
+def cached_value(key, build):
+    """
+    Return the value cached under ``key``, calling ``build()`` and storing its
+    result on a miss. ``build`` must return something picklable, e.g. a list of
+    model instances rather than a lazy queryset.
+    """
+    cache = get_cache()
+    result = cache.get(key)
+    if result is None:
+        _record('misses')
+        result = build()
+        cache.set(key, result, _timeout())
+    else:
+        _record('hits')
+    return result
+
+
+def cached_query(tailor_id, name, build, *vary_on, scope=None):
+    """ cached_value() under the tailor's current namespace (and ``scope``) version. """
+    return cached_value(tenant_key(tailor_id, name, *vary_on, scope=scope), build)
+
+
+def get_fragment(tailor_id, name, *vary_on):
+    key = tenant_key(tailor_id, name, *vary_on)
+    fragment = get_cache().get(key)
+    _record('misses' if fragment is None else 'hits')
+    return key, fragment
+
+
+def set_fragment(key, fragment):
+    get_cache().set(key, fragment, _timeout())
@@ -2,11 +2,14 @@
 
 from django import forms
 from .models import (
-    Customer, Order, Measurement, OrderImage, 
+    Customer, Order, Measurement, OrderImage, Payment,
     Appointment, Supplier, InventoryItem, OrderMaterial,
-    WorkflowTemplate, TaskDefinition
+    WorkflowTemplate, TaskDefinition, OrderTask
 )
 from django.forms import inlineformset_factory
+from django.utils import timezone
+from .recurrence import RecurrenceRule
+from .scheduling import BLOCKING_STATUSES, check_series, check_slot
 
 # This is the base class that will add the 'form-control' class to all fields
 class BootstrapModelForm(forms.ModelForm):
@@ -24,7 +27,7 @@ class CustomerForm(BootstrapModelForm):
 class OrderForm(BootstrapModelForm):
     class Meta:
         model = Order
-        fields = ['item', 'status', 'due_date', 'notes', 'price', 'amount_paid', 'fabric_details']
+        fields = ['item', 'status', 'due_date', 'notes', 'price', 'fabric_details']
         widgets = {
             'due_date': forms.DateInput(attrs={'type': 'date'}),
         }
@@ -42,26 +45,73 @@ class MeasurementForm(BootstrapModelForm):
             }),
         }
 
+    def clean_name(self):
+        # "chest " and "Chest" should be the same measurement's history
+        name = ' '.join(self.cleaned_data['name'].split())
+        return name[:1].upper() + name[1:]
+
 class OrderImageForm(BootstrapModelForm):
     class Meta:
         model = OrderImage
         fields = ['image', 'caption']
 
-class AppointmentForm(BootstrapModelForm):
+class PaymentForm(BootstrapModelForm):
+    class Meta:
+        model = Payment
+        fields = ['amount', 'method', 'paid_at', 'note']
+        widgets = {
+            'paid_at': forms.DateTimeInput(attrs={'type': 'datetime-local'}, format='%Y-%m-%dT%H:%M'),
+        }
+
+    def clean_amount(self):
+        amount = self.cleaned_data['amount']
+        if amount <= 0:
+            raise forms.ValidationError("Enter an amount greater than zero.")
+        return amount
+
+class AppointmentSlotMixin:
+    """ Rejects times that overlap the tailor's other Confirmed/Requested appointments. """
+    tailor_id = None
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get('start_time'), cleaned_data.get('end_time')
+        tailor_id = self.tailor_id or self.instance.tailor_id
+        recurrence = cleaned_data.get('recurrence', self.instance.recurrence)
+        if start and end and tailor_id and self.instance.status in BLOCKING_STATUSES:
+            if recurrence:
+                check_series(tailor_id, start, end, recurrence, exclude_id=self.instance.pk)
+            else:
+                check_slot(tailor_id, start, end, exclude_id=self.instance.pk)
+        return cleaned_data
+
+class AppointmentForm(AppointmentSlotMixin, BootstrapModelForm):
     class Meta:
         model = Appointment
-        fields = ['customer', 'title', 'start_time', 'end_time', 'notes']
+        fields = ['customer', 'title', 'start_time', 'end_time', 'notes', 'recurrence']
         widgets = {
             'start_time': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
             'end_time': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
         }
+        labels = {'recurrence': 'Repeat (optional)'}
     
     def __init__(self, *args, **kwargs):
         user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
         if user:
+            self.tailor_id = user.id
             self.fields['customer'].queryset = Customer.objects.filter(tailor=user)
 
+    def clean_recurrence(self):
+        recurrence = self.cleaned_data.get('recurrence', '').strip()
+        if not recurrence:
+            return ''
+        try:
+            # Store the normalized form, e.g. 'freq=weekly;byday=sa' -> 'FREQ=WEEKLY;BYDAY=SA'
+            return str(RecurrenceRule.parse(recurrence, timezone.get_current_timezone()))
+        except ValueError as e:
+            raise forms.ValidationError(str(e))
+
 class SupplierForm(BootstrapModelForm):
     class Meta:
         model = Supplier
@@ -100,12 +150,13 @@ TaskDefinitionFormSet = inlineformset_factory(
     WorkflowTemplate,
     TaskDefinition,
     # 'DELETE' has been removed from the fields list
-    fields=('name', 'order'), 
+    fields=('name', 'order', 'estimated_minutes'), 
     extra=1,
     can_delete=True,
     widgets = {
         'name': forms.TextInput(attrs={'class': 'block w-full mt-1 text-sm dark:border-gray-600 dark:bg-gray-700 focus:border-purple-400 focus:outline-none focus:shadow-outline-purple dark:text-gray-300 dark:focus:shadow-outline-gray form-input'}),
         'order': forms.NumberInput(attrs={'class': 'block w-full mt-1 text-sm dark:border-gray-600 dark:bg-gray-700 focus:border-purple-400 focus:outline-none focus:shadow-outline-purple dark:text-gray-300 dark:focus:shadow-outline-gray form-input'}),
+        'estimated_minutes': forms.NumberInput(attrs={'class': 'block w-full mt-1 text-sm dark:border-gray-600 dark:bg-gray-700 focus:border-purple-400 focus:outline-none focus:shadow-outline-purple dark:text-gray-300 dark:focus:shadow-outline-gray form-input', 'placeholder': 'Minutes'}),
     }
 )
 # --- END OF CORRECTION ---
@@ -124,3 +175,33 @@ class ApplyWorkflowForm(forms.Form):
         if user:
             self.fields['template'].queryset = WorkflowTemplate.objects.filter(tailor=user)
 
+
+class OrderTaskStatusForm(forms.ModelForm):
+    """ Toggles a task's completion, stamping completed_at the same way the task checkbox does. """
+    class Meta:
+        model = OrderTask
+        fields = ['is_completed']
+
+    def save(self, commit=True):
+        task = super().save(commit=False)
+        if not task.is_completed:
+            task.completed_at = None
+        elif task.completed_at is None:
+            task.completed_at = timezone.now()
+        if commit:
+            task.save()
+        return task
+
+class CsvImportForm(forms.Form):
+    KIND_CHOICES = [
+        ('customers', 'Customers'),
+        ('measurements', 'Measurements'),
+        ('orders', 'Orders'),
+    ]
+    kind = forms.ChoiceField(
+        choices=KIND_CHOICES,
+        widget=forms.Select(attrs={'class': 'block w-full mt-1 text-sm dark:text-gray-300 dark:border-gray-600 dark:bg-gray-700 form-select focus:border-purple-400 focus:outline-none focus:shadow-outline-purple dark:focus:shadow-outline-gray'})
+    )
+    file = forms.FileField(
+        widget=forms.ClearableFileInput(attrs={'class': 'block w-full mt-1 text-sm dark:text-gray-300', 'accept': '.csv'})
+    )
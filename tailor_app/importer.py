@@ -0,0 +1,207 @@
+# tailor_app/importer.py
+
+"""
+Streaming CSV import of customers, measurements and orders.
+
+Rows are read one at a time from the file and validated with CustomerForm,
+MeasurementForm or OrderForm, exactly as if entered by hand (field rules,
+``clean_<field>()`` and ``clean()``), except that phone uniqueness is checked
+per batch rather than per row. Every ``batch_size`` rows the
+customers they refer to are resolved by phone in a single query and the valid
+rows are inserted with ``bulk_create`` inside a transaction. A bad row is
+reported with its line number and skipped; it never aborts the batch. A file
+that isn't UTF-8 CSV stops the import with ImportFileError, after the batches
+already inserted.
+
+An order's amount_paid is recorded as one opening Payment, so the order's
+running total matches its payment history.
+
+Memory stays bounded by the batch size: only the current batch and at most
+MAX_REPORTED_ERRORS error messages are held at once.
+
+Expected columns (header row required, extra columns are ignored):
+
+* customers:    name, phone, email, address
+* measurements: phone, name, value
+* orders:       phone, item, status, due_date, price, amount_paid, notes, fabric_details
+"""
+
+import csv
+
+from django import forms
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.db import transaction
+
+from .forms import CustomerForm, MeasurementForm, OrderForm
+from .models import Customer, Measurement, Order, Payment
+from .signals import bulk_created
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+AMOUNT_PAID_FIELD = forms.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+
+IMPORT_KINDS = {
+    'customers': (Customer, CustomerForm),
+    'measurements': (Measurement, MeasurementForm),
+    'orders': (Order, OrderForm),
+}
+
+
+class ImportFileError(Exception):
+    """ The file can't be read as CSV; ``result`` has what was imported before that. """
+
+    def __init__(self, message, result):
+        super().__init__(message)
+        self.result = result
+
+
+class ImportResult:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.skipped = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+def _import_form(form_class):
+    class ImportForm(form_class):
+        def validate_unique(self):
+            # _flush looks the batch's phones up in one query instead.
+            pass
+    return ImportForm
+
+
+class RowCleaner:
+    """
+    Validates CSV rows with the full form validation. One bound form is reused
+    for every row, since building a ModelForm (deep-copied fields and widgets)
+    costs several times more than validating it.
+    """
+
+    def __init__(self, form_class, model):
+        self.model = model
+        self.fields = list(form_class.base_fields)
+        self.model_fields = {name: model._meta.get_field(name) for name in self.fields}
+        self.form = _import_form(form_class)(data={})
+
+    def clean(self, row):
+        """
+        Validate one row. Blank cells of fields with a model default get the
+        default. Returns (cleaned_data, errors).
+        """
+        data = {}
+        for name, model_field in self.model_fields.items():
+            value = (row.get(name) or '').strip()
+            data[name] = model_field.get_default() if value == '' and model_field.has_default() else value
+        form = self.form
+        # What a new form_class(data) would start with.
+        form.data = data
+        form.instance = self.model()
+        form._errors = None
+        if form.is_valid():
+            return {name: form.cleaned_data[name] for name in self.fields}, []
+        errors = [
+            f"{name}: {' '.join(messages)}" if name != NON_FIELD_ERRORS else ' '.join(messages)
+            for name, messages in form.errors.items()
+        ]
+        return None, errors
+
+
+class CsvImporter:
+    def __init__(self, tailor, kind, batch_size=DEFAULT_BATCH_SIZE):
+        if kind not in IMPORT_KINDS:
+            raise ValueError(f"Unknown import kind '{kind}'. Choose from: {', '.join(IMPORT_KINDS)}.")
+        self.tailor = tailor
+        self.kind = kind
+        self.model, form_class = IMPORT_KINDS[kind]
+        self.cleaner = RowCleaner(form_class, self.model)
+        self.batch_size = batch_size
+        self.result = ImportResult()
+
+    def run(self, text_stream):
+        """ Import from a text stream (file opened in text mode, newline=''). """
+        reader = csv.DictReader(text_stream)
+        batch = []
+        try:
+            for row in reader:
+                self.result.rows += 1
+                batch.append((reader.line_num, row))
+                if len(batch) >= self.batch_size:
+                    self._flush(batch)
+                    batch = []
+        except UnicodeDecodeError:
+            raise ImportFileError(f"Line {reader.line_num + 1} isn't UTF-8 text; save the file as UTF-8 CSV.", self.result)
+        except csv.Error as e:
+            raise ImportFileError(f"Line {reader.line_num}: {e}.", self.result)
+        if batch:
+            self._flush(batch)
+        return self.result
+
+    def _flush(self, batch):
+        phones = {(row.get('phone') or '').strip() for _, row in batch}
+        phones.discard('')
+        # phone is unique across all tailors, so look it up without the tailor
+        # filter and reject rows that belong to someone else.
+        known = dict(
+            Customer.objects.filter(phone__in=phones).values_list('phone', 'tailor_id')
+            if self.kind == 'customers' else
+            Customer.objects.filter(phone__in=phones, tailor=self.tailor).values_list('phone', 'id')
+        )
+
+        objects = []
+        seen_phones = set()
+        for line, row in batch:
+            cleaned, errors = self.cleaner.clean(row)
+            phone = (row.get('phone') or '').strip()
+            if errors:
+                self.result.add_error(line, '; '.join(errors))
+                continue
+
+            if self.kind == 'customers':
+                if phone in known or phone in seen_phones:
+                    if known.get(phone) == self.tailor.id or phone in seen_phones:
+                        self.result.skipped += 1
+                    else:
+                        self.result.add_error(line, f"phone: {phone} belongs to another tailor's customer.")
+                    continue
+                seen_phones.add(phone)
+                objects.append(Customer(tailor=self.tailor, **cleaned))
+            else:
+                customer_id = known.get(phone)
+                if customer_id is None:
+                    self.result.add_error(line, f"phone: no customer with phone '{phone}'.")
+                    continue
+                obj = self.model(customer_id=customer_id, **cleaned)
+                if self.kind == 'orders':
+                    try:
+                        obj.amount_paid = AMOUNT_PAID_FIELD.clean((row.get('amount_paid') or '').strip()) or 0
+                    except ValidationError as e:
+                        self.result.add_error(line, f"amount_paid: {' '.join(e.messages)}")
+                        continue
+                objects.append(obj)
+
+        if objects:
+            with transaction.atomic():
+                self.model.objects.bulk_create(objects, batch_size=self.batch_size)
+                if self.kind == 'orders':
+                    Payment.objects.bulk_create([
+                        Payment(order_id=order.pk, tailor_id=self.tailor.id, amount=order.amount_paid,
+                                method='Other', note='Imported with the order')
+                        for order in objects if order.amount_paid
+                    ], batch_size=self.batch_size)
+            self.result.created += len(objects)
+            # bulk_create doesn't send post_save, so caches are told separately
+            bulk_created.send(
+                sender=self.model, tailor_id=self.tailor.id,
+                customer_ids={getattr(obj, 'customer_id', None) for obj in objects} - {None},
+            )
+
+
+def import_csv(text_stream, tailor, kind, batch_size=DEFAULT_BATCH_SIZE):
+    return CsvImporter(tailor, kind, batch_size=batch_size).run(text_stream)
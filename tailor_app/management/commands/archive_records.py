@@ -0,0 +1,23 @@
+# tailor_app/management/commands/archive_records.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tailor_app.archive import DEFAULT_CHUNK_SIZE, archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves closed orders and past appointments older than ARCHIVE_AFTER_DAYS "
+        "into the archive tables, one chunk per transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ARCHIVE_AFTER_DAYS, help="Archive records older than this many days.")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rows moved per transaction.")
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['chunk_size'] < 1:
+            raise CommandError("--days and --chunk-size must be at least 1.")
+        orders, appointments = archive(options['days'], options['chunk_size'])
+        self.stdout.write(f"Archived {orders} orders and {appointments} appointments.")
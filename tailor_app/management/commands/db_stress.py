@@ -0,0 +1,74 @@
+# tailor_app/management/commands/db_stress.py
+
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction, OperationalError
+
+TABLE = 'db_stress_scratch'
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs concurrent writers against the configured database and reports "
+        "lock errors. Uses a scratch table that is dropped afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=16, help="Number of concurrent writer threads.")
+        parser.add_argument('--iterations', type=int, default=200, help="Transactions per writer.")
+
+    def handle(self, *args, **options):
+        writers = options['writers']
+        iterations = options['iterations']
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+            cursor.execute(f"CREATE TABLE {TABLE} (id integer PRIMARY KEY, worker integer NOT NULL, hits integer NOT NULL)")
+            # Row 0 is a shared counter every writer updates, to force contention.
+            cursor.execute(f"INSERT INTO {TABLE} (id, worker, hits) VALUES (0, -1, 0)")
+
+        errors = []
+        lock = threading.Lock()
+
+        def writer(worker_id):
+            try:
+                for i in range(iterations):
+                    try:
+                        with transaction.atomic():
+                            with connection.cursor() as cursor:
+                                cursor.execute(
+                                    f"INSERT INTO {TABLE} (id, worker, hits) VALUES (%s, %s, 1)",
+                                    [worker_id * iterations + i + 1, worker_id],
+                                )
+                                cursor.execute(f"UPDATE {TABLE} SET hits = hits + 1 WHERE id = 0")
+                    except OperationalError as e:
+                        with lock:
+                            errors.append(str(e))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT hits FROM {TABLE} WHERE id = 0")
+            committed = cursor.fetchone()[0]
+            cursor.execute(f"DROP TABLE {TABLE}")
+
+        attempted = writers * iterations
+        self.stdout.write(f"Backend:      {connection.vendor}")
+        self.stdout.write(f"Writers:      {writers} x {iterations} transactions")
+        self.stdout.write(f"Committed:    {committed}/{attempted}")
+        self.stdout.write(f"Elapsed:      {elapsed:.2f}s ({committed / elapsed:.0f} tx/s)")
+
+        if errors:
+            locked = sum('locked' in e for e in errors)
+            raise CommandError(f"{len(errors)} transactions failed ({locked} 'database is locked'). First error: {errors[0]}")
+        self.stdout.write(self.style.SUCCESS("No lock errors."))
@@ -0,0 +1,34 @@
+# tailor_app/management/commands/export_tenant.py
+
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from tailor_app.tenant_export import export_lines
+
+
+class Command(BaseCommand):
+    help = "Streams one tailor's complete dataset as JSONL."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tailor', required=True, help="Username of the tailor to export.")
+        parser.add_argument('-o', '--output', help="File to write (default: stdout).")
+
+    def handle(self, *args, **options):
+        try:
+            tailor = User.objects.get(username=options['tailor'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named '{options['tailor']}'.")
+
+        out = open(options['output'], 'w', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            lines = 0
+            for line in export_lines(tailor):
+                out.write(line)
+                lines += 1
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        if options['output']:
+            self.stderr.write(f"Wrote {lines - 1} rows to {options['output']}.")
@@ -0,0 +1,39 @@
+# tailor_app/management/commands/import_csv.py
+
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from tailor_app.importer import IMPORT_KINDS, DEFAULT_BATCH_SIZE, import_csv
+
+
+class Command(BaseCommand):
+    help = "Imports customers, measurements or orders for a tailor from a CSV file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(IMPORT_KINDS))
+        parser.add_argument('path', help="CSV file with a header row.")
+        parser.add_argument('--tailor', required=True, help="Username of the tailor who owns the data.")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            tailor = User.objects.get(username=options['tailor'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named '{options['tailor']}'.")
+
+        started = time.perf_counter()
+        with open(options['path'], newline='', encoding='utf-8-sig') as f:
+            result = import_csv(f, tailor, options['kind'], batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+
+        for line, message in result.errors:
+            self.stderr.write(f"line {line}: {message}")
+        if result.error_count > len(result.errors):
+            self.stderr.write(f"... and {result.error_count - len(result.errors)} more errors")
+
+        self.stdout.write(
+            f"{result.rows} rows in {elapsed:.1f}s: {result.created} created, "
+            f"{result.skipped} skipped, {result.error_count} errors."
+        )
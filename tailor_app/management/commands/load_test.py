@@ -0,0 +1,69 @@
+# tailor_app/management/commands/load_test.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from the_digital_thread import loadtest
+
+
+class Command(BaseCommand):
+    help = (
+        "Serves the WSGI application locally and drives mixed tailor and portal "
+        "traffic at it from a scenario file, then reports latency, throughput and "
+        "errors per scenario. Writes to the configured database; use a scratch copy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', default=str(settings.BASE_DIR / 'loadtest' / 'mixed.json'), help="Scenario JSON file.")
+        parser.add_argument('--duration', type=int, help="Override the scenario's duration in seconds.")
+        parser.add_argument('--url', help="Drive an already running server at this base URL instead of starting one.")
+        parser.add_argument('--keep', action='store_true', help="Keep the seeded accounts and their data afterwards.")
+
+    def handle(self, *args, **options):
+        try:
+            scenario = loadtest.load_scenario(options['scenario'])
+        except OSError as e:
+            raise CommandError(f"Can't read the scenario file: {e}")
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options['duration']:
+            scenario['duration'] = options['duration']
+
+        accounts = loadtest.seed(scenario)
+        self.stdout.write(
+            f"Seeded {len(accounts['tailors'])} tailors and {len(accounts['customers'])} portal customers."
+        )
+        server = None
+        try:
+            if options['url']:
+                base_url = options['url'].rstrip('/')
+            else:
+                server, base_url = loadtest.start_server()
+            users = sum(spec['users'] for spec in scenario['scenarios'])
+            self.stdout.write(f"Driving {base_url} with {users} users for {scenario['duration']}s...")
+            try:
+                results, elapsed = loadtest.run(scenario, base_url, accounts)
+            except loadtest.ScenarioError as e:
+                raise CommandError(str(e))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.join()
+            if not options['keep']:
+                loadtest.cleanup(accounts['prefix'])
+
+        rows = loadtest.summarize(results, elapsed)
+        self.stdout.write("")
+        self.stdout.write(
+            f"{'scenario':<14} {'action':<20} {'requests':>8} {'req/s':>7} {'p50 ms':>8} {'p90 ms':>8} "
+            f"{'p99 ms':>8} {'max ms':>8} {'errors':>7}"
+        )
+        for row in rows:
+            line = (
+                f"{row['scenario']:<14} {row['action']:<20} {row['requests']:>8} {row['rps']:>7.1f} "
+                f"{row['p50_ms']:>8.0f} {row['p90_ms']:>8.0f} {row['p99_ms']:>8.0f} {row['max_ms']:>8.0f} "
+                f"{row['error_rate']:>6.1%}"
+            )
+            if row['errors']:
+                line += '  ' + ', '.join(f'{error}: {count}' for error, count in sorted(row['errors'].items(), key=str))
+            self.stdout.write(self.style.MIGRATE_HEADING(line) if row['action'] == 'all' else line)
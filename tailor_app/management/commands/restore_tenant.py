@@ -0,0 +1,32 @@
+# tailor_app/management/commands/restore_tenant.py
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from tailor_app.tenant_export import RestoreError, restore_lines
+
+
+class Command(BaseCommand):
+    help = "Restores a JSONL tenant export into a tailor's account, remapping primary keys."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="JSONL file written by export_tenant.")
+        parser.add_argument('--tailor', required=True, help="Username of the tailor to restore into.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            tailor = User.objects.get(username=options['tailor'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named '{options['tailor']}'.")
+
+        with open(options['path'], encoding='utf-8') as f:
+            try:
+                counts = restore_lines(f, tailor, batch_size=options['batch_size'])
+            except (RestoreError, IntegrityError) as e:
+                raise CommandError(f"Restore failed and was rolled back: {e}")
+
+        for name, count in counts.items():
+            self.stdout.write(f"{name:<18} {count}")
+        self.stdout.write(self.style.SUCCESS(f"Restored {sum(counts.values())} rows."))
@@ -0,0 +1,27 @@
+# tailor_app/management/commands/segment_customers.py
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from tailor_app.models import Customer
+from tailor_app.segments import segment_customers
+
+
+class Command(BaseCommand):
+    help = "Recomputes customer RFM segments and lifetime value. Run nightly, e.g. from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tailor', help="Username of one tailor to segment (default: every tailor with customers).")
+
+    def handle(self, *args, **options):
+        if options['tailor']:
+            try:
+                tailor_ids = [User.objects.get(username=options['tailor']).pk]
+            except User.DoesNotExist:
+                raise CommandError(f"No user named '{options['tailor']}'.")
+        else:
+            tailor_ids = Customer.objects.values_list('tailor_id', flat=True).distinct().order_by()
+
+        for tailor_id in tailor_ids:
+            written = segment_customers(tailor_id)
+            self.stdout.write(f"Tailor #{tailor_id}: {written} customers segmented.")
@@ -0,0 +1,86 @@
+# tailor_app/management/commands/slow_requests.py
+
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from the_digital_thread.slow_requests import normalize_sql, read_entries
+
+SQL_PREVIEW_LENGTH = 160
+
+
+def _moment(value, option):
+    """ An ISO date or datetime in the local time zone. """
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"{option} must be an ISO date or datetime, e.g. 2026-10-01 or 2026-10-01T09:00.")
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+class Command(BaseCommand):
+    help = "Summarizes the slow-request log: the worst endpoints and queries over a time range."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=settings.SLOW_REQUEST_LOG, help="Log to read, rotated backups included (default: SLOW_REQUEST_LOG).")
+        parser.add_argument('--since', help="Only requests at or after this ISO date/datetime (default: 7 days ago).")
+        parser.add_argument('--until', help="Only requests before this ISO date/datetime.")
+        parser.add_argument('--top', type=int, default=10, help="How many endpoints and queries to list.")
+
+    def handle(self, *args, **options):
+        if not options['file']:
+            raise CommandError("No log file: set SLOW_REQUEST_LOG or pass --file.")
+        since = _moment(options['since'], '--since') if options['since'] else timezone.now() - timedelta(days=7)
+        until = _moment(options['until'], '--until') if options['until'] else None
+
+        endpoints, queries = {}, {}
+        for entry in read_entries(options['file'], since, until):
+            endpoint = endpoints.setdefault((entry['method'], entry['route'] or entry['path']), {
+                'times': [], 'sql_count': 0, 'sql_ms': 0.0,
+            })
+            endpoint['times'].append(entry['ms'])
+            endpoint['sql_count'] += entry['sql_count']
+            endpoint['sql_ms'] += entry['sql_ms']
+            plans = {plan['sql']: plan['plan'] for plan in entry['explain']}
+            for statement in entry['statements']:
+                query = queries.setdefault(normalize_sql(statement['sql']), {
+                    'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'routes': set(), 'plan': None,
+                })
+                query['count'] += 1
+                query['total_ms'] += statement['ms']
+                query['max_ms'] = max(query['max_ms'], statement['ms'])
+                query['routes'].add(entry['route'] or entry['path'])
+                query['plan'] = plans.get(statement['sql'], query['plan'])
+
+        if not endpoints:
+            self.stdout.write("No slow requests in that range.")
+            return
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Slowest endpoints (by total time spent)"))
+        self.stdout.write(f"{'requests':>8} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'avg SQL':>8} {'SQL %':>6}  endpoint")
+        ranked = sorted(endpoints.items(), key=lambda item: sum(item[1]['times']), reverse=True)
+        for (method, route), stats in ranked[:options['top']]:
+            times = sorted(stats['times'])
+            self.stdout.write(
+                f"{len(times):>8} {_percentile(times, 50):>9.0f} {_percentile(times, 95):>9.0f} {times[-1]:>9.0f} "
+                f"{stats['sql_count'] / len(times):>8.1f} {100 * stats['sql_ms'] / sum(times):>5.0f}%  {method} {route}"
+            )
+
+        self.stdout.write("")
+        self.stdout.write(self.style.MIGRATE_HEADING("Most expensive queries (by total time)"))
+        ranked = sorted(queries.items(), key=lambda item: item[1]['total_ms'], reverse=True)
+        for sql, stats in ranked[:options['top']]:
+            preview = sql if len(sql) <= SQL_PREVIEW_LENGTH else sql[:SQL_PREVIEW_LENGTH] + '...'
+            self.stdout.write(
+                f"{stats['total_ms']:.1f} ms total, {stats['count']} runs, max {stats['max_ms']:.1f} ms, "
+                f"in {', '.join(sorted(stats['routes']))}"
+            )
+            self.stdout.write(f"  {preview}")
+            for line in stats['plan'] or []:
+                self.stdout.write(f"    {line}")
@@ -0,0 +1,123 @@
+# tailor_app/management/commands/startup_benchmark.py
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Loads what a worker loads before it can serve: settings, apps, the WSGI
+# handler and the URLconf (which imports every view module).
+IMPORT_SCRIPT = """
+import django
+django.setup()
+import the_digital_thread.wsgi
+from importlib import import_module
+from django.conf import settings
+import_module(settings.ROOT_URLCONF)
+"""
+
+# Boots the WSGI application and serves one request, like a fresh worker.
+FIRST_RESPONSE_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from the_digital_thread.wsgi import application
+loaded = time.perf_counter()
+from wsgiref.util import setup_testing_defaults
+environ = {'PATH_INFO': sys.argv[1], 'REQUEST_METHOD': 'GET', 'HTTP_HOST': sys.argv[2]}
+setup_testing_defaults(environ)
+status = []
+body = application(environ, lambda s, headers, exc_info=None: status.append(s))
+b''.join(body)
+finished = time.perf_counter()
+print(json.dumps({'load': loaded - started, 'response': finished - loaded, 'status': status[0]}))
+"""
+
+
+def _host():
+    """ A Host header ALLOWED_HOSTS accepts, so the first request isn't a 400. """
+    for host in settings.ALLOWED_HOSTS:
+        host = 'localhost' if host == '*' else host.lstrip('.')
+        if host:
+            return host
+    return 'localhost'
+
+
+def _import_times(stderr):
+    """ (total microseconds, {top-level package: self microseconds}) from -X importtime output. """
+    total, by_package = 0, {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):
+            total += int(cumulative_us)
+        package = name.strip().split('.')[0]
+        by_package[package] = by_package.get(package, 0) + int(self_us)
+    return total, by_package
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures worker start-up in fresh interpreters: `python -X importtime` totals "
+        "for booting the app, and time to the first response."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters to start for each measurement.")
+        parser.add_argument('--path', default='/accounts/login/', help="Path of the first request.")
+        parser.add_argument('--top', type=int, default=10, help="How many of the slowest packages to list.")
+
+    def _python(self, *args):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'the_digital_thread.settings'))
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, *args], cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        elapsed = time.perf_counter() - started
+        if result.returncode:
+            raise CommandError(f"The benchmark interpreter failed:\n{result.stderr[-2000:]}")
+        return result, elapsed
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError("--runs must be at least 1.")
+
+        totals, packages = [], {}
+        for _ in range(options['runs']):
+            result, _ = self._python('-X', 'importtime', '-c', IMPORT_SCRIPT)
+            total, by_package = _import_times(result.stderr)
+            totals.append(total)
+            for package, us in by_package.items():
+                packages.setdefault(package, []).append(us)
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Imports (python -X importtime)"))
+        self.stdout.write(f"Total: {statistics.median(totals) / 1000:.0f} ms (median of {options['runs']})")
+        slowest = sorted(packages.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+        for package, times in slowest[:options['top']]:
+            self.stdout.write(f"  {statistics.median(times) / 1000:>8.1f} ms  {package}")
+
+        runs = []
+        for _ in range(options['runs']):
+            result, wall = self._python('-c', FIRST_RESPONSE_SCRIPT, options['path'], _host())
+            run = dict(json.loads(result.stdout.strip().splitlines()[-1]), wall=wall)
+            if not run['status'].startswith(('2', '3')):
+                raise CommandError(
+                    f"GET {options['path']} returned {run['status']}, so there is no first response to time. "
+                    "Check ALLOWED_HOSTS, run collectstatic, or pass a different --path."
+                )
+            runs.append(run)
+
+        self.stdout.write("")
+        self.stdout.write(self.style.MIGRATE_HEADING(f"First response (GET {options['path']}, {runs[0]['status']})"))
+        for label, key in (
+            ("Load WSGI application", 'load'),
+            ("First request", 'response'),
+            ("Process start to exit", 'wall'),
+        ):
+            values = [run[key] * 1000 for run in runs]
+            self.stdout.write(f"  {label:<24} median {statistics.median(values):>7.0f} ms, max {max(values):>7.0f} ms")
@@ -0,0 +1,27 @@
+# tailor_app/management/commands/summarize_task_cycles.py
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from tailor_app.analytics import summarize
+from tailor_app.models import WorkflowTemplate
+
+
+class Command(BaseCommand):
+    help = "Recomputes task cycle-time summaries for the analytics page. Run nightly, e.g. from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tailor', help="Username of one tailor to summarize (default: every tailor with workflows).")
+
+    def handle(self, *args, **options):
+        if options['tailor']:
+            try:
+                tailor_ids = [User.objects.get(username=options['tailor']).pk]
+            except User.DoesNotExist:
+                raise CommandError(f"No user named '{options['tailor']}'.")
+        else:
+            tailor_ids = WorkflowTemplate.objects.values_list('tailor_id', flat=True).distinct().order_by()
+
+        for tailor_id in tailor_ids:
+            written = summarize(tailor_id)
+            self.stdout.write(f"Tailor #{tailor_id}: {written} summaries.")
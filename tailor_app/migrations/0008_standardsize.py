@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tailor_app', '0007_measurement_latest_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StandardSize',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chart', models.CharField(help_text="e.g., 'Men's Shirts', 'Kurta'", max_length=100)),
+                ('label', models.CharField(help_text="e.g., 'M', '40R'", max_length=20)),
+                ('measurements', models.JSONField(default=dict, help_text='e.g., {"Chest": 40, "Waist": 34}')),
+                ('tailor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standard_sizes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['chart', 'label'],
+            },
+        ),
+    ]
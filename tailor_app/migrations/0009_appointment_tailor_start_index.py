@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tailor_app', '0008_standardsize'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['tailor', 'start_time'], name='appointment_tailor_start_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tailor_app', '0009_appointment_tailor_start_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='recurrence',
+            field=models.CharField(blank=True, default='', help_text='e.g., FREQ=WEEKLY;BYDAY=SA;COUNT=6', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='recurrence_until',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='AppointmentException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_start', models.DateTimeField()),
+                ('is_cancelled', models.BooleanField(default=False)),
+                ('start_time', models.DateTimeField(blank=True, null=True)),
+                ('end_time', models.DateTimeField(blank=True, null=True)),
+                ('notes', models.TextField(blank=True, default='')),
+                ('appointment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exceptions', to='tailor_app.appointment')),
+            ],
+            options={
+                'unique_together': {('appointment', 'original_start')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tailor_app', '0010_recurring_appointments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskdefinition',
+            name='estimated_minutes',
+            field=models.PositiveIntegerField(default=60, help_text='Workshop time this task usually takes.'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tailor_app', '0011_taskdefinition_estimated_minutes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCycleSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('samples', models.PositiveIntegerField()),
+                ('p50_hours', models.FloatField()),
+                ('p90_hours', models.FloatField()),
+                ('mean_hours', models.FloatField()),
+                ('weekly_completions', models.JSONField(default=list)),
+                ('is_bottleneck', models.BooleanField(default=False)),
+                ('computed_at', models.DateTimeField()),
+                ('tailor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('task_definition', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cycle_summaries', to='tailor_app.taskdefinition')),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cycle_summaries', to='tailor_app.workflowtemplate')),
+            ],
+        ),
+    ]
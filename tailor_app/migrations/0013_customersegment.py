@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tailor_app', '0012_taskcyclesummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerSegment',
+            fields=[
+                ('customer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='segment', serialize=False, to='tailor_app.customer')),
+                ('segment', models.CharField(choices=[('Champion', 'Champion'), ('Loyal', 'Loyal'), ('New', 'New'), ('Regular', 'Regular'), ('At Risk', 'At Risk'), ('Lapsed', 'Lapsed'), ('Prospect', 'Prospect')], max_length=20)),
+                ('recency_days', models.PositiveIntegerField(blank=True, null=True)),
+                ('frequency', models.PositiveIntegerField(default=0)),
+                ('monetary', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('r_score', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('f_score', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('m_score', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('lifetime_value', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('computed_at', models.DateTimeField()),
+                ('tailor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tailor', 'segment'], name='segment_tailor_segment_idx'), models.Index(fields=['tailor', '-lifetime_value'], name='segment_tailor_ltv_idx')],
+            },
+        ),
+    ]
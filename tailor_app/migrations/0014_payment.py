@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:02
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def open_ledgers(apps, schema_editor):
+    """ One payment per order for whatever was paid before payments were recorded. """
+    Order = apps.get_model('tailor_app', 'Order')
+    Payment = apps.get_model('tailor_app', 'Payment')
+    orders = Order.objects.filter(amount_paid__gt=0).values_list('id', 'customer__tailor_id', 'amount_paid', 'updated_at')
+    Payment.objects.bulk_create(
+        (
+            Payment(order_id=order_id, tailor_id=tailor_id, amount=amount, method='Other',
+                    paid_at=updated_at, note='Paid before payment history was kept')
+            for order_id, tailor_id, amount, updated_at in orders.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tailor_app', '0013_customersegment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='amount_paid',
+            field=models.DecimalField(decimal_places=2, default=0.0, editable=False, max_digits=10),
+        ),
+        migrations.CreateModel(
+            name='Payment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('method', models.CharField(choices=[('Cash', 'Cash'), ('Card', 'Card'), ('UPI', 'UPI'), ('Bank Transfer', 'Bank Transfer'), ('Other', 'Other')], default='Cash', max_length=20)),
+                ('paid_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('note', models.CharField(blank=True, default='', max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payments', to='tailor_app.order')),
+                ('tailor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-paid_at'],
+                'indexes': [models.Index(fields=['tailor', 'paid_at'], name='payment_tailor_paid_at_idx')],
+            },
+        ),
+        migrations.RunPython(open_ledgers, migrations.RunPython.noop),
+    ]
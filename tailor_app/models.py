@@ -1,8 +1,15 @@
 # tailor_app/models.py
 
+import math
+
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, DecimalField, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, RowNumber, TruncMonth
 from django.utils import timezone
+from .recurrence import RecurrenceRule
 
 class Supplier(models.Model):
     tailor = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -21,6 +28,7 @@ class InventoryItem(models.Model):
     quantity_in_stock = models.PositiveIntegerField(default=0)
     cost_per_unit = models.DecimalField(max_digits=10, decimal_places=2)
     reorder_level = models.PositiveIntegerField(default=10, help_text="Quantity at which to reorder")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.name
@@ -33,11 +41,53 @@ class Customer(models.Model):
     email = models.EmailField(blank=True, null=True)
     address = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.name
 
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+class OrderQuerySet(models.QuerySet):
+    # Rollups for profit_by(): name -> the values() to group on
+    PROFIT_GROUPINGS = {
+        'customer': ('customer_id', 'customer__name'),
+        'item': ('item',),
+        'month': ('month',),
+    }
+
+    def with_profit(self):
+        """
+        Annotate material_cost (sum of quantity_used x cost_per_unit over the
+        order's materials, from one correlated subquery) and margin (price
+        minus material_cost).
+        """
+        material_cost = OrderMaterial.objects.filter(order=OuterRef('pk')).order_by().values('order').annotate(
+            total=Sum(F('quantity_used') * F('material__cost_per_unit'), output_field=MONEY)
+        ).values('total')
+        return self.annotate(
+            material_cost=Coalesce(Subquery(material_cost, output_field=MONEY), 0, output_field=MONEY),
+        ).annotate(margin=models.ExpressionWrapper(F('price') - F('material_cost'), output_field=MONEY))
+
+    def profit_by(self, grouping):
+        """ Order count, revenue, material cost and margin per customer, item or month (of created_at). """
+        return self.with_profit().annotate(month=TruncMonth('created_at')).order_by().values(
+            *self.PROFIT_GROUPINGS[grouping]
+        ).annotate(
+            orders=Count('id'),
+            revenue=Sum('price'),
+            total_material_cost=Sum('material_cost'),
+            total_margin=Sum('margin'),
+        )
+
+    def profit_totals(self):
+        return self.with_profit().aggregate(
+            orders=Count('id'),
+            revenue=Coalesce(Sum('price'), 0, output_field=MONEY),
+            total_material_cost=Coalesce(Sum('material_cost'), 0, output_field=MONEY),
+            total_margin=Coalesce(Sum('margin'), 0, output_field=MONEY),
+        )
+
 class Order(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='orders')
     item = models.CharField(max_length=255)
@@ -56,11 +106,14 @@ class Order(models.Model):
     fabric_details = models.TextField(blank=True, null=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
-    amount_paid = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    # Running total of the order's Payment rows, kept by tailor_app/payments.py.
+    amount_paid = models.DecimalField(max_digits=10, decimal_places=2, default=0.00, editable=False)
     materials = models.ManyToManyField(InventoryItem, through='OrderMaterial')
 
+    objects = OrderQuerySet.as_manager()
+
     @property
     def balance_due(self):
         return self.price - self.amount_paid
@@ -68,16 +121,133 @@ class Order(models.Model):
     def __str__(self):
         return f"Order for {self.item} for {self.customer.name}"
 
+class CustomerSegment(models.Model):
+    """ Nightly RFM scores and lifetime value of a customer (see tailor_app/segments.py). """
+    SEGMENT_CHOICES = [
+        ('Champion', 'Champion'),
+        ('Loyal', 'Loyal'),
+        ('New', 'New'),
+        ('Regular', 'Regular'),
+        ('At Risk', 'At Risk'),
+        ('Lapsed', 'Lapsed'),
+        ('Prospect', 'Prospect'),
+    ]
+    customer = models.OneToOneField(Customer, on_delete=models.CASCADE, primary_key=True, related_name='segment')
+    tailor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    segment = models.CharField(max_length=20, choices=SEGMENT_CHOICES)
+    recency_days = models.PositiveIntegerField(null=True, blank=True)
+    frequency = models.PositiveIntegerField(default=0)
+    monetary = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    r_score = models.PositiveSmallIntegerField(null=True, blank=True)
+    f_score = models.PositiveSmallIntegerField(null=True, blank=True)
+    m_score = models.PositiveSmallIntegerField(null=True, blank=True)
+    lifetime_value = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['tailor', 'segment'], name='segment_tailor_segment_idx'),
+            models.Index(fields=['tailor', '-lifetime_value'], name='segment_tailor_ltv_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.customer.name}: {self.segment}"
+
+class MeasurementQuerySet(models.QuerySet):
+    def current(self):
+        """
+        The latest reading for each measurement name, in one window-function
+        query served by the (customer, name, created_at) index.
+        """
+        return self.annotate(
+            version_rank=models.Window(
+                expression=RowNumber(),
+                partition_by=[F('customer_id'), F('name')],
+                order_by=[F('created_at').desc(), F('id').desc()],
+            )
+        ).filter(version_rank=1).order_by('name')
+
+    def history(self):
+        """ Every reading, newest first within each measurement name. """
+        return self.order_by('name', '-created_at', '-id')
+
 class Measurement(models.Model):
+    """
+    One reading of a measurement. Re-measuring (or editing on the customer
+    page) adds a new row, so older readings stay available as history and
+    `Measurement.objects.current()` gives the present profile.
+    """
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='measurements')
     name = models.CharField(max_length=50)  # e.g., Chest, Waist, Inseam
     value = models.DecimalField(max_digits=5, decimal_places=2) # e.g., 38.50 (inches or cm)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = MeasurementQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=['customer', 'name', '-created_at'], name='measurement_latest_idx')]
 
     def __str__(self):
         return f"{self.name}: {self.value} for {self.customer.name}"
 
+class StandardSize(models.Model):
+    """ One size in a tailor's standard size chart, e.g. 'Men's Shirts' / 'M'. """
+    tailor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='standard_sizes')
+    chart = models.CharField(max_length=100, help_text="e.g., 'Men's Shirts', 'Kurta'")
+    label = models.CharField(max_length=20, help_text="e.g., 'M', '40R'")
+    measurements = models.JSONField(default=dict, help_text='e.g., {"Chest": 40, "Waist": 34}')
+
+    class Meta:
+        ordering = ['chart', 'label']
+
+    def __str__(self):
+        return f"{self.chart} {self.label}"
+
+    @staticmethod
+    def measurement_value(value):
+        """ A chart entry as a float, or None if it isn't a finite number. """
+        if isinstance(value, bool):
+            return None
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None
+        return number if math.isfinite(number) else None
+
+    def clean(self):
+        if not isinstance(self.measurements, dict):
+            raise ValidationError({'measurements': 'Give an object of measurement names and numbers, e.g. {"Chest": 40}.'})
+        bad = [name for name, value in self.measurements.items()
+               if not str(name).strip() or self.measurement_value(value) is None]
+        if bad:
+            raise ValidationError({'measurements': f"Not a number: {', '.join(map(str, bad))}."})
+
+class Payment(models.Model):
+    """ Money received against an order. Order.amount_paid is the running total of these. """
+    METHOD_CHOICES = [
+        ('Cash', 'Cash'),
+        ('Card', 'Card'),
+        ('UPI', 'UPI'),
+        ('Bank Transfer', 'Bank Transfer'),
+        ('Other', 'Other'),
+    ]
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='payments')
+    # Denormalized from order.customer.tailor so cash-flow reports are one index range scan.
+    tailor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    method = models.CharField(max_length=20, choices=METHOD_CHOICES, default='Cash')
+    paid_at = models.DateTimeField(default=timezone.now)
+    note = models.CharField(max_length=200, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-paid_at']
+        indexes = [models.Index(fields=['tailor', 'paid_at'], name='payment_tailor_paid_at_idx')]
+
+    def __str__(self):
+        return f"{self.amount} ({self.method}) for Order #{self.order_id}"
+
 class OrderImage(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='order_images/')
@@ -104,10 +274,52 @@ class Appointment(models.Model):
     # The default for appointments created by the tailor is still 'Confirmed'
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Confirmed')
     notes = models.TextField(blank=True, null=True)
+    # RRULE for repeating appointments, e.g. 'FREQ=WEEKLY;BYDAY=SA;COUNT=6'.
+    # Occurrences are expanded on demand (see tailor_app/scheduling.py).
+    recurrence = models.CharField(max_length=200, blank=True, default='', help_text="e.g., FREQ=WEEKLY;BYDAY=SA;COUNT=6")
+    # Start of the last occurrence; null for one-off appointments and open-ended series.
+    recurrence_until = models.DateTimeField(null=True, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        # Overlap checks are range scans on this (see tailor_app/scheduling.py)
+        indexes = [models.Index(fields=['tailor', 'start_time'], name='appointment_tailor_start_idx')]
 
     def __str__(self):
         return f"{self.title} for {self.customer.name}"
 
+    @property
+    def is_recurring(self):
+        return bool(self.recurrence)
+
+    def recurrence_rule(self):
+        return RecurrenceRule.parse(self.recurrence, timezone.get_current_timezone()) if self.recurrence else None
+
+    def save(self, *args, **kwargs):
+        self.recurrence_until = None
+        if self.recurrence:
+            local_start = timezone.localtime(self.start_time).replace(tzinfo=None)
+            last = self.recurrence_rule().last_start(local_start)
+            if last is not None:
+                self.recurrence_until = timezone.make_aware(last)
+        super().save(*args, **kwargs)
+
+class AppointmentException(models.Model):
+    """ Cancels or moves one occurrence of a recurring appointment. """
+    appointment = models.ForeignKey(Appointment, on_delete=models.CASCADE, related_name='exceptions')
+    original_start = models.DateTimeField()
+    is_cancelled = models.BooleanField(default=False)
+    start_time = models.DateTimeField(null=True, blank=True)
+    end_time = models.DateTimeField(null=True, blank=True)
+    notes = models.TextField(blank=True, default='')
+
+    class Meta:
+        unique_together = ('appointment', 'original_start')
+
+    def __str__(self):
+        action = 'Cancelled' if self.is_cancelled else 'Moved'
+        return f"{action} occurrence of {self.appointment.title} on {self.original_start:%Y-%m-%d %H:%M}"
+
 class OrderMaterial(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE)
     material = models.ForeignKey(InventoryItem, on_delete=models.CASCADE)
@@ -130,6 +342,7 @@ class TaskDefinition(models.Model):
     template = models.ForeignKey(WorkflowTemplate, on_delete=models.CASCADE, related_name='tasks')
     name = models.CharField(max_length=200, help_text="e.g., 'Cut Fabric', 'First Fitting'")
     order = models.PositiveIntegerField(default=0, help_text="Order in which the task should be performed.")
+    estimated_minutes = models.PositiveIntegerField(default=60, help_text="Workshop time this task usually takes.")
 
     class Meta:
         ordering = ['order']
@@ -144,6 +357,7 @@ class OrderTask(models.Model):
     is_completed = models.BooleanField(default=False)
     completed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ['task_definition__order']
@@ -151,3 +365,112 @@ class OrderTask(models.Model):
     def __str__(self):
         return f"{self.task_definition.name} for Order {self.order.id}"
 
+class TaskCycleSummary(models.Model):
+    """
+    Nightly cycle-time statistics (see tailor_app/analytics.py): one row per
+    task definition, plus one per workflow template with task_definition null
+    for whole finished orders.
+    """
+    tailor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    template = models.ForeignKey(WorkflowTemplate, on_delete=models.CASCADE, related_name='cycle_summaries')
+    task_definition = models.ForeignKey(TaskDefinition, on_delete=models.CASCADE, null=True, blank=True, related_name='cycle_summaries')
+    samples = models.PositiveIntegerField()
+    p50_hours = models.FloatField()
+    p90_hours = models.FloatField()
+    mean_hours = models.FloatField()
+    # Completions in each of the last weeks, oldest first.
+    weekly_completions = models.JSONField(default=list)
+    is_bottleneck = models.BooleanField(default=False)
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        subject = self.task_definition.name if self.task_definition_id else 'whole workflow'
+        return f"{self.template.name}: {subject}"
+
+    @property
+    def throughput_per_week(self):
+        return sum(self.weekly_completions) / len(self.weekly_completions) if self.weekly_completions else 0
+
+
+# --- Archive (see tailor_app/archive.py) ---
+# Closed orders and past appointments are moved here, keeping their ids, so
+# the tables the day-to-day views scan stay small.
+
+class ArchivedOrder(models.Model):
+    """ A closed order with its tasks, materials and image metadata frozen in ``details``. """
+    id = models.BigIntegerField(primary_key=True)
+    tailor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='archived_orders')
+    item = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    due_date = models.DateField()
+    notes = models.TextField(blank=True, null=True)
+    fabric_details = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    amount_paid = models.DecimalField(max_digits=10, decimal_places=2)
+    material_cost = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # {'tasks': [...], 'materials': [...], 'images': [...]}
+    details = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    is_archived = True
+
+    class Meta:
+        indexes = [models.Index(fields=['tailor', '-created_at'], name='archivedorder_tailor_idx')]
+
+    @property
+    def balance_due(self):
+        return self.price - self.amount_paid
+
+    def __str__(self):
+        return f"Archived order for {self.item} for {self.customer.name}"
+
+class ArchivedPayment(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name='payments')
+    tailor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    method = models.CharField(max_length=20, choices=Payment.METHOD_CHOICES)
+    paid_at = models.DateTimeField()
+    note = models.CharField(max_length=200, blank=True, default='')
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-paid_at']
+        indexes = [models.Index(fields=['tailor', 'paid_at'], name='archivedpayment_paid_at_idx')]
+
+    def __str__(self):
+        return f"{self.amount} ({self.method}) for archived Order #{self.order_id}"
+
+class ArchivedAppointment(models.Model):
+    """ A past one-off appointment. Recurring series stay in Appointment (one row each). """
+    id = models.BigIntegerField(primary_key=True)
+    tailor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='archived_appointments')
+    title = models.CharField(max_length=200)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=Appointment.STATUS_CHOICES)
+    notes = models.TextField(blank=True, null=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['tailor', 'start_time'], name='archivedappt_tailor_start_idx')]
+
+    def __str__(self):
+        return f"{self.title} for {self.customer.name} (archived)"
+
+class Tombstone(models.Model):
+    """ Marks a deleted row so offline clients can drop their copy on the next sync. """
+    tailor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['tailor', 'deleted_at'])]
+
+    def __str__(self):
+        return f"Deleted {self.model} #{self.object_id}"
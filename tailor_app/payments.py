@@ -0,0 +1,100 @@
+# tailor_app/payments.py
+
+"""
+Payments ledger and cash-flow reports.
+
+Every payment is a Payment row; Order.amount_paid is their running total,
+changed only here with an UPDATE ... SET amount_paid = amount_paid + x in the
+same transaction as the row, so concurrent payments can't lose an update and
+the total never disagrees with the ledger.
+
+Cash-flow reports aggregate payments directly by day or month over the
+(tailor, paid_at) index of Payment and of ArchivedPayment (payments of
+archived orders, see tailor_app/archive.py), and add the two up.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from .models import ArchivedPayment, Order, Payment
+
+PERIODS = {'day': TruncDate, 'month': TruncMonth}
+
+
+def _add_to_total(order_id, amount):
+    Order.objects.filter(pk=order_id).update(amount_paid=F('amount_paid') + amount, updated_at=timezone.now())
+
+
+def record_payment(order, amount, method='Cash', paid_at=None, note=''):
+    """ Add a payment to ``order`` and its running total. Returns the Payment. """
+    with transaction.atomic():
+        payment = Payment.objects.create(
+            order=order, tailor_id=order.customer.tailor_id, amount=amount, method=method,
+            paid_at=paid_at or timezone.now(), note=note,
+        )
+        _add_to_total(order.pk, amount)
+    order.refresh_from_db(fields=['amount_paid', 'updated_at'])
+    return payment
+
+
+def void_payment(payment):
+    """
+    Delete a payment recorded by mistake and take it off the order's total.
+    Returns False, changing nothing, if it was already voided (e.g. by a
+    double-clicked button).
+    """
+    with transaction.atomic():
+        deleted, _ = Payment.objects.filter(pk=payment.pk).delete()
+        if deleted:
+            _add_to_total(payment.order_id, -payment.amount)
+    return bool(deleted)
+
+
+def _in_window(model, tailor_id, start, end):
+    return model.objects.filter(tailor_id=tailor_id, paid_at__gte=start, paid_at__lt=end)
+
+
+def _totals_by(key, querysets):
+    """ Merge per-``key`` total/payments rows from several querysets, sorted by key. """
+    merged = defaultdict(lambda: {'total': 0, 'payments': 0})
+    for queryset in querysets:
+        for row in queryset:
+            merged[row[key]]['total'] += row['total']
+            merged[row[key]]['payments'] += row['payments']
+    return [{key: value, **merged[value]} for value in sorted(merged)]
+
+
+def cash_flow(tailor_id, start, end, period='day'):
+    """ Collections per day or month in [start, end): period, total, payment count. """
+    return _totals_by('period', [
+        _in_window(model, tailor_id, start, end).annotate(period=PERIODS[period]('paid_at'))
+        .order_by().values('period').annotate(total=Sum('amount'), payments=Count('id'))
+        for model in (Payment, ArchivedPayment)
+    ])
+
+
+def collections_by_method(tailor_id, start, end):
+    return _totals_by('method', [
+        _in_window(model, tailor_id, start, end).order_by().values('method')
+        .annotate(total=Sum('amount'), payments=Count('id'))
+        for model in (Payment, ArchivedPayment)
+    ])
+
+
+def collected(tailor_id, start, end):
+    """ Total collected in [start, end). """
+    return sum(
+        _in_window(model, tailor_id, start, end).aggregate(total=Sum('amount'))['total'] or 0
+        for model in (Payment, ArchivedPayment)
+    )
+
+
+def receivables(tailor_id):
+    """ Outstanding balance on open orders, and how many orders owe something. """
+    return Order.objects.filter(customer__tailor_id=tailor_id, amount_paid__lt=F('price')).exclude(
+        status='Cancelled',
+    ).aggregate(total=Sum(F('price') - F('amount_paid')), orders=Count('id'))
@@ -0,0 +1,251 @@
+# tailor_app/production.py
+
+"""
+Capacity-aware production schedule.
+
+The open tasks of every open order are queued in earliest-due-date order
+(ties broken by order id) against the workshop's daily capacity
+(settings.WORKSHOP_DAILY_MINUTES on settings.WORKSHOP_DAYS). An order's
+projected finish is the working day on which the running total of queued
+minutes reaches the end of its own tasks; it is at risk if that day is after
+its due date.
+
+The plan keeps, per tailor, the orders sorted by (due_date, id) with their
+remaining minutes and the running totals. Before each read a cheap stamp
+(row counts and newest updated_at of orders and tasks, task estimates,
+deletions) tells what changed:
+
+* orders or tasks saved since the last refresh (less SYNC_OVERLAP) -> only
+  those orders are re-read, moved to their new place in the queue, and the
+  running totals are recomputed from the first position that changed
+* a deletion, an estimate change or rows with old timestamps (a restore)
+  -> the plan is rebuilt
+
+``production_board()`` groups open orders by the step they are waiting at.
+"""
+
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Sum, Window
+from django.db.models.functions import Coalesce, RowNumber
+from django.utils import timezone
+
+from .models import Order, OrderTask, TaskDefinition, Tombstone
+from .sync import SYNC_OVERLAP
+
+CLOSED_STATUSES = ('Completed', 'Cancelled')
+MAX_CACHED_TAILORS = 32
+
+_plans = OrderedDict()
+_lock = threading.Lock()
+
+
+def _stamp(tailor_id):
+    orders = Order.objects.filter(customer__tailor_id=tailor_id).aggregate(n=Count('id'), last=Max('updated_at'))
+    tasks = OrderTask.objects.filter(order__customer__tailor_id=tailor_id).aggregate(n=Count('id'), last=Max('updated_at'))
+    estimates = TaskDefinition.objects.filter(template__tailor_id=tailor_id).aggregate(
+        n=Count('id'), total=Sum('estimated_minutes')
+    )
+    deleted = Tombstone.objects.filter(
+        tailor_id=tailor_id, model__in=['order', 'ordertask']
+    ).aggregate(m=Max('id'))['m']
+    return {
+        'orders': (orders['n'], orders['last']),
+        'tasks': (tasks['n'], tasks['last']),
+        'estimates': (estimates['n'], estimates['total']),
+        'deleted': deleted,
+    }
+
+
+def workdays(start):
+    """ Working days from ``start`` onwards. """
+    open_days = set(settings.WORKSHOP_DAYS)
+    if not open_days or not open_days <= set(range(7)):
+        raise ImproperlyConfigured(
+            f"WORKSHOP_DAYS must list at least one weekday from 0 (Monday) to 6, not {settings.WORKSHOP_DAYS!r}."
+        )
+    day = start
+    while True:
+        if day.weekday() in open_days:
+            yield day
+        day += timedelta(days=1)
+
+
+class ProductionPlan:
+    def __init__(self, tailor_id):
+        self.tailor_id = tailor_id
+        self.lock = threading.Lock()
+        self.stamp = None
+        self.entries = {}      # order id -> row from _order_rows()
+        self.keys = []         # (due_date, order id), sorted
+        self.cumulative = []   # minutes queued up to and including keys[i]
+
+    def _order_rows(self, order_ids=None):
+        orders = Order.objects.filter(customer__tailor_id=self.tailor_id).exclude(status__in=CLOSED_STATUSES)
+        if order_ids is not None:
+            orders = orders.filter(pk__in=order_ids)
+        return orders.annotate(
+            remaining_minutes=Coalesce(
+                Sum('tasks__task_definition__estimated_minutes', filter=Q(tasks__is_completed=False)), 0
+            ),
+        ).values('id', 'item', 'status', 'due_date', 'customer__name', 'remaining_minutes')
+
+    def _apply(self, rows, touched_ids=()):
+        """ Remove ``touched_ids``, insert ``rows`` in due-date order, and fix up the totals. """
+        first_changed = len(self.keys)
+        for order_id in touched_ids:
+            entry = self.entries.pop(order_id, None)
+            if entry is not None:
+                i = bisect_left(self.keys, (entry['due_date'], order_id))
+                del self.keys[i]
+                del self.cumulative[i]
+                first_changed = min(first_changed, i)
+        for row in rows:
+            key = (row['due_date'], row['id'])
+            i = bisect_left(self.keys, key)
+            self.keys.insert(i, key)
+            self.cumulative.insert(i, 0)
+            self.entries[row['id']] = row
+            first_changed = min(first_changed, i)
+
+        running = self.cumulative[first_changed - 1] if first_changed else 0
+        for i in range(first_changed, len(self.keys)):
+            running += self.entries[self.keys[i][1]]['remaining_minutes']
+            self.cumulative[i] = running
+
+    def rebuild(self, stamp):
+        self.entries, self.keys, self.cumulative = {}, [], []
+        self._apply(list(self._order_rows()))
+        self.stamp = stamp
+
+    def refresh(self):
+        stamp = _stamp(self.tailor_id)
+        if stamp == self.stamp:
+            return
+        old = self.stamp
+        if (
+            old is None
+            or stamp['deleted'] != old['deleted']
+            or stamp['estimates'] != old['estimates']
+            or any(stamp[k][1] == old[k][1] and stamp[k][0] != old[k][0] for k in ('orders', 'tasks'))
+            or old['orders'][1] is None or old['tasks'][1] is None
+        ):
+            self.rebuild(stamp)
+            return
+
+        # Re-read the overlap window too, like sync does: a row stamped before
+        # the last refresh can commit after it.
+        changed = set(
+            Order.objects.filter(
+                customer__tailor_id=self.tailor_id, updated_at__gte=old['orders'][1] - SYNC_OVERLAP,
+            ).values_list('id', flat=True)
+        )
+        changed.update(
+            OrderTask.objects.filter(
+                order__customer__tailor_id=self.tailor_id, updated_at__gte=old['tasks'][1] - SYNC_OVERLAP,
+            ).values_list('order_id', flat=True)
+        )
+        self._apply(list(self._order_rows(changed)), changed)
+        self.stamp = stamp
+
+    def schedule(self, today=None):
+        """ Yield (order row, projected finish date) in the order the workshop will work on them. """
+        today = today or timezone.localdate()
+        capacity = settings.WORKSHOP_DAILY_MINUTES
+        days = workdays(today)
+        day, day_index = next(days), 0
+        for key, queued in zip(self.keys, self.cumulative):
+            # Work queued up to this order fills ceil(queued / capacity) days.
+            needed = max(0, -(-queued // capacity) - 1)
+            while day_index < needed:
+                day, day_index = next(days), day_index + 1
+            row = self.entries[key[1]]
+            # Orders with no open tasks are waiting on nothing in the workshop.
+            yield row, day if row['remaining_minutes'] else today
+
+    def at_risk(self, today=None):
+        """ Open orders projected to finish after their due date, earliest due first. """
+        return [
+            dict(row, projected_finish=finish, days_late=(finish - row['due_date']).days)
+            for row, finish in self.schedule(today) if finish > row['due_date']
+        ]
+
+
+def get_plan(tailor_id):
+    """ The tailor's production plan, brought up to date. """
+    with _lock:
+        plan = _plans.get(tailor_id)
+        if plan is None:
+            plan = _plans[tailor_id] = ProductionPlan(tailor_id)
+            if len(_plans) > MAX_CACHED_TAILORS:
+                _plans.popitem(last=False)
+        else:
+            _plans.move_to_end(tailor_id)
+    with plan.lock:
+        plan.refresh()
+    return plan
+
+
+def at_risk_orders(tailor_id, today=None):
+    plan = get_plan(tailor_id)
+    with plan.lock:
+        return plan.at_risk(today)
+
+
+# --- Production board ---
+
+def current_steps(tailor_id):
+    """
+    One row per open order with its first incomplete task and when it started
+    waiting there (the previous task's completion, else the order's creation),
+    in a single query: a RowNumber window over the open tasks of each order
+    picks the first one.
+    """
+    last_completed = OrderTask.objects.filter(
+        order_id=OuterRef('order_id'), is_completed=True, completed_at__isnull=False,
+    ).order_by('-completed_at').values('completed_at')[:1]
+    return OrderTask.objects.filter(
+        order__customer__tailor_id=tailor_id, is_completed=False,
+    ).exclude(order__status__in=CLOSED_STATUSES).annotate(
+        step_rank=Window(
+            expression=RowNumber(),
+            partition_by=[F('order_id')],
+            order_by=[F('task_definition__order').asc(), F('id').asc()],
+        ),
+        waiting_since=Coalesce(Subquery(last_completed), F('order__created_at')),
+    ).filter(step_rank=1).values(
+        'id', 'order_id', 'order__item', 'order__due_date', 'order__customer__name',
+        'task_definition__name', 'task_definition__order', 'waiting_since',
+    )
+
+
+def production_board(tailor_id, now=None):
+    """
+    Open orders grouped by the task they're waiting at, as a list of columns
+    ``{'task', 'orders', 'count', 'oldest_days', 'average_days'}`` in workflow
+    order. Orders within a column are oldest first. Tasks with the same name in
+    different templates share a column.
+    """
+    now = now or timezone.now()
+    columns = {}
+    for row in current_steps(tailor_id):
+        row['waiting_days'] = (now - row['waiting_since']).total_seconds() / 86400
+        column = columns.setdefault(row['task_definition__name'], {
+            'task': row['task_definition__name'], 'position': row['task_definition__order'], 'orders': [],
+        })
+        column['position'] = min(column['position'], row['task_definition__order'])
+        column['orders'].append(row)
+
+    board = sorted(columns.values(), key=lambda column: (column['position'], column['task']))
+    for column in board:
+        column['orders'].sort(key=lambda row: row['waiting_since'])
+        ages = [row['waiting_days'] for row in column['orders']]
+        column['count'] = len(ages)
+        column['oldest_days'] = max(ages)
+        column['average_days'] = sum(ages) / len(ages)
+    return board
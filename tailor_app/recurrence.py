@@ -0,0 +1,180 @@
+# tailor_app/recurrence.py
+
+"""
+A small subset of iCalendar RRULEs for repeating appointments:
+
+    FREQ=DAILY|WEEKLY|MONTHLY [;INTERVAL=n] [;COUNT=n | ;UNTIL=YYYYMMDD[THHMMSS[Z]]]
+    [;BYDAY=MO,TU,...]   (WEEKLY only)
+
+COUNT is capped at MAX_COUNT and UNTIL at MAX_YEARS from today.
+
+Occurrences are generated on the wall clock of the first appointment (naive
+local datetimes), so a 10:00 fitting stays at 10:00. Nothing is stored per
+occurrence; ``starts()`` jumps straight to the period containing the window
+being asked for and yields from there.
+"""
+
+import calendar
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY')
+MAX_COUNT = 1000
+MAX_YEARS = 10
+
+
+class RecurrenceRule:
+    def __init__(self, freq, interval=1, count=None, until=None, byday=None):
+        self.freq = freq
+        self.interval = interval
+        self.count = count
+        self.until = until  # naive local datetime
+        self.byday = sorted(set(byday)) if byday else None
+
+    @classmethod
+    def parse(cls, text, tz=None):
+        """ Parse an RRULE string; UNTIL in UTC ('Z') is converted to ``tz``. Raises ValueError. """
+        parts = {}
+        for part in text.upper().removeprefix('RRULE:').split(';'):
+            if not part.strip():
+                continue
+            key, sep, value = part.partition('=')
+            if not sep:
+                raise ValueError(f"'{part}' isn't a KEY=VALUE pair.")
+            parts[key.strip()] = value.strip()
+
+        freq = parts.pop('FREQ', None)
+        if freq not in FREQUENCIES:
+            raise ValueError(f"FREQ must be one of {', '.join(FREQUENCIES)}.")
+        interval = int(parts.pop('INTERVAL', 1))
+        if interval < 1:
+            raise ValueError("INTERVAL must be at least 1.")
+        count = int(parts.pop('COUNT')) if 'COUNT' in parts else None
+        if count is not None and not 1 <= count <= MAX_COUNT:
+            raise ValueError(f"COUNT must be between 1 and {MAX_COUNT}.")
+        until = _parse_until(parts.pop('UNTIL'), tz) if 'UNTIL' in parts else None
+        if until is not None and until.year > datetime.now().year + MAX_YEARS:
+            raise ValueError(f"UNTIL can be at most {MAX_YEARS} years ahead.")
+        if count is not None and until is not None:
+            raise ValueError("Use COUNT or UNTIL, not both.")
+        byday = None
+        if 'BYDAY' in parts:
+            if freq != 'WEEKLY':
+                raise ValueError("BYDAY is only supported with FREQ=WEEKLY.")
+            try:
+                byday = [WEEKDAYS.index(day.strip()) for day in parts.pop('BYDAY').split(',')]
+            except ValueError:
+                raise ValueError(f"BYDAY days must be from {','.join(WEEKDAYS)}.")
+        if parts:
+            raise ValueError(f"Unsupported rule parts: {', '.join(sorted(parts))}.")
+        return cls(freq, interval, count, until, byday)
+
+    def __str__(self):
+        text = f'FREQ={self.freq}'
+        if self.interval != 1:
+            text += f';INTERVAL={self.interval}'
+        if self.byday:
+            text += ';BYDAY=' + ','.join(WEEKDAYS[day] for day in self.byday)
+        if self.count is not None:
+            text += f';COUNT={self.count}'
+        if self.until is not None:
+            text += f';UNTIL={self.until:%Y%m%dT%H%M%S}'
+        return text
+
+    # --- Expansion ---
+
+    def _week_start(self, dtstart):
+        return dtstart - timedelta(days=dtstart.weekday())
+
+    def _period(self, dtstart, k):
+        """ Occurrence starts in the k-th period (day, week or month step) of the series. """
+        if self.freq == 'DAILY':
+            return [dtstart + timedelta(days=k * self.interval)]
+        if self.freq == 'WEEKLY':
+            week = self._week_start(dtstart) + timedelta(weeks=k * self.interval)
+            days = self.byday or [dtstart.weekday()]
+            return [s for s in (week + timedelta(days=day) for day in days) if s >= dtstart]
+        month_index = dtstart.month - 1 + k * self.interval
+        year, month = dtstart.year + month_index // 12, month_index % 12 + 1
+        if dtstart.day > calendar.monthrange(year, month)[1]:
+            return []  # e.g. the 31st in a 30-day month is skipped, as in RFC 5545
+        return [dtstart.replace(year=year, month=month)]
+
+    def _first_period(self, dtstart, not_before):
+        """ (period index, occurrences before it) to start expanding from for ``not_before``. """
+        if not_before is None or not_before <= dtstart:
+            return 0, 0
+        if self.freq == 'DAILY':
+            k = (not_before - dtstart).days // self.interval
+            return k, k
+        if self.freq == 'WEEKLY':
+            k = (not_before - self._week_start(dtstart)).days // 7 // self.interval
+            if k == 0:
+                return 0, 0
+            per_week = len(self.byday or [dtstart.weekday()])
+            return k, len(self._period(dtstart, 0)) + (k - 1) * per_week
+        if self.count is not None:
+            return 0, 0  # skipped month-ends make the count before a month irregular
+        months = (not_before.year - dtstart.year) * 12 + not_before.month - dtstart.month
+        return months // self.interval, 0
+
+    def starts(self, dtstart, not_before=None):
+        """ Yield occurrence starts in order, beginning with the first at or after ``not_before``. """
+        k, seen = self._first_period(dtstart, not_before)
+        while True:
+            for start in self._period(dtstart, k):
+                if (self.count is not None and seen >= self.count) or (self.until is not None and start > self.until):
+                    return
+                seen += 1
+                if not_before is None or start >= not_before:
+                    yield start
+            k += 1
+
+    def _periods_between(self, dtstart, moment):
+        """ Index of the period containing ``moment`` (rounded down). """
+        if self.freq == 'DAILY':
+            return (moment - dtstart).days // self.interval
+        if self.freq == 'WEEKLY':
+            return (moment - self._week_start(dtstart)).days // 7 // self.interval
+        return ((moment.year - dtstart.year) * 12 + moment.month - dtstart.month) // self.interval
+
+    def last_start(self, dtstart):
+        """ Start of the final occurrence, or None if the series never ends (or never starts). """
+        if self.until is not None:
+            # Step back from the period containing UNTIL; only skipped
+            # month-ends take more than one step.
+            for k in range(self._periods_between(dtstart, self.until), -1, -1):
+                starts = [start for start in self._period(dtstart, k) if start <= self.until]
+                if starts:
+                    return starts[-1]
+            return None
+        if self.count is None:
+            return None
+        if self.freq == 'DAILY':
+            return dtstart + timedelta(days=(self.count - 1) * self.interval)
+        if self.freq == 'WEEKLY':
+            first = self._period(dtstart, 0)
+            if self.count <= len(first):
+                return first[self.count - 1]
+            per_week = len(self.byday or [dtstart.weekday()])
+            k, index = divmod(self.count - len(first) - 1, per_week)
+            return self._period(dtstart, k + 1)[index]
+        # Skipped month-ends make monthly counts irregular; COUNT is capped, so walk them.
+        last = None
+        for last in self.starts(dtstart):
+            pass
+        return last
+
+
+def _parse_until(value, tz):
+    for fmt in ('%Y%m%dT%H%M%SZ', '%Y%m%dT%H%M%S', '%Y%m%d'):
+        try:
+            until = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if fmt == '%Y%m%d':
+            until = until.replace(hour=23, minute=59, second=59)
+        if value.endswith('Z') and tz is not None:
+            until = until.replace(tzinfo=dt_timezone.utc).astimezone(tz).replace(tzinfo=None)
+        return until
+    raise ValueError("UNTIL must look like 20250131 or 20250131T170000Z.")
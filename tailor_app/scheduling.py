@@ -0,0 +1,285 @@
+# tailor_app/scheduling.py
+
+"""
+Appointment conflict detection and free-slot search.
+
+Confirmed and Requested appointments block their time. Lookups never load a
+tailor's whole calendar: appointments are capped at MAX_APPOINTMENT_LENGTH,
+so anything overlapping [start, end) must start in
+[start - MAX_APPOINTMENT_LENGTH, end), which is a range scan on the
+(tailor, start_time) index.
+
+Recurring appointments are one row plus an RRULE. Only series that can reach
+the window are loaded (start_time before its end, recurrence_until after its
+start), and their occurrences are expanded for that window alone, with
+AppointmentException rows cancelling or moving single occurrences.
+
+For availability the busy appointments in the requested window are merged
+into an IntervalIndex (sorted, disjoint intervals), and each candidate slot is
+checked against it with a binary search.
+"""
+
+from bisect import bisect_right
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+
+from .models import Appointment, AppointmentException
+from .recurrence import RecurrenceRule
+
+BLOCKING_STATUSES = ('Confirmed', 'Requested')
+MAX_APPOINTMENT_LENGTH = timedelta(hours=12)
+# New or edited series are checked for clashes this far ahead.
+RECURRENCE_CHECK_DAYS = 180
+MAX_AVAILABILITY_DAYS = 31
+MAX_CALENDAR_DAYS = 62
+DEFAULT_DAY_START = time(9, 0)
+DEFAULT_DAY_END = time(18, 0)
+DEFAULT_SLOT_MINUTES = 30
+
+
+class Occurrence:
+    """ One appointment on the calendar: a one-off row or an expanded occurrence of a series. """
+
+    def __init__(self, appointment, start, end, original_start=None, notes=None):
+        self.appointment = appointment
+        self.start = start
+        self.end = end
+        self.original_start = original_start  # None for one-off appointments
+        self.notes = appointment.notes if notes is None else notes
+
+    @property
+    def title(self):
+        return self.appointment.title
+
+    @property
+    def status(self):
+        return self.appointment.status
+
+
+def one_off_appointments(tailor_id, start, end, statuses=BLOCKING_STATUSES, exclude_id=None):
+    """ Non-recurring appointments of a tailor that overlap [start, end). """
+    queryset = Appointment.objects.filter(
+        tailor_id=tailor_id,
+        start_time__gt=start - MAX_APPOINTMENT_LENGTH,
+        start_time__lt=end,
+        end_time__gt=start,
+        recurrence='',
+    )
+    if statuses is not None:
+        queryset = queryset.filter(status__in=statuses)
+    if exclude_id is not None:
+        queryset = queryset.exclude(pk=exclude_id)
+    return queryset
+
+
+def recurring_series(tailor_id, start, end, statuses=BLOCKING_STATUSES, exclude_id=None):
+    """ Series that may have occurrences in [start, end), with the exceptions that matter there. """
+    reach = start - MAX_APPOINTMENT_LENGTH
+    exceptions = AppointmentException.objects.filter(
+        Q(original_start__gt=reach, original_start__lt=end) | Q(start_time__lt=end, end_time__gt=start)
+    )
+    queryset = Appointment.objects.filter(
+        Q(recurrence_until__isnull=True) | Q(recurrence_until__gt=reach),
+        tailor_id=tailor_id,
+        start_time__lt=end,
+    ).exclude(recurrence='').prefetch_related(Prefetch('exceptions', queryset=exceptions))
+    if statuses is not None:
+        queryset = queryset.filter(status__in=statuses)
+    if exclude_id is not None:
+        queryset = queryset.exclude(pk=exclude_id)
+    return queryset
+
+
+def occurrence_starts(rule, first_start, window_start, window_end):
+    """ Aware starts of ``rule``'s occurrences from ``window_start`` up to ``window_end``. """
+    tz = timezone.get_current_timezone()
+    dtstart = timezone.localtime(first_start, tz).replace(tzinfo=None)
+    not_before = timezone.localtime(max(window_start, first_start), tz).replace(tzinfo=None)
+    for naive in rule.starts(dtstart, not_before):
+        start = timezone.make_aware(naive, tz)
+        if start >= window_end:
+            return
+        yield start
+
+
+def expand(appointment, start, end):
+    """ Occurrences of a recurring appointment overlapping [start, end). """
+    duration = appointment.end_time - appointment.start_time
+    exceptions = {exc.original_start: exc for exc in appointment.exceptions.all()}
+    occurrences = []
+    for occurrence_start in occurrence_starts(appointment.recurrence_rule(), appointment.start_time, start - duration, end):
+        if occurrence_start in exceptions:
+            continue
+        if occurrence_start + duration > start:
+            occurrences.append(Occurrence(appointment, occurrence_start, occurrence_start + duration, occurrence_start))
+    for exc in exceptions.values():
+        if not exc.is_cancelled and exc.start_time and exc.start_time < end and exc.end_time > start:
+            occurrences.append(Occurrence(appointment, exc.start_time, exc.end_time, exc.original_start, exc.notes or None))
+    return occurrences
+
+
+def occurrences(tailor_id, start, end, statuses=BLOCKING_STATUSES, exclude_id=None):
+    """ Everything on the tailor's calendar overlapping [start, end), sorted by start. """
+    found = [
+        Occurrence(appt, appt.start_time, appt.end_time)
+        for appt in one_off_appointments(tailor_id, start, end, statuses, exclude_id)
+    ]
+    for series in recurring_series(tailor_id, start, end, statuses, exclude_id):
+        found.extend(expand(series, start, end))
+    found.sort(key=lambda occurrence: occurrence.start)
+    return found
+
+
+def busy_intervals(tailor_id, start, end, exclude_id=None):
+    """ (start, end) pairs of the time blocked between ``start`` and ``end``. """
+    return [(o.start, o.end) for o in occurrences(tailor_id, start, end, exclude_id=exclude_id)]
+
+
+def lock_calendar(tailor_id):
+    """
+    Serialize bookings for one tailor until the current transaction ends, so
+    two requests can't both pass the conflict check for the same slot.
+    """
+    if connection.in_atomic_block:
+        list(User.objects.select_for_update().filter(pk=tailor_id).values_list('pk'))
+
+
+def _check_length(start, end):
+    if end <= start:
+        raise ValidationError("The appointment must end after it starts.")
+    if end - start > MAX_APPOINTMENT_LENGTH:
+        hours = int(MAX_APPOINTMENT_LENGTH.total_seconds() // 3600)
+        raise ValidationError(f"Appointments can be at most {hours} hours long.")
+
+
+def _clash_error(clash):
+    local_start = timezone.localtime(clash.start)
+    local_end = timezone.localtime(clash.end)
+    return ValidationError(
+        f"This time overlaps '{clash.title}' "
+        f"({local_start:%d %b %H:%M}-{local_end:%H:%M}, {clash.status.lower()})."
+    )
+
+
+def check_slot(tailor_id, start, end, exclude_id=None, exclude_occurrence=None):
+    """
+    Raise ValidationError if [start, end) isn't a bookable slot for the tailor.
+    ``exclude_occurrence`` is an (appointment id, original start) pair, for
+    moving one occurrence of a series; its other occurrences still count.
+    """
+    _check_length(start, end)
+    lock_calendar(tailor_id)
+    clashes = [
+        o for o in occurrences(tailor_id, start, end, exclude_id=exclude_id)
+        if (o.appointment.pk, o.original_start) != exclude_occurrence
+    ]
+    if clashes:
+        raise _clash_error(clashes[0])
+
+
+def check_series(tailor_id, start, end, recurrence, exclude_id=None):
+    """
+    Raise ValidationError if any occurrence of a series in the next
+    RECURRENCE_CHECK_DAYS overlaps another appointment. Open-ended series
+    aren't checked beyond that horizon.
+    """
+    _check_length(start, end)
+    rule = RecurrenceRule.parse(recurrence, timezone.get_current_timezone())
+    lock_calendar(tailor_id)
+    check_from = max(start, timezone.now())
+    horizon = check_from + timedelta(days=RECURRENCE_CHECK_DAYS)
+    duration = end - start
+    busy = occurrences(tailor_id, check_from, horizon + duration, exclude_id=exclude_id)
+    index = IntervalIndex((o.start, o.end) for o in busy)
+    for occurrence_start in occurrence_starts(rule, start, check_from, horizon):
+        occurrence_end = occurrence_start + duration
+        if not index.is_free(occurrence_start, occurrence_end):
+            raise _clash_error(next(o for o in busy if o.start < occurrence_end and o.end > occurrence_start))
+
+
+class IntervalIndex:
+    """ Busy time as sorted, merged intervals with O(log n) overlap checks. """
+
+    def __init__(self, intervals):
+        self.starts, self.ends = [], []
+        for start, end in sorted(intervals):
+            if self.ends and start <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def overlapping(self, start, end):
+        """ Index of the busy interval overlapping [start, end), or None. """
+        i = bisect_right(self.ends, start)
+        if i < len(self.starts) and self.starts[i] < end:
+            return i
+        return None
+
+    def is_free(self, start, end):
+        return self.overlapping(start, end) is None
+
+
+def free_slots(tailor_id, first_day, last_day, day_start=DEFAULT_DAY_START,
+               day_end=DEFAULT_DAY_END, slot_minutes=DEFAULT_SLOT_MINUTES):
+    """
+    Free slots of ``slot_minutes`` within working hours, from ``first_day`` to
+    ``last_day`` inclusive, as (start, end) aware datetimes. Slots start on the
+    slot grid from ``day_start``; past slots are left out.
+    """
+    tz = timezone.get_current_timezone()
+    slot = timedelta(minutes=slot_minutes)
+    window_start = timezone.make_aware(datetime.combine(first_day, day_start), tz)
+    window_end = timezone.make_aware(datetime.combine(last_day, day_end), tz)
+    index = IntervalIndex(busy_intervals(tailor_id, window_start, window_end))
+    now = timezone.now()
+
+    slots = []
+    day = first_day
+    while day <= last_day:
+        opens = timezone.make_aware(datetime.combine(day, day_start), tz)
+        closes = timezone.make_aware(datetime.combine(day, day_end), tz)
+        current = opens
+        while current + slot <= closes:
+            busy = index.overlapping(current, current + slot)
+            if busy is not None:
+                # Jump to the first grid slot after the busy interval ends.
+                steps = -(-(index.ends[busy] - opens) // slot)
+                current = opens + steps * slot
+                continue
+            if current >= now:
+                slots.append((current, current + slot))
+            current += slot
+        day += timedelta(days=1)
+    return slots
+
+
+def parse_availability_params(params):
+    """
+    Read start/end (YYYY-MM-DD), day_start/day_end (HH:MM) and slot (minutes)
+    from a QueryDict. Raises ValueError with a message fit for the client.
+    """
+    today = timezone.localdate()
+    try:
+        first_day = datetime.strptime(params['start'], '%Y-%m-%d').date() if params.get('start') else today
+        last_day = datetime.strptime(params['end'], '%Y-%m-%d').date() if params.get('end') else first_day + timedelta(days=6)
+        day_start = time.fromisoformat(params['day_start']) if params.get('day_start') else DEFAULT_DAY_START
+        day_end = time.fromisoformat(params['day_end']) if params.get('day_end') else DEFAULT_DAY_END
+        slot_minutes = int(params.get('slot', DEFAULT_SLOT_MINUTES))
+    except ValueError:
+        raise ValueError("Use start/end as YYYY-MM-DD, day_start/day_end as HH:MM and slot in minutes.")
+    if last_day < first_day or (last_day - first_day).days >= MAX_AVAILABILITY_DAYS:
+        raise ValueError(f"end must be on or after start and at most {MAX_AVAILABILITY_DAYS} days later.")
+    if day_end <= day_start:
+        raise ValueError("day_end must be after day_start.")
+    if not 5 <= slot_minutes <= MAX_APPOINTMENT_LENGTH.total_seconds() // 60:
+        raise ValueError("slot must be between 5 minutes and the maximum appointment length.")
+    return {
+        'first_day': first_day, 'last_day': last_day,
+        'day_start': day_start, 'day_end': day_end, 'slot_minutes': slot_minutes,
+    }
@@ -1,7 +1,16 @@
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver, Signal
 from django.utils import timezone
-from .models import OrderTask, Order
+from .cache import ORDERS_SCOPE, bump_tenant_version
+from .models import (
+    OrderTask, Order, OrderMaterial, Customer, Supplier, InventoryItem,
+    WorkflowTemplate, TaskDefinition, Measurement, Appointment
+)
+from .sync import record_tombstone
+
+# Sent after rows are inserted with bulk_create (which skips post_save), with
+# the tailor_id and the set of customer_ids the new rows belong to.
+bulk_created = Signal()
 
 @receiver(post_save, sender=OrderTask)
 def check_order_completion(sender, instance, **kwargs):
@@ -21,3 +30,50 @@ def check_order_completion(sender, instance, **kwargs):
             if order.status != 'Completed':
                 order.status = 'Completed'
                 order.save()
+
+
+# --- Per-tailor cache invalidation ---
+@receiver([post_save, post_delete], sender=Customer)
+@receiver([post_save, post_delete], sender=Supplier)
+@receiver([post_save, post_delete], sender=InventoryItem)
+@receiver([post_save, post_delete], sender=WorkflowTemplate)
+def invalidate_tenant_cache(sender, instance, **kwargs):
+    """ Any change to a tailor's list data invalidates their cached lists. """
+    bump_tenant_version(instance.tailor_id)
+
+@receiver(bulk_created)
+def invalidate_tenant_cache_after_bulk_create(sender, tailor_id, **kwargs):
+    bump_tenant_version(tailor_id)
+
+@receiver([post_save, post_delete], sender=TaskDefinition)
+def invalidate_tenant_cache_for_task_definition(sender, instance, **kwargs):
+    tailor_id = WorkflowTemplate.objects.filter(pk=instance.template_id).values_list('tailor_id', flat=True).first()
+    if tailor_id is not None:
+        bump_tenant_version(tailor_id)
+
+
+@receiver([post_save, post_delete], sender=Order)
+@receiver([post_save, post_delete], sender=OrderMaterial)
+def invalidate_tenant_cache_for_order(sender, instance, **kwargs):
+    """ Prices and materials feed the cached profit summary; nothing else cached depends on orders. """
+    order = instance if sender is Order else (
+        instance.order if OrderMaterial.order.is_cached(instance) else None
+    )
+    if order is not None and Order.customer.is_cached(order):
+        tailor_id = order.customer.tailor_id
+    elif order is not None:
+        tailor_id = Customer.objects.filter(pk=order.customer_id).values_list('tailor_id', flat=True).first()
+    else:
+        tailor_id = Order.objects.filter(pk=instance.order_id).values_list('customer__tailor_id', flat=True).first()
+    if tailor_id is not None:
+        bump_tenant_version(tailor_id, scope=ORDERS_SCOPE)
+
+# --- Offline sync tombstones ---
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Order)
+@receiver(post_delete, sender=Measurement)
+@receiver(post_delete, sender=OrderTask)
+@receiver(post_delete, sender=Appointment)
+@receiver(post_delete, sender=InventoryItem)
+def record_sync_tombstone(sender, instance, **kwargs):
+    record_tombstone(instance)
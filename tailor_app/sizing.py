@@ -0,0 +1,240 @@
+# tailor_app/sizing.py
+
+"""
+Size matching and similar-customer search over current measurements.
+
+Each tailor's latest measurements are held as a dense NumPy matrix: one row
+per customer, one column per measurement name, NaN where a customer has no
+reading for that name. Queries compare a handful of measurements against
+every row at once; the distance between two profiles is the root mean square
+difference over the measurements both have, so customers measured for more
+or fewer things than the query are still comparable.
+
+The matrix lives in process memory. Before each query a cheap aggregate over
+the tailor's Measurement rows (row count, newest ``updated_at``) and
+measurement tombstones tells whether it is stale:
+
+* rows changed since the last build -> only those customers' rows are reloaded
+* a measurement was deleted, or rows appeared with old timestamps (a
+  restore) -> the matrix is rebuilt from scratch
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from django.db.models import Count, Max
+
+from .models import Customer, Measurement, StandardSize, Tombstone
+
+MAX_CACHED_TAILORS = 32
+DEFAULT_NEIGHBOURS = 5
+
+_matrices = OrderedDict()
+_lock = threading.Lock()
+
+
+def normalize_name(name):
+    """ Column key for a measurement name; 'chest ' and 'Chest' share a column. """
+    return ' '.join(str(name).split()).casefold()
+
+
+def _stamp(tailor_id):
+    stats = Measurement.objects.filter(customer__tailor_id=tailor_id).aggregate(
+        rows=Count('id'), last_updated=Max('updated_at'),
+    )
+    last_deleted = Tombstone.objects.filter(
+        tailor_id=tailor_id, model='measurement'
+    ).aggregate(m=Max('id'))['m']
+    return stats['rows'], stats['last_updated'], last_deleted
+
+
+def _query_vector(columns, measurements):
+    query = np.full(len(columns), np.nan)
+    for name, value in measurements.items():
+        column = columns.get(normalize_name(name))
+        if column is not None:
+            query[column] = float(value)
+    return query
+
+
+def _distances(values, query):
+    """
+    RMS difference between ``query`` (1-D, may contain NaN) and every row of
+    ``values``, over the columns both have. Returns (distances, overlap).
+    """
+    diff = values - query
+    present = ~np.isnan(diff)
+    overlap = present.sum(axis=1)
+    squared = np.where(present, diff * diff, 0.0).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        distances = np.sqrt(squared / overlap)
+    return distances, overlap
+
+
+def _nearest(distances, overlap, k, min_overlap):
+    """ Indices of the ``k`` smallest distances among rows with enough overlap. """
+    distances = np.where(overlap >= min_overlap, distances, np.inf)
+    k = min(k, len(distances))
+    if k == 0:
+        return np.array([], dtype=np.intp)
+    candidates = np.argpartition(distances, k - 1)[:k]
+    candidates = candidates[np.argsort(distances[candidates], kind='stable')]
+    return candidates[np.isfinite(distances[candidates])]
+
+
+class MeasurementMatrix:
+    """ Current measurements of one tailor's customers as a customers x names array. """
+
+    def __init__(self, tailor_id):
+        self.tailor_id = tailor_id
+        self.lock = threading.Lock()
+        self.stamp = None
+        self.customer_ids = np.empty(0, dtype=np.int64)
+        self.values = np.empty((0, 0))
+        self.rows = {}
+        self.columns = {}
+
+    def _rows_for(self, customer_ids=None):
+        queryset = Measurement.objects.filter(customer__tailor_id=self.tailor_id)
+        if customer_ids is not None:
+            queryset = queryset.filter(customer_id__in=customer_ids)
+        return queryset.current().values_list('customer_id', 'name', 'value')
+
+    def _load(self, readings, reset_ids=()):
+        """ Write (customer_id, name, value) readings in, growing the array as needed. """
+        readings = [(c, normalize_name(n), float(v)) for c, n, v in readings]
+        new_customers = [c for c in dict.fromkeys(c for c, _, _ in readings) if c not in self.rows]
+        new_columns = [n for n in dict.fromkeys(n for _, n, _ in readings) if n not in self.columns]
+
+        if new_columns:
+            self.columns.update((n, i) for i, n in enumerate(new_columns, start=len(self.columns)))
+            padding = np.full((self.values.shape[0], len(new_columns)), np.nan)
+            self.values = np.hstack([self.values, padding])
+        if new_customers:
+            self.rows.update((c, i) for i, c in enumerate(new_customers, start=len(self.rows)))
+            self.customer_ids = np.concatenate([self.customer_ids, np.array(new_customers, dtype=np.int64)])
+            padding = np.full((len(new_customers), len(self.columns)), np.nan)
+            self.values = np.vstack([self.values, padding])
+
+        reset = [self.rows[c] for c in reset_ids if c in self.rows]
+        if reset:
+            self.values[reset] = np.nan
+        if readings:
+            row_index = np.fromiter((self.rows[c] for c, _, _ in readings), dtype=np.intp, count=len(readings))
+            col_index = np.fromiter((self.columns[n] for _, n, _ in readings), dtype=np.intp, count=len(readings))
+            self.values[row_index, col_index] = [v for _, _, v in readings]
+
+    def rebuild(self, stamp):
+        self.customer_ids = np.empty(0, dtype=np.int64)
+        self.values = np.empty((0, 0))
+        self.rows, self.columns = {}, {}
+        self._load(self._rows_for())
+        self.stamp = stamp
+
+    def refresh(self):
+        """ Bring the matrix up to date, reloading only what changed where possible. """
+        stamp = _stamp(self.tailor_id)
+        if stamp == self.stamp:
+            return
+        if self.stamp is None:
+            self.rebuild(stamp)
+            return
+
+        old_rows, old_updated, old_deleted = self.stamp
+        rows, updated, deleted = stamp
+        if deleted != old_deleted or (updated == old_updated and rows != old_rows) or old_updated is None:
+            self.rebuild(stamp)
+            return
+
+        changed = set(
+            Measurement.objects.filter(customer__tailor_id=self.tailor_id, updated_at__gte=old_updated)
+            .values_list('customer_id', flat=True)
+        )
+        self._load(self._rows_for(changed), reset_ids=changed)
+        self.stamp = stamp
+
+    def query_vector(self, measurements):
+        """ Turn {name: value} into a row aligned with the columns; unknown names are left out. """
+        return _query_vector(self.columns, measurements)
+
+    def nearest(self, measurements, k=DEFAULT_NEIGHBOURS, min_overlap=None):
+        """ [(customer_id, distance, overlap)] for the ``k`` closest customers. """
+        query = self.query_vector(measurements)
+        known = int((~np.isnan(query)).sum())
+        if known == 0 or not len(self.customer_ids):
+            return []
+        if min_overlap is None:
+            min_overlap = max(1, (known + 1) // 2)
+        distances, overlap = _distances(self.values, query)
+        return [
+            (int(self.customer_ids[i]), float(distances[i]), int(overlap[i]))
+            for i in _nearest(distances, overlap, k, min_overlap)
+        ]
+
+
+def get_matrix(tailor_id):
+    """ The tailor's up-to-date matrix, built on first use and kept for the next query. """
+    with _lock:
+        matrix = _matrices.get(tailor_id)
+        if matrix is None:
+            matrix = _matrices[tailor_id] = MeasurementMatrix(tailor_id)
+            if len(_matrices) > MAX_CACHED_TAILORS:
+                _matrices.popitem(last=False)
+        else:
+            _matrices.move_to_end(tailor_id)
+    with matrix.lock:
+        matrix.refresh()
+    return matrix
+
+
+def similar_customers(tailor_id, measurements, k=DEFAULT_NEIGHBOURS):
+    """ The customers whose current measurements are closest to ``measurements``. """
+    matrix = get_matrix(tailor_id)
+    with matrix.lock:
+        matches = matrix.nearest(measurements, k=k)
+    customers = Customer.objects.in_bulk([customer_id for customer_id, _, _ in matches])
+    return [
+        {'customer': customers[customer_id], 'distance': distance, 'overlap': overlap}
+        for customer_id, distance, overlap in matches if customer_id in customers
+    ]
+
+
+def closest_sizes(tailor_id, measurements, k=3):
+    """ The standard sizes closest to ``measurements`` across all of the tailor's charts. """
+    sizes, charts = [], []
+    for size in StandardSize.objects.filter(tailor_id=tailor_id):
+        # Entries saved before StandardSize.clean() existed may not be numbers; skip them.
+        entries = size.measurements.items() if isinstance(size.measurements, dict) else ()
+        chart = {name: StandardSize.measurement_value(value) for name, value in entries}
+        sizes.append(size)
+        charts.append({name: value for name, value in chart.items() if value is not None})
+    if not sizes:
+        return []
+    columns = {}
+    for chart in charts:
+        for name in chart:
+            columns.setdefault(normalize_name(name), len(columns))
+    values = np.full((len(sizes), len(columns)), np.nan)
+    for row, chart in enumerate(charts):
+        for name, value in chart.items():
+            values[row, columns[normalize_name(name)]] = value
+
+    query = _query_vector(columns, measurements)
+    known = int((~np.isnan(query)).sum())
+    if known == 0:
+        return []
+
+    distances, overlap = _distances(values, query)
+    return [
+        {'size': sizes[i], 'distance': float(distances[i]), 'overlap': int(overlap[i])}
+        for i in _nearest(distances, overlap, k, max(1, (known + 1) // 2))
+    ]
+
+
+def find_matches(tailor_id, measurements, k=DEFAULT_NEIGHBOURS):
+    """ Closest standard sizes and most similar past customers for a set of measurements. """
+    return {
+        'sizes': closest_sizes(tailor_id, measurements),
+        'customers': similar_customers(tailor_id, measurements, k=k),
+    }
@@ -0,0 +1,77 @@
+# tailor_app/streaming.py
+
+"""
+Streamed rendering for long list pages.
+
+A list template marks its rows with ``{% stream %}`` (templatetags/streaming.py)
+instead of ``{% for %}``. ``stream_template`` renders the page once with the
+rows left out, so the head (layout, navigation, messages, CSRF token) and the
+tail are rendered inside the view like any other page. The response then sends
+the head, the rows in chunks of STREAM_CHUNK_SIZE read from a queryset
+iterator, and the tail, so the first byte doesn't wait on the row count.
+
+Rows inside a ``{% tenant_cache %}`` block still use the fragment cache: a hit
+is sent as part of the head; a miss is streamed and the assembled fragment is
+stored when the last row has gone out.
+"""
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.template.loader import get_template
+
+STREAM_CHUNK_SIZE = 200
+CONTEXT_KEY = '_row_stream'
+# Stands in for the rows in the first pass; nothing a template renders contains it.
+MARKER = '\x00rows\x00'
+
+
+class RowStream:
+    """ Collects the ``{% stream %}`` block of a page while it is rendered without its rows. """
+
+    def __init__(self, chunk_size=STREAM_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.node = None
+        self.context = None
+        self.cache_writes = []
+
+    def defer(self, node, context):
+        """ Take over rendering ``node``'s rows; returns the marker, or None if a block was already taken. """
+        if self.node is not None:
+            return None
+        self.node = node
+        # A copy, because the template pops its layers off ``context`` as it finishes.
+        self.context = context.__copy__()
+        return MARKER
+
+    def cache_fragment(self, store, fragment):
+        """ Call ``store`` with ``fragment`` and its streamed rows once they have all been rendered. """
+        self.cache_writes.append((store, fragment))
+
+    def chunks(self):
+        """ The rendered rows, STREAM_CHUNK_SIZE at a time. """
+        buffered = [] if self.cache_writes else None
+        for chunk in self.node.render_chunks(self.context, self.chunk_size):
+            if buffered is not None:
+                buffered.append(chunk)
+            yield chunk
+        if buffered is not None:
+            rows = ''.join(buffered)
+            for store, fragment in self.cache_writes:
+                store(fragment.replace(MARKER, rows))
+
+
+def stream_template(request, template_name, context=None, chunk_size=STREAM_CHUNK_SIZE, **kwargs):
+    """ Like ``render()``, but the ``{% stream %}`` rows are sent in chunks as they are rendered. """
+    stream = RowStream(chunk_size)
+    context = dict(context or {}, **{CONTEXT_KEY: stream})
+    page = get_template(template_name).render(context, request)
+    if stream.node is None:
+        # No rows to stream (e.g. the fragment cache had them)
+        return HttpResponse(page, **kwargs)
+    head, tail = page.split(MARKER, 1)
+
+    def content():
+        yield head
+        yield from stream.chunks()
+        yield tail
+
+    return StreamingHttpResponse(content(), **kwargs)
@@ -0,0 +1,308 @@
+# tailor_app/sync.py
+
+"""
+Delta sync for offline workshop tablets.
+
+``pull`` returns the rows of a tailor's data that changed since the client's
+cursor, plus tombstones for deleted rows, a page at a time. Cursors are opaque
+signed tokens: keep calling with the returned cursor while ``has_more`` is true,
+then store the last cursor and send it on the next sync. Each sync re-reads
+the last SYNC_OVERLAP before the previous one's end, because a row can be
+stamped before that sync read the table and committed after; clients upsert
+by id, so rows seen twice are harmless.
+
+``push`` applies a batch of offline edits. Each change carries the
+``updated_at`` the client last saw; if the server row changed since then the
+edit is rejected as a conflict and the current server row is returned instead.
+"""
+
+from datetime import datetime, timedelta
+
+from django.core import signing
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import Q
+from django.forms.models import model_to_dict
+from django.utils import timezone
+
+from .forms import (
+    CustomerForm, OrderForm, MeasurementForm, AppointmentForm,
+    InventoryItemForm, OrderTaskStatusForm
+)
+from .models import (
+    Customer, Order, Measurement, OrderTask, Appointment, InventoryItem, Tombstone
+)
+
+CURSOR_SALT = 'tailor_app.sync'
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 2000
+MAX_PUSH_BATCH = 500
+# Longer than any transaction that writes synced rows is expected to run.
+SYNC_OVERLAP = timedelta(minutes=2)
+
+
+class SyncModel:
+    """ How one model is scoped to a tailor, serialized and edited over sync and the JSON API. """
+
+    def __init__(self, name, model, tenant_path, fields, form_class, parent=None,
+                 creatable=True, deletable=False, form_takes_user=False, append_only=False):
+        self.name = name
+        self.model = model
+        self.tenant_path = tenant_path
+        self.fields = fields
+        self.form_class = form_class
+        self.parent = parent
+        self.creatable = creatable
+        self.deletable = deletable
+        self.form_takes_user = form_takes_user
+        # Updates add a new row and leave the old one as history (measurements)
+        self.append_only = append_only
+
+    def queryset(self, user):
+        return self.model.objects.filter(**{self.tenant_path: user.id})
+
+    def tenant_id(self, instance):
+        """ Follow tenant_path on an instance, e.g. 'customer__tailor_id'. """
+        value = instance
+        for attr in self.tenant_path.split('__'):
+            value = getattr(value, attr)
+        return value
+
+    def make_form(self, user, data, instance=None):
+        kwargs = {'instance': instance}
+        if self.form_takes_user:
+            kwargs['user'] = user
+        return self.form_class(data, **kwargs)
+
+    def create(self, user, fields):
+        """ Validate and save a new row for ``user``. Returns (obj, errors). """
+        if not self.creatable:
+            return None, {'id': ["This model can't be created over the API."]}
+        if self.parent:
+            parent_id = fields.get(self.parent)
+            if not Customer.objects.filter(pk=parent_id, tailor_id=user.id).exists():
+                return None, {self.parent: ["Unknown customer."]}
+        form = self.make_form(user, fields)
+        if not form.is_valid():
+            return None, form_errors(form)
+        obj = form.save(commit=False)
+        if self.parent:
+            obj.customer_id = fields[self.parent]
+        else:
+            obj.tailor = user
+        obj.save()
+        return obj, None
+
+    def update(self, user, instance, fields):
+        """
+        Apply a partial update on top of the row's current values. Returns
+        (obj, errors); for append-only models ``obj`` is the new row.
+        """
+        data = model_to_dict(instance, fields=self.form_class._meta.fields)
+        data.update(fields)
+        form = self.make_form(user, data, instance=instance)
+        if not form.is_valid():
+            return None, form_errors(form)
+        if not self.append_only:
+            return form.save(), None
+        # Saved as a new reading, like edit_measurement in views/customers.py
+        obj = form.save(commit=False)
+        obj.pk = None
+        obj._state.adding = True
+        obj.save()
+        return obj, None
+
+    def serialize(self, instance):
+        return self.queryset_values(self.model.objects.filter(pk=instance.pk)).first()
+
+    def queryset_values(self, queryset):
+        return queryset.values(*self.fields)
+
+
+SYNC_MODELS = [
+    SyncModel(
+        'customer', Customer, 'tailor_id',
+        ['id', 'name', 'phone', 'email', 'address', 'created_at', 'updated_at'],
+        CustomerForm,
+    ),
+    SyncModel(
+        'order', Order, 'customer__tailor_id',
+        ['id', 'customer_id', 'item', 'status', 'due_date', 'notes', 'fabric_details',
+         'price', 'amount_paid', 'created_at', 'updated_at'],
+        OrderForm, parent='customer',
+    ),
+    SyncModel(
+        'measurement', Measurement, 'customer__tailor_id',
+        ['id', 'customer_id', 'name', 'value', 'created_at', 'updated_at'],
+        MeasurementForm, parent='customer', append_only=True,
+    ),
+    SyncModel(
+        'ordertask', OrderTask, 'order__customer__tailor_id',
+        ['id', 'order_id', 'task_definition_id', 'task_definition__name', 'task_definition__order',
+         'is_completed', 'completed_at', 'created_at', 'updated_at'],
+        OrderTaskStatusForm, creatable=False,
+    ),
+    SyncModel(
+        'appointment', Appointment, 'tailor_id',
+        ['id', 'customer_id', 'title', 'start_time', 'end_time', 'status', 'notes', 'recurrence', 'updated_at'],
+        AppointmentForm, form_takes_user=True,
+    ),
+    SyncModel(
+        'inventoryitem', InventoryItem, 'tailor_id',
+        ['id', 'name', 'supplier_id', 'quantity_in_stock', 'cost_per_unit', 'reorder_level', 'updated_at'],
+        InventoryItemForm, form_takes_user=True,
+    ),
+]
+SYNC_MODELS_BY_NAME = {spec.name: spec for spec in SYNC_MODELS}
+SYNC_MODELS_BY_CLASS = {spec.model: spec for spec in SYNC_MODELS}
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def form_errors(form):
+    return {field: [error['message'] for error in errors] for field, errors in form.errors.get_json_data().items()}
+
+
+def record_tombstone(instance):
+    """ Called from post_delete so the deletion reaches offline clients. """
+    spec = SYNC_MODELS_BY_CLASS[type(instance)]
+    try:
+        tailor_id = spec.tenant_id(instance)
+    except ObjectDoesNotExist:
+        return
+    Tombstone.objects.create(tailor_id=tailor_id, model=spec.name, object_id=instance.pk)
+
+
+# --- Pull ---
+
+def _dump_cursor(state):
+    return signing.dumps(state, salt=CURSOR_SALT, compress=True)
+
+
+def _load_cursor(cursor):
+    try:
+        return signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        raise InvalidCursor("Invalid sync cursor.")
+
+
+def _streams(user):
+    """ (key, ordered queryset of dicts, timestamp field) for each sync stream. """
+    for spec in SYNC_MODELS:
+        yield spec.name, spec.queryset_values(spec.queryset(user)), 'updated_at'
+    tombstones = Tombstone.objects.filter(tailor_id=user.id).values('model', 'object_id', 'deleted_at', 'id')
+    yield 'deleted', tombstones, 'deleted_at'
+
+
+def pull(user, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Return one page of changes for ``user``.
+
+    The page is ``{'changes': {model: [rows]}, 'deleted': [...], 'cursor': str,
+    'has_more': bool}``. Rows are read per stream in (timestamp, pk) order up to
+    a high-water mark fixed at the start of the sync, so paging is stable even
+    while other writes are happening.
+    """
+    state = _load_cursor(cursor) if cursor else {'since': None}
+    if 'until' not in state:
+        state.update(until=timezone.now().isoformat(), stream=0, ts=None, pk=None)
+
+    since = datetime.fromisoformat(state['since']) if state['since'] else None
+    until = datetime.fromisoformat(state['until'])
+    streams = list(_streams(user))
+    page = {'changes': {spec.name: [] for spec in SYNC_MODELS}, 'deleted': []}
+    remaining = limit
+
+    while state['stream'] < len(streams) and remaining > 0:
+        key, queryset, ts_field = streams[state['stream']]
+        queryset = queryset.filter(**{f'{ts_field}__lte': until})
+        if since is not None:
+            queryset = queryset.filter(**{f'{ts_field}__gt': since})
+        if state['ts'] is not None:
+            last_ts = datetime.fromisoformat(state['ts'])
+            queryset = queryset.filter(
+                Q(**{f'{ts_field}__gt': last_ts}) | Q(**{ts_field: last_ts, 'pk__gt': state['pk']})
+            )
+        rows = list(queryset.order_by(ts_field, 'pk')[:remaining])
+
+        (page['deleted'] if key == 'deleted' else page['changes'][key]).extend(rows)
+        if len(rows) == remaining:
+            state['ts'] = rows[-1][ts_field].isoformat()
+            state['pk'] = rows[-1]['id']
+            remaining = 0
+        else:
+            state.update(stream=state['stream'] + 1, ts=None, pk=None)
+            remaining -= len(rows)
+
+    page['has_more'] = state['stream'] < len(streams)
+    if page['has_more']:
+        page['cursor'] = _dump_cursor(state)
+    else:
+        # updated_at is set before commit, so start the next sync a little
+        # before the mark to catch rows that were still in flight.
+        page['cursor'] = _dump_cursor({'since': (until - SYNC_OVERLAP).isoformat()})
+    return page
+
+
+# --- Push ---
+
+def _truncate_ms(value):
+    # JSON responses carry millisecond precision, so compare at that precision.
+    return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+
+def _apply_change(user, change):
+    spec = SYNC_MODELS_BY_NAME.get(change.get('model'))
+    if spec is None:
+        return {'status': 'invalid', 'errors': {'model': ["Unknown model."]}}
+
+    fields = change.get('fields') or {}
+    object_id = change.get('id')
+
+    if object_id is None:
+        obj, errors = spec.create(user, fields)
+        if errors:
+            return {'status': 'invalid', 'errors': errors}
+        return {'status': 'applied', 'id': obj.pk, 'server': spec.serialize(obj)}
+
+    instance = spec.queryset(user).select_for_update().filter(pk=object_id).first()
+    if instance is None:
+        return {'status': 'not_found'}
+
+    base = change.get('base_updated_at')
+    if not base or _truncate_ms(instance.updated_at) > datetime.fromisoformat(base):
+        return {'status': 'conflict', 'server': spec.serialize(instance)}
+
+    if change.get('deleted'):
+        if not spec.deletable:
+            return {'status': 'invalid', 'errors': {'deleted': ["This model can't be deleted over the API."]}}
+        instance.delete()
+        return {'status': 'deleted'}
+
+    obj, errors = spec.update(user, instance, fields)
+    if errors:
+        return {'status': 'invalid', 'errors': errors}
+    return {'status': 'applied', 'id': obj.pk, 'server': spec.serialize(obj)}
+
+
+def push(user, changes):
+    """
+    Apply a batch of offline edits. Each change is
+    ``{'model', 'id' (None to create), 'client_id', 'base_updated_at',
+    'fields': {...}, 'deleted': bool}`` and is applied in its own transaction,
+    so one bad change doesn't abort the rest. Returns one result per change.
+    """
+    results = []
+    for index, change in enumerate(changes):
+        try:
+            with transaction.atomic():
+                result = _apply_change(user, change)
+        except (TypeError, ValueError, AttributeError) as e:
+            result = {'status': 'invalid', 'errors': {'__all__': [str(e)]}}
+        result.update(index=index, model=change.get('model') if isinstance(change, dict) else None)
+        if isinstance(change, dict) and 'client_id' in change:
+            result['client_id'] = change['client_id']
+        results.append(result)
+    return results
@@ -0,0 +1,71 @@
+# tailor_app/templatetags/streaming.py
+
+from django import template
+from django.db.models import QuerySet
+
+from tailor_app.streaming import CONTEXT_KEY, STREAM_CHUNK_SIZE
+
+register = template.Library()
+
+
+class StreamNode(template.Node):
+    def __init__(self, loopvar, sequence, nodelist, nodelist_empty):
+        self.loopvar = loopvar
+        self.sequence = sequence
+        self.nodelist = nodelist
+        self.nodelist_empty = nodelist_empty
+
+    def render_chunks(self, context, chunk_size):
+        """ The rendered rows, ``chunk_size`` at a time; querysets are read with ``iterator()``. """
+        items = self.sequence.resolve(context, ignore_failures=True)
+        if items is None:
+            items = []
+        elif isinstance(items, QuerySet):
+            items = items.iterator(chunk_size=chunk_size)
+        rows, empty = [], True
+        for item in items:
+            empty = False
+            with context.push(**{self.loopvar: item}):
+                rows.append(self.nodelist.render(context))
+            if len(rows) == chunk_size:
+                yield ''.join(rows)
+                rows = []
+        if rows:
+            yield ''.join(rows)
+        if empty:
+            yield self.nodelist_empty.render(context)
+
+    def render(self, context):
+        stream = context.get(CONTEXT_KEY)
+        marker = stream.defer(self, context) if stream is not None else None
+        if marker is not None:
+            return marker
+        return ''.join(self.render_chunks(context, STREAM_CHUNK_SIZE))
+
+
+@register.tag('stream')
+def do_stream(parser, token):
+    """
+    A ``{% for %}`` over rows that tailor_app.streaming.stream_template sends
+    in chunks as they are rendered; rendered normally, it's a plain loop.
+    There is no ``forloop`` variable.
+
+    Usage::
+
+        {% load streaming %}
+        {% stream customer in customers %}
+            <tr>...</tr>
+        {% empty %}
+            <tr>No customers found.</tr>
+        {% endstream %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 4 or bits[2] != 'in':
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag must look like {{% {bits[0]} item in items %}}.")
+    nodelist = parser.parse(('empty', 'endstream'))
+    if parser.next_token().contents == 'empty':
+        nodelist_empty = parser.parse(('endstream',))
+        parser.delete_first_token()
+    else:
+        nodelist_empty = template.NodeList()
+    return StreamNode(bits[1], parser.compile_filter(bits[3]), nodelist, nodelist_empty)
@@ -0,0 +1,55 @@
+# tailor_app/templatetags/tenant_cache.py
+
+from django import template
+
+from tailor_app.cache import get_fragment, set_fragment
+from tailor_app.streaming import CONTEXT_KEY, MARKER
+
+register = template.Library()
+
+
+class TenantCacheNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        request = context.get('request')
+        if request is None or not request.user.is_authenticated:
+            return self.nodelist.render(context)
+
+        name = self.name.resolve(context)
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        key, fragment = get_fragment(request.user.id, name, *vary_on)
+        if fragment is None:
+            fragment = self.nodelist.render(context)
+            stream = context.get(CONTEXT_KEY)
+            if stream is not None and MARKER in fragment:
+                # The rows are still to be streamed; store the fragment once they have been.
+                stream.cache_fragment(lambda rendered: set_fragment(key, rendered), fragment)
+            else:
+                set_fragment(key, fragment)
+        return fragment
+
+
+@register.tag('tenant_cache')
+def do_tenant_cache(parser, token):
+    """
+    Cache a block of the current tailor's page until their data changes.
+
+    Usage::
+
+        {% load tenant_cache %}
+        {% tenant_cache "inventory_list" [var1 var2 ...] %}
+            ...
+        {% endtenant_cache %}
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name.")
+    nodelist = parser.parse(('endtenant_cache',))
+    parser.delete_first_token()
+    name = parser.compile_filter(bits[1])
+    vary_on = [parser.compile_filter(bit) for bit in bits[2:]]
+    return TenantCacheNode(nodelist, name, vary_on)
@@ -0,0 +1,310 @@
+# tailor_app/tenant_export.py
+
+"""
+Streaming export and restore of one tailor's complete dataset as JSONL.
+
+The export is a header line followed by one line per row, grouped by model in
+dependency order (parents before children)::
+
+    {"type": "header", "format": 1, "tailor": "asha", "exported_at": "...", "models": [...]}
+    {"model": "customer", "pk": 12, "fields": {...}}
+
+Rows are read with ``.values().iterator(chunk_size=...)`` so the export never
+holds more than one chunk in memory. All reads share one transaction
+(REPEATABLE READ on PostgreSQL, a deferred read transaction on SQLite, which
+doesn't hold the write lock), so writes made while the export runs can't leave
+rows pointing at parents that weren't exported. Order images are exported as a
+manifest (stored file name and caption); the files themselves are not included.
+
+Restore reads the file line by line and inserts ``bulk_create`` batches.
+Primary keys are remapped by adding a per-model offset (the table's current
+maximum id) to the exported id, so foreign keys can be rewritten with
+arithmetic instead of an old->new id map and memory stays constant however
+many rows the tenant has. Run restores while nothing else is writing to the
+same tables, since the offset range is reserved up front. Customer phone
+numbers are unique site-wide, so restoring a tenant into the same database it
+was exported from fails (and rolls back) unless the original was removed.
+"""
+
+import json
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import (
+    Supplier, InventoryItem, Customer, Measurement, Order, OrderMaterial,
+    Payment, OrderImage, WorkflowTemplate, TaskDefinition, OrderTask, Appointment,
+    AppointmentException, ArchivedOrder, ArchivedPayment, ArchivedAppointment, StandardSize
+)
+from .signals import bulk_created
+
+FORMAT_VERSION = 1
+CHUNK_SIZE = 2000
+SHARED_ID_SPACES = [('order', 'archivedorder'), ('payment', 'archivedpayment'), ('appointment', 'archivedappointment')]
+
+
+class ExportModel:
+    """
+    One model in the export. ``tenant_path`` scopes it to a tailor and
+    ``foreign_keys`` maps each FK column to the exported model it points at.
+    """
+
+    def __init__(self, name, model, tenant_path, fields, foreign_keys=None):
+        self.name = name
+        self.model = model
+        self.tenant_path = tenant_path
+        self.fields = fields
+        self.foreign_keys = foreign_keys or {}
+
+    def rows(self, tailor_id, chunk_size=CHUNK_SIZE):
+        queryset = self.model.objects.filter(**{self.tenant_path: tailor_id}).order_by('pk')
+        return queryset.values('pk', *self.fields).iterator(chunk_size=chunk_size)
+
+
+EXPORT_MODELS = [
+    ExportModel('supplier', Supplier, 'tailor_id', ['name', 'contact_person', 'email', 'phone']),
+    ExportModel(
+        'inventoryitem', InventoryItem, 'tailor_id',
+        ['name', 'supplier_id', 'quantity_in_stock', 'cost_per_unit', 'reorder_level', 'updated_at'],
+        {'supplier_id': 'supplier'},
+    ),
+    ExportModel(
+        'customer', Customer, 'tailor_id',
+        ['name', 'phone', 'email', 'address', 'client_account__username', 'created_at', 'updated_at'],
+    ),
+    ExportModel(
+        'measurement', Measurement, 'customer__tailor_id',
+        ['customer_id', 'name', 'value', 'created_at', 'updated_at'],
+        {'customer_id': 'customer'},
+    ),
+    ExportModel(
+        'order', Order, 'customer__tailor_id',
+        ['customer_id', 'item', 'status', 'due_date', 'notes', 'fabric_details',
+         'price', 'amount_paid', 'created_at', 'updated_at'],
+        {'customer_id': 'customer'},
+    ),
+    ExportModel(
+        'ordermaterial', OrderMaterial, 'order__customer__tailor_id',
+        ['order_id', 'material_id', 'quantity_used'],
+        {'order_id': 'order', 'material_id': 'inventoryitem'},
+    ),
+    ExportModel(
+        'payment', Payment, 'tailor_id',
+        ['order_id', 'amount', 'method', 'paid_at', 'note', 'created_at'],
+        {'order_id': 'order'},
+    ),
+    ExportModel(
+        'orderimage', OrderImage, 'order__customer__tailor_id',
+        ['order_id', 'image', 'caption', 'uploaded_at'],
+        {'order_id': 'order'},
+    ),
+    ExportModel('standardsize', StandardSize, 'tailor_id', ['chart', 'label', 'measurements']),
+    ExportModel('workflowtemplate', WorkflowTemplate, 'tailor_id', ['name', 'created_at']),
+    ExportModel(
+        'taskdefinition', TaskDefinition, 'template__tailor_id',
+        ['template_id', 'name', 'order', 'estimated_minutes'],
+        {'template_id': 'workflowtemplate'},
+    ),
+    ExportModel(
+        'ordertask', OrderTask, 'order__customer__tailor_id',
+        ['order_id', 'task_definition_id', 'is_completed', 'completed_at', 'created_at', 'updated_at'],
+        {'order_id': 'order', 'task_definition_id': 'taskdefinition'},
+    ),
+    ExportModel(
+        'appointment', Appointment, 'tailor_id',
+        ['customer_id', 'title', 'start_time', 'end_time', 'status', 'notes', 'recurrence',
+         'recurrence_until', 'updated_at'],
+        {'customer_id': 'customer'},
+    ),
+    ExportModel(
+        'appointmentexception', AppointmentException, 'appointment__tailor_id',
+        ['appointment_id', 'original_start', 'is_cancelled', 'start_time', 'end_time', 'notes'],
+        {'appointment_id': 'appointment'},
+    ),
+    ExportModel(
+        'archivedorder', ArchivedOrder, 'tailor_id',
+        ['customer_id', 'item', 'status', 'due_date', 'notes', 'fabric_details', 'created_at', 'updated_at',
+         'price', 'amount_paid', 'material_cost', 'details', 'archived_at'],
+        {'customer_id': 'customer'},
+    ),
+    ExportModel(
+        'archivedpayment', ArchivedPayment, 'tailor_id',
+        ['order_id', 'amount', 'method', 'paid_at', 'note', 'created_at'],
+        {'order_id': 'archivedorder'},
+    ),
+    ExportModel(
+        'archivedappointment', ArchivedAppointment, 'tailor_id',
+        ['customer_id', 'title', 'start_time', 'end_time', 'status', 'notes', 'archived_at'],
+        {'customer_id': 'customer'},
+    ),
+]
+EXPORT_MODELS_BY_NAME = {spec.name: spec for spec in EXPORT_MODELS}
+
+
+class RestoreError(Exception):
+    pass
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Can't serialize {type(value).__name__}")
+
+
+# --- Export ---
+
+@contextmanager
+def _snapshot():
+    """ One transaction whose reads all see the same committed state. """
+    if connection.in_atomic_block:
+        yield
+    elif connection.vendor == 'sqlite':
+        # atomic() would BEGIN IMMEDIATE (see the_digital_thread/database.py)
+        # and hold the write lock for the whole download; a deferred
+        # transaction only takes a read snapshot at its first SELECT.
+        with connection.cursor() as cursor:
+            cursor.execute('BEGIN DEFERRED')
+        try:
+            yield
+        finally:
+            if connection.connection is not None and connection.connection.in_transaction:
+                with connection.cursor() as cursor:
+                    cursor.execute('ROLLBACK')
+    else:
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Must come before the first query of the transaction.
+                with connection.cursor() as cursor:
+                    cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+            yield
+
+
+def export_lines(tailor):
+    """ Yield the tailor's dataset as JSONL lines (each ending in a newline). """
+    header = {
+        'type': 'header',
+        'format': FORMAT_VERSION,
+        'tailor': tailor.username,
+        'exported_at': timezone.now().isoformat(),
+        'models': [spec.name for spec in EXPORT_MODELS],
+    }
+    yield json.dumps(header) + '\n'
+    with _snapshot():
+        for spec in EXPORT_MODELS:
+            for row in spec.rows(tailor.id):
+                pk = row.pop('pk')
+                yield json.dumps({'model': spec.name, 'pk': pk, 'fields': row}, default=_json_default) + '\n'
+
+
+# --- Restore ---
+
+@contextmanager
+def _preserve_timestamps(models):
+    """ Keep exported created_at/updated_at instead of auto_now stamping them. """
+    changed = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                changed.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in changed:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class TenantRestorer:
+    def __init__(self, tailor, batch_size=1000):
+        self.tailor = tailor
+        self.batch_size = batch_size
+        self.offsets = {}
+        self.counts = {spec.name: 0 for spec in EXPORT_MODELS}
+
+    def _build(self, spec, pk, fields):
+        values = {}
+        for name, value in fields.items():
+            if name == 'client_account__username':
+                continue
+            if name in spec.foreign_keys and value is not None:
+                value += self.offsets[spec.foreign_keys[name]]
+            values[name] = value
+        if spec.tenant_path == 'tailor_id':
+            values['tailor_id'] = self.tailor.id
+        obj = spec.model(pk=pk + self.offsets[spec.name], **values)
+        if spec.model is Customer:
+            # Portal logins are relinked by username when the user already
+            # exists here; passwords are never exported.
+            obj._client_username = fields.get('client_account__username')
+        return obj
+
+    def _flush(self, spec, batch):
+        if not batch:
+            return
+        if spec.model is Customer:
+            usernames = {obj._client_username for obj in batch} - {None}
+            users = dict(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+            for obj in batch:
+                obj.client_account_id = users.get(obj._client_username)
+        spec.model.objects.bulk_create(batch, batch_size=self.batch_size)
+        self.counts[spec.name] += len(batch)
+        batch.clear()
+
+    def run(self, lines):
+        lines = iter(lines)
+        try:
+            header = json.loads(next(lines))
+        except (StopIteration, ValueError):
+            raise RestoreError("The file is empty or not JSONL.")
+        if header.get('type') != 'header' or header.get('format') != FORMAT_VERSION:
+            raise RestoreError("Unsupported export format.")
+
+        models = [spec.model for spec in EXPORT_MODELS]
+        with transaction.atomic(), _preserve_timestamps(models):
+            for spec in EXPORT_MODELS:
+                self.offsets[spec.name] = spec.model.objects.aggregate(m=Max('pk'))['m'] or 0
+            # Archived rows keep the id they had in the hot table, so both share one offset.
+            for hot, cold in SHARED_ID_SPACES:
+                self.offsets[hot] = self.offsets[cold] = max(self.offsets[hot], self.offsets[cold])
+
+            current, batch = None, []
+            for number, line in enumerate(lines, start=2):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    spec = EXPORT_MODELS_BY_NAME[record['model']]
+                    obj = self._build(spec, record['pk'], record['fields'])
+                except (ValueError, KeyError, TypeError) as e:
+                    raise RestoreError(f"Line {number}: {e!r}")
+                if spec is not current:
+                    if current is not None:
+                        self._flush(current, batch)
+                    current = spec
+                batch.append(obj)
+                if len(batch) >= self.batch_size:
+                    self._flush(current, batch)
+            if current is not None:
+                self._flush(current, batch)
+
+            # Explicit ids were inserted, so move the sequences past them
+            # (a no-op on SQLite).
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                    cursor.execute(sql)
+
+        bulk_created.send(sender=Customer, tailor_id=self.tailor.id, customer_ids=set())
+        return self.counts
+
+
+def restore_lines(lines, tailor, batch_size=1000):
+    """ Restore an export into ``tailor``'s account. Returns rows created per model. """
+    return TenantRestorer(tailor, batch_size=batch_size).run(lines)
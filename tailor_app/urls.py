@@ -8,10 +8,15 @@ urlpatterns = [
     # Dashboard & Reports
     path('', views.dashboard, name='dashboard'),
     path('reports/', views.reports_view, name='reports'),
+    path('reports/cash-flow/', views.cash_flow_report, name='reports_cash_flow'),
+    path('reports/profitability/', views.profitability_report, name='reports_profitability'),
+    path('reports/task-analytics/', views.task_analytics, name='reports_task_analytics'),
 
     # Customer URLs - Standardized to use 'customer_id'
     path('customers/', views.customer_list, name='customer_list'),
     path('customers/add/', views.add_customer, name='add_customer'),
+    path('customers/import/', views.import_data, name='import_data'),
+    path('export/', views.export_data, name='export_data'),
     path('customers/<int:customer_id>/', views.customer_detail, name='customer_detail'),
     path('customers/<int:customer_id>/edit/', views.edit_customer, name='edit_customer'),
     path('customers/<int:customer_id>/invite/', views.invite_customer_to_portal, name='invite_customer_to_portal'),
@@ -21,17 +26,31 @@ urlpatterns = [
     path('orders/<int:order_id>/', views.order_detail, name='order_detail'),
     path('orders/<int:order_id>/edit/', views.edit_order, name='edit_order'),
     path('orders/<int:order_id>/invoice/', views.generate_pdf_invoice, name='generate_pdf_invoice'),
+    path('orders/<int:order_id>/payments/add/', views.add_payment, name='add_payment'),
+    path('payments/<int:payment_id>/void/', views.void_payment, name='void_payment'),
 
     # Measurement URLs - Standardized to use 'customer_id' and 'measurement_id'
     path('customers/<int:customer_id>/add_measurement/', views.add_measurement, name='add_measurement'),
     path('measurements/<int:measurement_id>/edit/', views.edit_measurement, name='edit_measurement'),
     path('measurements/<int:measurement_id>/delete/', views.delete_measurement, name='delete_measurement'),
+    path('api/fit-match/', views.fit_match_api, name='fit_match_api'),
     
     # Calendar & Appointments
     path('calendar/', views.calendar_view, name='calendar'),
     path('api/calendar-events/', views.calendar_events_api, name='calendar_events_api'),
+    path('api/availability/', views.availability_api, name='availability_api'),
+    path('api/cache-stats/', views.cache_stats_api, name='cache_stats_api'),
     path('appointments/add/', views.add_appointment, name='add_appointment'),
     path('appointments/<int:appointment_id>/update/<str:new_status>/', views.update_appointment_status, name='update_appointment_status'),
+    path('appointments/<int:appointment_id>/occurrence/', views.edit_occurrence, name='edit_occurrence'),
+
+    # Offline sync
+    path('api/sync/', views.sync_pull, name='sync_pull'),
+    path('api/sync/push/', views.sync_push, name='sync_push'),
+
+    # JSON API
+    path('api/v1/<str:resource>/', views.api_resource_list, name='api_resource_list'),
+    path('api/v1/<str:resource>/<int:pk>/', views.api_resource_detail, name='api_resource_detail'),
 
     # Inventory & Supplier
     path('inventory/', views.inventory_list, name='inventory_list'),
@@ -47,5 +66,6 @@ urlpatterns = [
     path('workflows/<int:template_id>/edit/', views.edit_workflow_template, name='edit_workflow'),
     path('orders/<int:order_id>/apply-workflow/', views.apply_workflow_to_order, name='apply_workflow'),
     path('tasks/<int:task_id>/update/', views.update_order_task_status, name='update_task'),
+    path('production/', views.production_board, name='production_board'),
 ]
 
@@ -0,0 +1,29 @@
+# tailor_app/views/__init__.py
+
+"""
+Views, one module per subsystem. Everything urls.py routes to is re-exported
+here so it can keep referring to ``views.<name>``.
+"""
+
+from .reports import dashboard, reports_view, profitability_report, cash_flow_report, task_analytics
+from .customers import (
+    customer_list, customer_detail, add_customer, edit_customer, invite_customer_to_portal,
+    import_data, export_data, add_measurement, edit_measurement, delete_measurement,
+    fit_match_api,
+)
+from .orders import (
+    add_order, edit_order, order_detail, generate_pdf_invoice, add_payment, void_payment,
+)
+from .appointments import (
+    calendar_view, calendar_events_api, add_appointment, update_appointment_status,
+    edit_occurrence, availability_api,
+)
+from .inventory import (
+    inventory_list, add_inventory_item, edit_inventory_item, supplier_list, add_supplier,
+    edit_supplier,
+)
+from .workflows import (
+    workflow_template_list, create_workflow_template, edit_workflow_template,
+    apply_workflow_to_order, update_order_task_status, production_board,
+)
+from .json_api import cache_stats_api, sync_pull, sync_push, api_resource_list, api_resource_detail
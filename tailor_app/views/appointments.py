@@ -0,0 +1,170 @@
+# tailor_app/views/appointments.py
+
+""" Calendar and appointments. """
+
+from datetime import datetime, time, timedelta
+from django.http import JsonResponse
+from django.shortcuts import render, get_object_or_404, redirect
+from django.contrib.auth.decorators import login_required
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib import messages
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.views.decorators.http import require_POST
+
+from .. import archive, scheduling
+from ..models import Order, Appointment, AppointmentException
+from ..forms import AppointmentForm
+
+@login_required
+def calendar_view(request):
+    form = AppointmentForm(user=request.user)
+    return render(request, 'tailor_app/calendar.html', {'form': form})
+
+def _calendar_window(request):
+    """ The range FullCalendar asks for (?start=...&end=...), or the months around today. """
+    try:
+        start = datetime.fromisoformat(request.GET['start'])
+        end = datetime.fromisoformat(request.GET['end'])
+    except (KeyError, ValueError):
+        today = timezone.localdate()
+        start = datetime.combine(today - timedelta(days=31), time.min)
+        end = datetime.combine(today + timedelta(days=62), time.min)
+    if timezone.is_naive(start):
+        start = timezone.make_aware(start)
+    if timezone.is_naive(end):
+        end = timezone.make_aware(end)
+    return start, min(end, start + timedelta(days=scheduling.MAX_CALENDAR_DAYS))
+
+@login_required
+def calendar_events_api(request):
+    start, end = _calendar_window(request)
+    orders = Order.objects.filter(
+        customer__tailor=request.user,
+        due_date__gte=timezone.localdate(start), due_date__lte=timezone.localdate(end),
+    )
+    order_events = [
+        {'title': f"Due: {order.item}", 'start': order.due_date.isoformat(), 'allDay': True, 'backgroundColor': '#dc3545', 'borderColor': '#dc3545', 'url': reverse('tailor_app:order_detail', args=[order.id])}
+        for order in orders
+    ]
+    # Recurring appointments are expanded for the visible range only
+    appointments = scheduling.occurrences(request.user.id, start, end, statuses=None)
+    appointment_events = [
+        {'title': appt.title, 'start': timezone.localtime(appt.start).isoformat(), 'end': timezone.localtime(appt.end).isoformat(), 'backgroundColor': '#ffc107' if appt.status == 'Requested' else '#0d6efd', 'borderColor': '#ffc107' if appt.status == 'Requested' else '#0d6efd', 'extendedProps': {
+            'notes': appt.notes,
+            'appointmentId': appt.appointment.id,
+            'occurrence': appt.original_start.isoformat() if appt.original_start else None,
+        }}
+        for appt in appointments
+    ]
+    appointment_events += [
+        {'title': appt.title, 'start': timezone.localtime(appt.start_time).isoformat(), 'end': timezone.localtime(appt.end_time).isoformat(), 'backgroundColor': '#6c757d', 'borderColor': '#6c757d', 'extendedProps': {
+            'notes': appt.notes,
+            'archived': True,
+        }}
+        for appt in archive.archived_appointments(request.user.id, start, end)
+    ]
+    events = order_events + appointment_events
+    return JsonResponse(events, safe=False)
+
+@login_required
+def add_appointment(request):
+    if request.method == 'POST':
+        # The conflict check in the form locks the tailor's calendar until the
+        # appointment is saved.
+        with transaction.atomic():
+            form = AppointmentForm(request.POST, user=request.user)
+            if form.is_valid():
+                appointment = form.save(commit=False)
+                appointment.tailor = request.user
+                appointment.status = 'Confirmed'
+                appointment.save()
+                messages.success(request, "Appointment added.")
+            else:
+                messages.error(request, ' '.join(e for errors in form.errors.values() for e in errors))
+    return redirect('tailor_app:calendar')
+
+@login_required
+def update_appointment_status(request, appointment_id, new_status):
+    with transaction.atomic():
+        appointment = get_object_or_404(Appointment, pk=appointment_id, tailor=request.user)
+        if new_status in ['Confirmed', 'Cancelled']:
+            if new_status in scheduling.BLOCKING_STATUSES and appointment.status not in scheduling.BLOCKING_STATUSES:
+                try:
+                    scheduling.check_slot(request.user.id, appointment.start_time, appointment.end_time, exclude_id=appointment.pk)
+                except ValidationError as e:
+                    messages.error(request, ' '.join(e.messages))
+                    return redirect('tailor_app:dashboard')
+            appointment.status = new_status
+            appointment.save()
+            messages.success(request, f"Appointment request has been {new_status.lower()}.")
+    return redirect('tailor_app:dashboard')
+
+def _parse_datetime(value):
+    """ An ISO 8601 date-time; one without an offset is in the current timezone. """
+    moment = datetime.fromisoformat(value)
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+@require_POST
+@login_required
+def edit_occurrence(request, appointment_id):
+    """
+    Cancel (action=cancel) or move (action=move, start_time, end_time) one
+    occurrence of a recurring appointment, identified by its original start.
+    """
+    with transaction.atomic():
+        appointment = get_object_or_404(Appointment, pk=appointment_id, tailor=request.user)
+        try:
+            original_start = datetime.fromisoformat(request.POST['original_start'])
+            if appointment.is_recurring and timezone.is_aware(original_start):
+                rule = appointment.recurrence_rule()
+                starts = scheduling.occurrence_starts(rule, appointment.start_time, original_start, original_start + timedelta(seconds=1))
+                is_occurrence = next(starts, None) == original_start
+            else:
+                is_occurrence = False
+        except (KeyError, ValueError):
+            is_occurrence = False
+        if not is_occurrence:
+            return JsonResponse({'error': "original_start isn't an occurrence of this appointment."}, status=400)
+
+        action = request.POST.get('action')
+        if action == 'cancel':
+            AppointmentException.objects.update_or_create(
+                appointment=appointment, original_start=original_start,
+                defaults={'is_cancelled': True, 'start_time': None, 'end_time': None},
+            )
+        elif action == 'move':
+            if not request.POST.get('start_time') or not request.POST.get('end_time'):
+                return JsonResponse({'error': "start_time and end_time are required."}, status=400)
+            try:
+                start = _parse_datetime(request.POST['start_time'])
+                end = _parse_datetime(request.POST['end_time'])
+            except ValueError:
+                return JsonResponse({'error': "start_time and end_time must be ISO 8601 date-times."}, status=400)
+            try:
+                scheduling.check_slot(
+                    request.user.id, start, end, exclude_occurrence=(appointment.pk, original_start),
+                )
+            except ValidationError as e:
+                return JsonResponse({'error': ' '.join(e.messages)}, status=409)
+            AppointmentException.objects.update_or_create(
+                appointment=appointment, original_start=original_start,
+                defaults={'is_cancelled': False, 'start_time': start, 'end_time': end, 'notes': request.POST.get('notes', '')},
+            )
+        else:
+            return JsonResponse({'error': "action must be 'cancel' or 'move'."}, status=400)
+        # Exceptions change what the series shows without touching its row,
+        # so bump updated_at for sync clients and caches.
+        appointment.save(update_fields=['updated_at'])
+    return JsonResponse({'status': 'ok'})
+
+@login_required
+def availability_api(request):
+    """ Free slots in the tailor's calendar, e.g. ?start=2025-01-06&end=2025-01-10&slot=45. """
+    try:
+        options = scheduling.parse_availability_params(request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    slots = scheduling.free_slots(request.user.id, **options)
+    return JsonResponse({'slots': [{'start': start.isoformat(), 'end': end.isoformat()} for start, end in slots]})
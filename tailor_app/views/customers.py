@@ -0,0 +1,220 @@
+# tailor_app/views/customers.py
+
+""" Customers, their measurements, import/export and portal invites. """
+
+from datetime import date
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import render, get_object_or_404, redirect
+from django.contrib.auth.decorators import login_required
+from django.db import models
+from django.db.models import Q
+from django.contrib.auth.models import User
+from django.contrib import messages
+import io
+import random
+import string
+
+from .. import archive
+from ..importer import ImportFileError, import_csv
+from ..streaming import stream_template
+from ..tenant_export import export_lines
+from ..models import Customer, Measurement, CustomerSegment
+from ..forms import CustomerForm, MeasurementForm, CsvImportForm
+
+CUSTOMER_SORTS = {
+    'name': ('name',),
+    'value': (models.F('segment__lifetime_value').desc(nulls_last=True), 'name'),
+    'recent': (models.F('segment__recency_days').asc(nulls_last=True), 'name'),
+}
+
+@login_required
+def customer_list(request):
+    query = request.GET.get('q')
+    segment = request.GET.get('segment', '')
+    sort = request.GET.get('sort', 'name')
+    if sort not in CUSTOMER_SORTS:
+        sort = 'name'
+    if query:
+        customers = Customer.objects.filter(
+            Q(name__icontains=query) | Q(phone__icontains=query),
+            tailor=request.user
+        )
+    else:
+        customers = Customer.objects.filter(tailor=request.user)
+    if segment:
+        # Served by the (tailor, segment) index on the nightly segment table
+        customers = customers.filter(segment__tailor=request.user, segment__segment=segment)
+    customers = customers.select_related('segment').order_by(*CUSTOMER_SORTS[sort])
+    return stream_template(request, 'tailor_app/customer_list.html', {
+        'customers': customers,
+        'segment': segment,
+        'sort': sort,
+        'segment_choices': CustomerSegment.SEGMENT_CHOICES,
+    })
+
+@login_required
+def customer_detail(request, customer_id):
+    customer = get_object_or_404(Customer, pk=customer_id, tailor=request.user)
+    measurements = customer.measurements.current()  # latest reading per name
+    measurement_history = customer.measurements.history()
+    form = MeasurementForm()  # empty form for the modal
+
+    return render(request, 'tailor_app/customer_detail.html', {
+        'customer': customer,
+        'orders': archive.order_history(customer_id=customer.id),
+        'measurements': measurements,
+        'measurement_history': measurement_history,
+        'form': form,
+    })
+
+@login_required
+def add_customer(request):
+    if request.method == 'POST':
+        form = CustomerForm(request.POST)
+        if form.is_valid():
+            customer = form.save(commit=False)
+            customer.tailor = request.user
+            customer.save()
+            return redirect('tailor_app:customer_detail', customer_id=customer.id)
+    else:
+        form = CustomerForm()
+    return render(request, 'tailor_app/add_customer.html', {'form': form})
+
+@login_required
+def edit_customer(request, customer_id):
+    customer = get_object_or_404(Customer, pk=customer_id, tailor=request.user)
+    if request.method == 'POST':
+        form = CustomerForm(request.POST, instance=customer)
+        if form.is_valid():
+            form.save()
+            return redirect('tailor_app:customer_detail', customer_id=customer.id)
+    else:
+        form = CustomerForm(instance=customer)
+    return render(request, 'tailor_app/edit_customer.html', {'form': form, 'customer': customer})
+
+@login_required
+def invite_customer_to_portal(request, customer_id):
+    customer = get_object_or_404(Customer, pk=customer_id, tailor=request.user)
+    if not customer.client_account:
+        temp_password = ''.join(random.choices(string.ascii_letters + string.digits, k=10))
+        base_username = f"{customer.name.split(' ')[0].lower()}{customer.id}"
+        username = base_username
+        counter = 1
+        while User.objects.filter(username=username).exists():
+            username = f"{base_username}{counter}"
+            counter += 1
+
+        user = User.objects.create_user(username=username, password=temp_password, email=customer.email)
+        customer.client_account = user
+        customer.save()
+        messages.success(request, f"Client account created. Username: '{username}', Temp Pass: '{temp_password}'.")
+    else:
+        messages.info(request, "This customer already has a client portal account.")
+    return redirect('tailor_app:customer_detail', customer_id=customer.id)
+
+@login_required
+def import_data(request):
+    result = None
+    if request.method == 'POST':
+        form = CsvImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            # Read the upload as a text stream rather than loading it whole
+            stream = io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8-sig', newline='')
+            try:
+                result = import_csv(stream, request.user, form.cleaned_data['kind'])
+                messages.success(request, f"Imported {result.created} of {result.rows} rows.")
+            except ImportFileError as e:
+                result = e.result
+                form.add_error('file', f"{e} {result.created} rows were imported before that.")
+    else:
+        form = CsvImportForm()
+    return render(request, 'tailor_app/import_form.html', {'form': form, 'result': result})
+
+@login_required
+def export_data(request):
+    response = StreamingHttpResponse(export_lines(request.user), content_type='application/x-ndjson')
+    response['Content-Disposition'] = f'attachment; filename="export_{request.user.username}_{date.today():%Y%m%d}.jsonl"'
+    return response
+
+
+# --- Measurements ---
+
+@login_required
+def add_measurement(request, customer_id):
+    customer = get_object_or_404(Customer, pk=customer_id, tailor=request.user)
+    if request.method == 'POST':
+        form = MeasurementForm(request.POST)
+        if form.is_valid():
+            measurement = form.save(commit=False)
+            measurement.customer = customer
+            measurement.save()
+            return redirect('tailor_app:customer_detail', customer_id=customer_id)
+    else:
+        form = MeasurementForm()
+
+    return render(request, 'tailor_app/customer_detail.html', {
+        'customer': customer,
+        'form': form,
+    })
+
+@login_required
+def edit_measurement(request, measurement_id):
+    measurement = get_object_or_404(
+        Measurement, pk=measurement_id, customer__tailor=request.user
+    )
+    if request.method == 'POST':
+        form = MeasurementForm(request.POST, instance=measurement)
+        if form.is_valid():
+            # Save the edit as a new reading so the previous value stays in history
+            new_reading = form.save(commit=False)
+            new_reading.pk = None
+            new_reading._state.adding = True
+            new_reading.save()
+            return redirect('tailor_app:customer_detail', customer_id=measurement.customer_id)
+    else:
+        form = MeasurementForm(instance=measurement)
+    return render(request, 'tailor_app/measurement_form.html', {'form': form, 'measurement': measurement})
+
+@login_required
+def delete_measurement(request, measurement_id):
+    measurement = get_object_or_404(
+        Measurement, pk=measurement_id, customer__tailor=request.user
+    )
+    customer_id = measurement.customer.id  # store before deletion
+
+    if request.method == 'POST':
+        measurement.delete()
+        return redirect('tailor_app:customer_detail', customer_id=customer_id)
+
+    return render(request, 'tailor_app/confirm_delete.html', {'object': measurement})
+
+@login_required
+def fit_match_api(request):
+    """
+    Closest standard sizes and most similar customers for a set of
+    measurements, e.g. ?Chest=38&Waist=32&Inseam=31&k=5.
+    """
+    from .. import sizing  # NumPy is only needed here
+
+    params = request.GET.copy()
+    try:
+        k = max(1, min(int(params.pop('k', [sizing.DEFAULT_NEIGHBOURS])[0]), 50))
+        measurements = {name: float(value) for name, value in params.items()}
+    except ValueError:
+        return JsonResponse({'error': "k and measurement values must be numbers."}, status=400)
+    if not measurements:
+        return JsonResponse({'error': "Give at least one measurement, e.g. ?Chest=38."}, status=400)
+
+    matches = sizing.find_matches(request.user.id, measurements, k=k)
+    return JsonResponse({
+        'sizes': [
+            {'chart': m['size'].chart, 'label': m['size'].label,
+             'distance': round(m['distance'], 3), 'overlap': m['overlap']}
+            for m in matches['sizes']
+        ],
+        'customers': [
+            {'id': m['customer'].id, 'name': m['customer'].name, 'phone': m['customer'].phone,
+             'distance': round(m['distance'], 3), 'overlap': m['overlap']}
+            for m in matches['customers']
+        ],
+    })
@@ -0,0 +1,70 @@
+# tailor_app/views/inventory.py
+
+""" Inventory and suppliers. """
+
+from django.shortcuts import render, get_object_or_404, redirect
+from django.contrib.auth.decorators import login_required
+
+from ..models import Supplier, InventoryItem
+from ..streaming import stream_template
+from ..forms import SupplierForm, InventoryItemForm
+
+@login_required
+def inventory_list(request):
+    items = InventoryItem.objects.filter(tailor=request.user).select_related('supplier').order_by('name')
+    return stream_template(request, 'tailor_app/inventory_list.html', {'items': items})
+
+@login_required
+def add_inventory_item(request):
+    if request.method == 'POST':
+        form = InventoryItemForm(request.POST, user=request.user)
+        if form.is_valid():
+            item = form.save(commit=False)
+            item.tailor = request.user
+            item.save()
+            return redirect('tailor_app:inventory_list')
+    else:
+        form = InventoryItemForm(user=request.user)
+    return render(request, 'tailor_app/inventory_form.html', {'form': form})
+
+@login_required
+def edit_inventory_item(request, item_id):
+    item = get_object_or_404(InventoryItem, pk=item_id, tailor=request.user)
+    if request.method == 'POST':
+        form = InventoryItemForm(request.POST, instance=item, user=request.user)
+        if form.is_valid():
+            form.save()
+            return redirect('tailor_app:inventory_list')
+    else:
+        form = InventoryItemForm(instance=item, user=request.user)
+    return render(request, 'tailor_app/inventory_form.html', {'form': form, 'item': item})
+
+@login_required
+def supplier_list(request):
+    suppliers = Supplier.objects.filter(tailor=request.user).order_by('name')
+    return render(request, 'tailor_app/supplier_list.html', {'suppliers': suppliers})
+
+@login_required
+def add_supplier(request):
+    if request.method == 'POST':
+        form = SupplierForm(request.POST)
+        if form.is_valid():
+            supplier = form.save(commit=False)
+            supplier.tailor = request.user
+            supplier.save()
+            return redirect('tailor_app:supplier_list')
+    else:
+        form = SupplierForm()
+    return render(request, 'tailor_app/supplier_form.html', {'form': form})
+
+@login_required
+def edit_supplier(request, supplier_id):
+    supplier = get_object_or_404(Supplier, pk=supplier_id, tailor=request.user)
+    if request.method == 'POST':
+        form = SupplierForm(request.POST, instance=supplier)
+        if form.is_valid():
+            form.save()
+            return redirect('tailor_app:supplier_list')
+    else:
+        form = SupplierForm(instance=supplier)
+    return render(request, 'tailor_app/supplier_form.html', {'form': form, 'supplier': supplier})
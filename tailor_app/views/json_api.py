@@ -0,0 +1,122 @@
+# tailor_app/views/json_api.py
+
+""" Offline sync and the JSON API. """
+
+from django.http import JsonResponse, HttpResponse
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.db import transaction
+from django.utils.cache import get_conditional_response, set_response_etag
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_POST
+import json
+
+from ..cache import cache_stats
+from .. import api, sync
+
+@user_passes_test(lambda user: user.is_staff)
+def cache_stats_api(request):
+    return JsonResponse(cache_stats())
+
+
+# --- Offline sync ---
+
+@login_required
+def sync_pull(request):
+    try:
+        limit = int(request.GET.get('limit', sync.DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return JsonResponse({'error': "limit must be an integer."}, status=400)
+    limit = max(1, min(limit, sync.MAX_PAGE_SIZE))
+    try:
+        page = sync.pull(request.user, cursor=request.GET.get('cursor'), limit=limit)
+    except sync.InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse(page)
+
+@require_POST
+@login_required
+def sync_push(request):
+    try:
+        changes = json.loads(request.body).get('changes')
+    except (ValueError, AttributeError):
+        return JsonResponse({'error': "Body must be a JSON object."}, status=400)
+    if not isinstance(changes, list) or len(changes) > sync.MAX_PUSH_BATCH:
+        return JsonResponse({'error': f"'changes' must be a list of at most {sync.MAX_PUSH_BATCH} items."}, status=400)
+    return JsonResponse({'results': sync.push(request.user, changes)})
+
+
+# --- JSON API (v1) ---
+
+def _api_response(request, payload, status=200):
+    response = JsonResponse(payload, status=status, safe=False)
+    if request.method == 'GET':
+        set_response_etag(response)
+        return get_conditional_response(request, etag=response['ETag'], response=response)
+    return response
+
+def _api_check_if_match(request, resource, obj):
+    if_match = request.META.get('HTTP_IF_MATCH')
+    if not if_match:
+        return
+    current = JsonResponse(resource.representation(obj))
+    set_response_etag(current)
+    # Compressed GETs send the ETag weakened (W/"..."); the representation is
+    # the same, so compare the opaque tags.
+    etags = {etag.removeprefix('W/') for etag in parse_etags(if_match)}
+    if '*' not in etags and current['ETag'].removeprefix('W/') not in etags:
+        raise api.ApiError("The resource has changed since it was fetched.", status=412)
+
+def _api_body(request):
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        raise api.ApiError("Body must be valid JSON.")
+    if not isinstance(data, dict):
+        raise api.ApiError("Body must be a JSON object.")
+    return data
+
+@login_required
+def api_resource_list(request, resource):
+    try:
+        res = api.RESOURCES.get(resource)
+        if res is None:
+            raise api.ApiError("Unknown resource.", status=404)
+        if request.method == 'GET':
+            return _api_response(request, res.list(request.user, request.GET))
+        if request.method == 'POST':
+            with transaction.atomic():
+                obj, errors = res.spec.create(request.user, _api_body(request))
+            if errors:
+                return JsonResponse({'errors': errors}, status=400)
+            return _api_response(request, res.representation(obj), status=201)
+        raise api.ApiError("Method not allowed.", status=405)
+    except api.ApiError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+
+@login_required
+def api_resource_detail(request, resource, pk):
+    try:
+        res = api.RESOURCES.get(resource)
+        if res is None:
+            raise api.ApiError("Unknown resource.", status=404)
+        if request.method == 'GET':
+            return _api_response(request, res.detail(request.user, pk, request.GET))
+        if request.method == 'PATCH':
+            with transaction.atomic():
+                obj = res.get_for_update(request.user, pk)
+                _api_check_if_match(request, res, obj)
+                obj, errors = res.spec.update(request.user, obj, _api_body(request))
+            if errors:
+                return JsonResponse({'errors': errors}, status=400)
+            return _api_response(request, res.representation(obj))
+        if request.method == 'DELETE':
+            if not res.spec.deletable:
+                raise api.ApiError("This resource can't be deleted.", status=405)
+            with transaction.atomic():
+                obj = res.get_for_update(request.user, pk)
+                _api_check_if_match(request, res, obj)
+                obj.delete()
+            return HttpResponse(status=204)
+        raise api.ApiError("Method not allowed.", status=405)
+    except api.ApiError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
@@ -0,0 +1,126 @@
+# tailor_app/views/orders.py
+
+""" Orders, invoices and payments. """
+
+from django.http import Http404, HttpResponse
+from django.shortcuts import render, get_object_or_404, redirect
+from django.contrib.auth.decorators import login_required
+from django.template.loader import render_to_string
+from django.contrib import messages
+from django.views.decorators.http import require_POST
+
+from the_digital_thread.instrumentation import timed
+
+from .. import archive, payments
+from ..models import Customer, Order, Payment
+from ..forms import OrderForm, OrderImageForm, OrderMaterialFormSet, PaymentForm, ApplyWorkflowForm
+
+@login_required
+def add_order(request, customer_id):
+    customer = get_object_or_404(Customer, pk=customer_id, tailor=request.user)
+    if request.method == 'POST':
+        form = OrderForm(request.POST)
+        if form.is_valid():
+            order = form.save(commit=False)
+            order.customer = customer
+            order.save()
+            return redirect('tailor_app:order_detail', order_id=order.id)
+    else:
+        form = OrderForm()
+    return render(request, 'tailor_app/add_order.html', {'form': form, 'customer': customer})
+
+@login_required
+def edit_order(request, order_id):
+    order = get_object_or_404(Order, pk=order_id, customer__tailor=request.user)
+    
+    if request.method == 'POST':
+        form = OrderForm(request.POST, instance=order)
+        material_formset = OrderMaterialFormSet(request.POST, instance=order, prefix='materials')
+        
+        if form.is_valid() and material_formset.is_valid():
+            form.save()
+            material_formset.save()
+            return redirect('tailor_app:order_detail', order_id=order.id)
+    else:
+        form = OrderForm(instance=order)
+        material_formset = OrderMaterialFormSet(instance=order, prefix='materials')
+        
+    context = {
+        'form': form,
+        'material_formset': material_formset,
+        'order': order
+    }
+    return render(request, 'tailor_app/edit_order.html', context)
+
+@login_required
+def order_detail(request, order_id):
+    order = archive.find_order(order_id, customer__tailor=request.user)
+    if order is None:
+        raise Http404("No order with that id.")
+    if getattr(order, 'is_archived', False):
+        return render(request, 'tailor_app/archived_order_detail.html', {
+            'order': order,
+            'payments': order.payments.all(),
+        })
+    image_form = OrderImageForm()
+    
+    if request.method == 'POST':
+        # This handles the image upload form submission
+        image_form = OrderImageForm(request.POST, request.FILES)
+        if image_form.is_valid():
+            order_image = image_form.save(commit=False)
+            order_image.order = order
+            order_image.save()
+            messages.success(request, "Image uploaded successfully.")
+            return redirect('tailor_app:order_detail', order_id=order.id)
+
+    apply_workflow_form = ApplyWorkflowForm(user=request.user)
+    
+    context = {
+        'order': order,
+        'image_form': image_form,
+        'apply_workflow_form': apply_workflow_form,
+        'payments': order.payments.all(),
+        'payment_form': PaymentForm(initial={'amount': order.balance_due if order.balance_due > 0 else None}),
+    }
+    return render(request, 'tailor_app/order_detail.html', context)
+
+@login_required
+def generate_pdf_invoice(request, order_id):
+    order = get_object_or_404(Order, pk=order_id, customer__tailor=request.user)
+    html_string = render_to_string('tailor_app/invoice_template.html', {'order': order})
+    
+    # WeasyPrint pulls in Pango and cairo; only load it when an invoice is asked for
+    from weasyprint import HTML
+
+    with timed('pdf'):
+        pdf_file = HTML(string=html_string).write_pdf()
+    
+    response = HttpResponse(pdf_file, content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="invoice_{order.id}.pdf"'
+    return response
+
+
+# --- Payments ---
+
+@require_POST
+@login_required
+def add_payment(request, order_id):
+    order = get_object_or_404(Order.objects.select_related('customer'), pk=order_id, customer__tailor=request.user)
+    form = PaymentForm(request.POST)
+    if form.is_valid():
+        payments.record_payment(order, **form.cleaned_data)
+        messages.success(request, f"Payment of ₹{form.cleaned_data['amount']:.2f} recorded.")
+    else:
+        for errors in form.errors.values():
+            for error in errors:
+                messages.error(request, error)
+    return redirect('tailor_app:order_detail', order_id=order.id)
+
+@require_POST
+@login_required
+def void_payment(request, payment_id):
+    payment = get_object_or_404(Payment, pk=payment_id, tailor=request.user)
+    if payments.void_payment(payment):
+        messages.success(request, "Payment removed.")
+    return redirect('tailor_app:order_detail', order_id=payment.order_id)
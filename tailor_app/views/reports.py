@@ -0,0 +1,181 @@
+# tailor_app/views/reports.py
+
+""" Dashboard and reports. """
+
+from datetime import datetime, time, timedelta, date
+from django.shortcuts import render
+from django.contrib.auth.decorators import login_required
+from django.utils import timezone
+from django.db import models
+from django.db.models import Sum, F
+from django.contrib import messages
+
+from ..cache import ORDERS_SCOPE, cached_query
+from .. import archive, payments, production
+from ..streaming import stream_template
+from ..models import Customer, Order, Appointment, InventoryItem, TaskCycleSummary, OrderQuerySet
+
+AT_RISK_SHOWN = 8
+CASH_FLOW_DAYS = 30
+
+@login_required
+def dashboard(request):
+    customers = Customer.objects.filter(tailor=request.user)
+    orders = Order.objects.filter(customer__tailor=request.user)
+    
+    total_customers = cached_query(request.user.id, 'customer_count', customers.count)
+    pending_orders_count = orders.filter(status='Pending').count()
+    completed_orders_this_month = orders.filter(
+        status='Completed',
+        updated_at__year=timezone.now().year,
+        updated_at__month=timezone.now().month
+    ).count()
+
+    outstanding_revenue = orders.exclude(status__in=['Completed', 'Cancelled']).aggregate(
+        total_balance=Sum(F('price') - F('amount_paid'))
+    )['total_balance'] or 0.00
+
+    pending_requests = Appointment.objects.filter(
+        tailor=request.user, 
+        status='Requested'
+    ).order_by('start_time')
+
+    low_stock_items = cached_query(request.user.id, 'low_stock_items', lambda: list(
+        InventoryItem.objects.filter(
+            tailor=request.user,
+            quantity_in_stock__lte=models.F('reorder_level')
+        ).order_by('quantity_in_stock')
+    ))
+    
+    # --- ROBUST 6-MONTH CHART LOGIC ---
+    revenue_data_list = []
+    today = date.today()
+    for i in range(6):
+        month = today.month - i
+        year = today.year
+        if month <= 0:
+            month += 12
+            year -= 1
+
+        monthly_revenue = orders.filter(
+            status='Completed',
+            updated_at__year=year,
+            updated_at__month=month
+        ).aggregate(total_revenue=Sum('price'))['total_revenue'] or 0
+
+        month_name = date(year, month, 1).strftime('%B')
+        revenue_data_list.append({'month': month_name, 'revenue': float(monthly_revenue)})
+
+    revenue_data_list.reverse()
+    revenue_data_keys = [item['month'] for item in revenue_data_list]
+    revenue_data_values = [item['revenue'] for item in revenue_data_list]
+
+    at_risk_orders = production.at_risk_orders(request.user.id)
+    month_start = timezone.make_aware(datetime.combine(today.replace(day=1), time.min))
+    collected_this_month = payments.collected(request.user.id, month_start, timezone.now())
+    profit_summary = cached_query(
+        request.user.id, 'profit_summary', lambda: profit_summary_for_month(request.user, today),
+        today.year, today.month, scope=ORDERS_SCOPE,
+    )
+
+    context = {
+        'at_risk_orders': at_risk_orders[:AT_RISK_SHOWN],
+        'at_risk_count': len(at_risk_orders),
+        'profit_summary': profit_summary,
+        'total_customers': total_customers,
+        'pending_orders': pending_orders_count,
+        'completed_orders_this_month': completed_orders_this_month,
+        'outstanding_revenue': outstanding_revenue,
+        'collected_this_month': collected_this_month,
+        'pending_requests': pending_requests,
+        'low_stock_items': low_stock_items,
+        'revenue_data_keys': revenue_data_keys,
+        'revenue_data_values': revenue_data_values,
+    }
+    return render(request, 'tailor_app/dashboard.html', context)
+
+def margin_percent(totals):
+    return float(totals['total_margin'] / totals['revenue'] * 100) if totals['revenue'] else None
+
+def profit_summary_for_month(tailor, today):
+    """ Revenue, material cost and margin of the orders created in today's month, for the dashboard. """
+    totals = Order.objects.filter(
+        customer__tailor=tailor, created_at__year=today.year, created_at__month=today.month,
+    ).exclude(status='Cancelled').profit_totals()
+    totals['margin_percent'] = margin_percent(totals)
+    return totals
+
+@login_required
+def reports_view(request):
+    # Hot and archived orders in one UNION query
+    orders = archive.order_history(customer__tailor_id=request.user.id)
+    context = {
+        'orders': orders,
+    }
+    return stream_template(request, 'tailor_app/reports.html', context)
+
+@login_required
+def profitability_report(request):
+    grouping = request.GET.get('by', 'customer')
+    if grouping not in OrderQuerySet.PROFIT_GROUPINGS:
+        grouping = 'customer'
+    orders = Order.objects.filter(customer__tailor=request.user).exclude(status='Cancelled')
+    rows = list(orders.profit_by(grouping).order_by('-total_margin'))
+    for row in rows:
+        row['margin_percent'] = margin_percent(row)
+    totals = orders.profit_totals()
+    totals['margin_percent'] = margin_percent(totals)
+    return render(request, 'tailor_app/profitability_report.html', {
+        'rows': rows,
+        'totals': totals,
+        'grouping': grouping,
+        'groupings': [('customer', 'Customer'), ('item', 'Item'), ('month', 'Month')],
+    })
+
+@login_required
+def cash_flow_report(request):
+    period = request.GET.get('by', 'day')
+    if period not in payments.PERIODS:
+        period = 'day'
+    today = timezone.localdate()
+    try:
+        first_day = date.fromisoformat(request.GET['start']) if request.GET.get('start') else (
+            today - timedelta(days=CASH_FLOW_DAYS - 1) if period == 'day' else today.replace(month=1, day=1)
+        )
+        last_day = date.fromisoformat(request.GET['end']) if request.GET.get('end') else today
+    except ValueError:
+        messages.error(request, "Dates must look like 2025-01-31.")
+        first_day, last_day = today - timedelta(days=CASH_FLOW_DAYS - 1), today
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(first_day, time.min), tz)
+    end = timezone.make_aware(datetime.combine(last_day + timedelta(days=1), time.min), tz)
+
+    rows = list(payments.cash_flow(request.user.id, start, end, period))
+    return render(request, 'tailor_app/cash_flow_report.html', {
+        'rows': rows,
+        'period': period,
+        'first_day': first_day,
+        'last_day': last_day,
+        'total': sum(row['total'] for row in rows),
+        'by_method': payments.collections_by_method(request.user.id, start, end),
+        'receivables': payments.receivables(request.user.id),
+    })
+
+@login_required
+def task_analytics(request):
+    """ Cycle times per workflow from the nightly TaskCycleSummary rows. """
+    summaries = TaskCycleSummary.objects.filter(tailor=request.user).select_related(
+        'template', 'task_definition'
+    ).order_by('template__name', 'template_id', 'task_definition__order', 'task_definition_id')
+    workflows = {}
+    for summary in summaries:
+        workflow = workflows.setdefault(summary.template_id, {'template': summary.template, 'overall': None, 'tasks': []})
+        if summary.task_definition_id is None:
+            workflow['overall'] = summary
+        else:
+            workflow['tasks'].append(summary)
+    computed_at = max((summary.computed_at for summary in summaries), default=None)
+    return render(request, 'tailor_app/task_analytics.html', {
+        'workflows': list(workflows.values()),
+        'computed_at': computed_at,
+    })
@@ -0,0 +1,87 @@
+# tailor_app/views/workflows.py
+
+""" Workflow templates, order tasks and the production board. """
+
+from django.shortcuts import render, get_object_or_404, redirect
+from django.contrib.auth.decorators import login_required
+from django.utils import timezone
+from django.contrib import messages
+
+from .. import production
+from ..models import Order, WorkflowTemplate, OrderTask
+from ..forms import WorkflowTemplateForm, TaskDefinitionFormSet, ApplyWorkflowForm
+
+BOARD_ORDERS_SHOWN = 25
+
+@login_required
+def workflow_template_list(request):
+    templates = WorkflowTemplate.objects.filter(tailor=request.user)
+    return render(request, 'tailor_app/workflow_template_list.html', {'templates': templates})
+
+@login_required
+def create_workflow_template(request):
+    if request.method == 'POST':
+        form = WorkflowTemplateForm(request.POST)
+        template = WorkflowTemplate(tailor=request.user) # Create instance but don't save yet
+        formset = TaskDefinitionFormSet(request.POST, instance=template)
+        if form.is_valid() and formset.is_valid():
+            template = form.save(commit=False)
+            template.tailor = request.user
+            template.save()
+            formset.instance = template
+            formset.save()
+            messages.success(request, "Workflow template created successfully.")
+            return redirect('tailor_app:workflow_list')
+    else:
+        form = WorkflowTemplateForm()
+        formset = TaskDefinitionFormSet()
+    return render(request, 'tailor_app/workflow_template_form.html', {'form': form, 'formset': formset})
+
+@login_required
+def edit_workflow_template(request, template_id):
+    template = get_object_or_404(WorkflowTemplate, pk=template_id, tailor=request.user)
+    if request.method == 'POST':
+        form = WorkflowTemplateForm(request.POST, instance=template)
+        formset = TaskDefinitionFormSet(request.POST, instance=template)
+        if form.is_valid() and formset.is_valid():
+            form.save()
+            formset.save()
+            messages.success(request, "Workflow template updated successfully.")
+            return redirect('tailor_app:workflow_list')
+    else:
+        form = WorkflowTemplateForm(instance=template)
+        formset = TaskDefinitionFormSet(instance=template)
+    return render(request, 'tailor_app/workflow_template_form.html', {'form': form, 'formset': formset, 'template': template})
+
+@login_required
+def apply_workflow_to_order(request, order_id):
+    order = get_object_or_404(Order, pk=order_id, customer__tailor=request.user)
+    if request.method == 'POST':
+        form = ApplyWorkflowForm(request.POST, user=request.user)
+        if form.is_valid():
+            template = form.cleaned_data['template']
+            for task_def in template.tasks.all():
+                OrderTask.objects.create(order=order, task_definition=task_def)
+            messages.success(request, f"Workflow '{template.name}' applied to the order.")
+    return redirect('tailor_app:order_detail', order_id=order.id)
+
+@login_required
+def update_order_task_status(request, task_id):
+    task = get_object_or_404(OrderTask, pk=task_id, order__customer__tailor=request.user)
+    if request.method == 'POST':
+        is_completed = request.POST.get('is_completed') == 'on'
+        task.is_completed = is_completed
+        task.completed_at = timezone.now() if is_completed else None
+        task.save()
+    return redirect('tailor_app:order_detail', order_id=task.order.id)
+
+@login_required
+def production_board(request):
+    board = production.production_board(request.user.id)
+    for column in board:
+        column['hidden'] = max(0, column['count'] - BOARD_ORDERS_SHOWN)
+        column['orders'] = column['orders'][:BOARD_ORDERS_SHOWN]
+    return render(request, 'tailor_app/production_board.html', {
+        'board': board,
+        'orders_in_progress': sum(column['count'] for column in board),
+    })
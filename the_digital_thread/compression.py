@@ -0,0 +1,109 @@
+# the_digital_thread/compression.py
+
+"""
+Response compression for HTML and JSON.
+
+``CompressionMiddleware`` encodes text responses of at least
+COMPRESS_MIN_BYTES with Brotli (when the ``brotli`` package is installed and
+the client accepts it) or gzip. Smaller bodies, other content types and
+responses that already carry a Content-Encoding (precompressed static files)
+pass through untouched.
+
+Streaming responses are compressed chunk by chunk with a flush after each
+one, so a page streamed by tailor_app/streaming.py still reaches the browser
+head first. Like Django's GZipMiddleware, gzip output carries a random-length
+filename against BREACH; Brotli has no such field and relies on the per-response
+CSRF token masking.
+"""
+
+import secrets
+from gzip import GzipFile
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+from django.utils.text import StreamingBuffer, compress_string
+
+from .staticfiles import _accepted, brotli
+
+COMPRESSIBLE_TYPES = ('text/html', 'application/json', 'text/plain', 'text/csv')
+BROTLI_QUALITY = 5
+GZIP_MAX_RANDOM_BYTES = 100
+
+
+def gzip_sequence(sequence):
+    """ gzip-encode an iterable of byte strings, flushing after each one. """
+    buf = StreamingBuffer()
+    filename = b'a' * secrets.randbelow(GZIP_MAX_RANDOM_BYTES)
+    with GzipFile(filename=filename, mode='wb', compresslevel=6, fileobj=buf, mtime=0) as zfile:
+        for item in sequence:
+            zfile.write(item)
+            zfile.flush()
+            yield buf.read()
+    yield buf.read()
+
+
+def brotli_sequence(sequence):
+    """ Brotli-encode an iterable of byte strings, flushing after each one. """
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for item in sequence:
+        data = compressor.process(item) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Compress HTML/JSON responses; see the module docstring. Put it after
+    StaticFilesMiddleware so it wraps everything the views return.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_bytes = settings.COMPRESS_MIN_BYTES
+        if self.min_bytes <= 0:
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in COMPRESSIBLE_TYPES or response.has_header('Content-Encoding'):
+            return response
+        if response.streaming and response.is_async:
+            return response
+        if not response.streaming and len(response.content) < self.min_bytes:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accepted = _accepted(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and 'br' in accepted:
+            encoding = 'br'
+        elif 'gzip' in accepted:
+            encoding = 'gzip'
+        else:
+            return response
+
+        if response.streaming:
+            response.streaming_content = (
+                brotli_sequence(response.streaming_content) if encoding == 'br'
+                else gzip_sequence(response.streaming_content)
+            )
+            del response.headers['Content-Length']
+        else:
+            content = (
+                brotli.compress(response.content, quality=BROTLI_QUALITY) if encoding == 'br'
+                else compress_string(response.content, max_random_bytes=GZIP_MAX_RANDOM_BYTES)
+            )
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response.headers['Content-Length'] = str(len(content))
+
+        # A compressed body is a different representation, so a strong ETag
+        # has to become weak (RFC 9110 section 8.8.1).
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,79 @@
+# the_digital_thread/database.py
+
+"""
+Database configuration built from environment variables.
+
+Settings call ``database_settings(env, BASE_DIR)`` instead of hardcoding the
+DATABASES dict. The connection comes from ``DATABASE_URL`` and defaults to the
+local ``db.sqlite3`` file, so a plain checkout still works with no .env.
+
+SQLite connections are opened in WAL mode with IMMEDIATE transactions and a
+busy timeout, which is what stops concurrent writers from failing straight away
+with "database is locked". PostgreSQL connections are either persistent
+(CONN_MAX_AGE + health checks) or pooled through psycopg's connection pool.
+"""
+
+SQLITE_ENGINE = 'django.db.backends.sqlite3'
+POSTGRES_ENGINES = (
+    'django.db.backends.postgresql',
+    'django.db.backends.postgis',
+)
+
+
+def sqlite_init_command(env):
+    """ PRAGMA statements run on every new SQLite connection. """
+    pragmas = [
+        'journal_mode=WAL',
+        f"synchronous={env('SQLITE_SYNCHRONOUS', default='NORMAL')}",
+        f"busy_timeout={env.int('SQLITE_BUSY_TIMEOUT_MS', default=20000)}",
+        f"cache_size={env.int('SQLITE_CACHE_SIZE_KB', default=-64000)}",
+        f"mmap_size={env.int('SQLITE_MMAP_SIZE', default=134217728)}",
+        'temp_store=MEMORY',
+    ]
+    return ''.join(f'PRAGMA {pragma};' for pragma in pragmas)
+
+
+def _tune_sqlite(config, env):
+    options = config.setdefault('OPTIONS', {})
+    options.setdefault('init_command', sqlite_init_command(env))
+    # Take the write lock at BEGIN so writers queue on busy_timeout instead of
+    # failing when a read transaction tries to upgrade to a write.
+    options.setdefault('transaction_mode', 'IMMEDIATE')
+    # Python-level timeout (seconds) for acquiring the lock.
+    options.setdefault('timeout', env.int('SQLITE_BUSY_TIMEOUT_MS', default=20000) / 1000)
+    # SQLite connections are cheap, but keeping them avoids re-running the
+    # pragmas on every request.
+    config['CONN_MAX_AGE'] = env.int('CONN_MAX_AGE', default=600)
+    config['CONN_HEALTH_CHECKS'] = env.bool('CONN_HEALTH_CHECKS', default=True)
+
+
+def _tune_postgres(config, env):
+    options = config.setdefault('OPTIONS', {})
+    if env.bool('DB_POOL', default=False):
+        # Django's built-in psycopg pool (psycopg[pool]). Pooling and
+        # persistent connections are mutually exclusive.
+        options['pool'] = {
+            'min_size': env.int('DB_POOL_MIN_SIZE', default=2),
+            'max_size': env.int('DB_POOL_MAX_SIZE', default=10),
+            'timeout': env.int('DB_POOL_TIMEOUT', default=10),
+        }
+        config['CONN_MAX_AGE'] = 0
+    else:
+        config['CONN_MAX_AGE'] = env.int('CONN_MAX_AGE', default=600)
+    config['CONN_HEALTH_CHECKS'] = env.bool('CONN_HEALTH_CHECKS', default=True)
+    options.setdefault('connect_timeout', env.int('DB_CONNECT_TIMEOUT', default=5))
+    statement_timeout = env.int('DB_STATEMENT_TIMEOUT_MS', default=0)
+    if statement_timeout:
+        options.setdefault('options', f'-c statement_timeout={statement_timeout}')
+
+
+def database_settings(env, base_dir):
+    """ Return the DATABASES setting for the current environment. """
+    default = env.db('DATABASE_URL', default=f"sqlite:///{base_dir / 'db.sqlite3'}")
+
+    if default['ENGINE'] == SQLITE_ENGINE:
+        _tune_sqlite(default, env)
+    elif default['ENGINE'] in POSTGRES_ENGINES:
+        _tune_postgres(default, env)
+
+    return {'default': default}
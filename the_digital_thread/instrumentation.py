@@ -0,0 +1,303 @@
+# the_digital_thread/instrumentation.py
+
+"""
+Per-request performance instrumentation.
+
+With INSTRUMENTATION_ENABLED, ``InstrumentationMiddleware`` times every
+request and breaks it down into:
+
+* db   - number of SQL queries and time spent executing them (a connection
+         execute_wrapper, so every backend and alias is covered)
+* tpl  - template rendering (the outermost Template.render of each render;
+         includes and extends are inside it)
+* pdf  - anything wrapped in ``timed('pdf')``, i.e. WeasyPrint
+* total - the view and every middleware after this one; for a streamed
+          page, until its last chunk has been sent
+
+Each response gets a ``Server-Timing`` header with those numbers, so they
+show up in the browser's network panel. They are also added to per-route
+histograms held in this process and served at ``/metrics`` in Prometheus
+text format, to staff users or to a scraper sending
+``Authorization: Bearer <METRICS_TOKEN>``. Each worker process keeps its own
+histograms; scrape every worker, or sum them in Prometheus.
+
+Routes are labelled by URL pattern (``orders/<int:pk>/``), never by the
+actual path, so the number of series stays fixed. Unresolved paths share
+the ``unmatched`` label, and methods outside HTTP_METHODS the ``other`` label.
+
+With INSTRUMENTATION_ENABLED off (the default) the middleware removes itself
+at startup, Template.render is left alone and /metrics isn't routed, so
+there is no cost at all. ``timed()`` outside an instrumented request is a
+context-variable lookup.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed, PermissionDenied
+from django.db import connections
+from django.http import HttpResponse
+from django.template.base import Template
+from django.utils.crypto import constant_time_compare
+
+# Upper bounds in seconds, Prometheus-style (a final +Inf is implied).
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+UNMATCHED_ROUTE = 'unmatched'
+HTTP_METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'TRACE', 'CONNECT'})
+OTHER_METHOD = 'other'
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    __slots__ = ('queries', 'db', 'template', 'template_depth', 'spans')
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.template = 0.0
+        self.template_depth = 0
+        self.spans = {}
+
+
+@contextmanager
+def timed(name):
+    """ Add the time spent in the block to the current request's ``name`` span. """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.spans[name] = timings.spans.get(name, 0.0) + time.perf_counter() - start
+
+
+def _time_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db += time.perf_counter() - start
+        timings.queries += 1
+
+
+_original_render = Template.render
+
+
+def _timed_render(self, context):
+    timings = _current.get()
+    if timings is None:
+        return _original_render(self, context)
+    timings.template_depth += 1
+    start = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        timings.template_depth -= 1
+        if not timings.template_depth:
+            timings.template += time.perf_counter() - start
+
+
+# --- Histograms ---
+
+class Histogram:
+    """ Cumulative-bucket histogram with Prometheus semantics. """
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+METRICS = (
+    # name, help, buckets
+    ('http_request_duration_seconds', 'Total time to produce the response.', DURATION_BUCKETS),
+    ('http_request_db_seconds', 'Time spent executing SQL.', DURATION_BUCKETS),
+    ('http_request_db_queries', 'SQL queries executed.', QUERY_COUNT_BUCKETS),
+    ('http_request_template_seconds', 'Time spent rendering templates.', DURATION_BUCKETS),
+)
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}   # (metric, route, method) -> Histogram
+        self.responses = {}    # (route, method, status) -> count
+        self.spans = {}        # (span, route, method) -> Histogram
+
+    def record(self, route, method, status, total, timings):
+        values = (total, timings.db, timings.queries, timings.template)
+        with self.lock:
+            for (name, _, buckets), value in zip(METRICS, values):
+                key = (name, route, method)
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = Histogram(buckets)
+                histogram.observe(value)
+            for span, value in timings.spans.items():
+                key = (span, route, method)
+                histogram = self.spans.get(key)
+                if histogram is None:
+                    histogram = self.spans[key] = Histogram(DURATION_BUCKETS)
+                histogram.observe(value)
+            key = (route, method, status)
+            self.responses[key] = self.responses.get(key, 0) + 1
+
+    def exposition(self):
+        """ Everything recorded so far in Prometheus text format. """
+        with self.lock:
+            histograms = {key: (list(h.counts), h.sum, h.count, h.bounds) for key, h in self.histograms.items()}
+            spans = {key: (list(h.counts), h.sum, h.count, h.bounds) for key, h in self.spans.items()}
+            responses = dict(self.responses)
+
+        lines = [
+            '# HELP http_requests_total Responses by route, method and status.',
+            '# TYPE http_requests_total counter',
+        ]
+        for (route, method, status), count in sorted(responses.items()):
+            lines.append(f'http_requests_total{{{_labels(route=route, method=method, status=status)}}} {count}')
+
+        for name, help_text, _ in METRICS:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+            for (metric, route, method), values in sorted(histograms.items()):
+                if metric == name:
+                    lines += _histogram_lines(name, _labels(route=route, method=method), *values)
+
+        if spans:
+            name = 'http_request_span_seconds'
+            lines += [f'# HELP {name} Time spent in named spans such as PDF rendering.', f'# TYPE {name} histogram']
+            for (span, route, method), values in sorted(spans.items()):
+                lines += _histogram_lines(name, _labels(span=span, route=route, method=method), *values)
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(**labels):
+    return ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for key, value in labels.items()
+    )
+
+
+def _histogram_lines(name, labels, counts, total, count, bounds):
+    lines, cumulative = [], 0
+    for bound, bucket in zip(bounds + (float('inf'),), counts):
+        cumulative += bucket
+        le = '+Inf' if bound == float('inf') else repr(float(bound))
+        lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+    lines.append(f'{name}_sum{{{labels}}} {total:.6f}')
+    lines.append(f'{name}_count{{{labels}}} {count}')
+    return lines
+
+
+registry = Registry()
+
+
+# --- Middleware and endpoint ---
+
+def _server_timing(total, timings):
+    entries = [
+        f'db;dur={timings.db * 1000:.1f};desc="{timings.queries} queries"',
+        f'tpl;dur={timings.template * 1000:.1f}',
+    ]
+    entries += [f'{name};dur={value * 1000:.1f}' for name, value in timings.spans.items()]
+    entries.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(entries)
+
+
+def stream_within(response, enter, finish):
+    """
+    Run each step of a streaming response's content inside ``enter()`` and
+    call ``finish()`` once it has been consumed or closed, so a middleware
+    also sees the rows a streamed page renders after the view has returned.
+    """
+    content = response.streaming_content
+
+    def steps():
+        iterator = iter(content)
+        try:
+            while True:
+                with enter():
+                    chunk = next(iterator, None)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            finish()
+
+    response.streaming_content = steps()
+
+
+@contextmanager
+def _instrumented(timings):
+    token = _current.set(timings)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(_time_query))
+            yield
+    finally:
+        _current.reset(token)
+
+
+class InstrumentationMiddleware:
+    """
+    Time each request and add it to the histograms; see the module docstring.
+    Should come first in MIDDLEWARE so ``total`` covers the rest of the stack.
+    A streamed response is recorded once its last chunk has been sent, and
+    gets no Server-Timing header since its headers go out first.
+    """
+
+    def __init__(self, get_response):
+        if not settings.INSTRUMENTATION_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        Template.render = _timed_render
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        start = time.perf_counter()
+        with _instrumented(timings):
+            response = self.get_response(request)
+
+        def finish():
+            total = time.perf_counter() - start
+            match = request.resolver_match
+            route = match.route if match is not None else UNMATCHED_ROUTE
+            # Clients can send any method name; don't let them create series.
+            method = request.method if request.method in HTTP_METHODS else OTHER_METHOD
+            registry.record(route, method, response.status_code, total, timings)
+            return total
+
+        if response.streaming and not response.is_async:
+            stream_within(response, lambda: _instrumented(timings), finish)
+        else:
+            response['Server-Timing'] = _server_timing(finish(), timings)
+        return response
+
+
+def metrics_view(request):
+    """ Prometheus scrape endpoint; staff users or the METRICS_TOKEN bearer only. """
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    authorized = bool(token) and constant_time_compare(header, f'Bearer {token}')
+    if not authorized and not request.user.is_staff:
+        raise PermissionDenied
+    return HttpResponse(registry.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,369 @@
+# the_digital_thread/loadtest.py
+
+"""
+Concurrent load generation against the WSGI application.
+
+``manage.py load_test`` seeds throwaway tailors (with customers, orders and
+workflow tasks) and portal customers, serves
+``the_digital_thread.wsgi.application`` from a multithreaded server in a
+child process, and drives it over HTTP from one thread per simulated user.
+Every user logs in through the real login form, then picks weighted actions
+with a think time between them until the run ends. Latency, throughput and
+errors are reported per scenario and per action.
+
+The scenario file is JSON:
+
+    {
+        "duration": 60,               seconds of traffic after ramp-up starts
+        "ramp_up": 10,                users start evenly over this many seconds
+        "tailors": 4,                 seeded tailors
+        "customers_per_tailor": 25,
+        "orders_per_customer": 2,
+        "portal_users_per_tailor": 5, customers of each tailor given a login
+        "scenarios": [
+            {
+                "name": "workshop",
+                "role": "tailor",     or "customer"
+                "users": 8,
+                "think_time": [0.2, 1.0],
+                "actions": {"dashboard": 5, "edit_order": 1, "toggle_task": 3}
+            }
+        ]
+    }
+
+Action names are the keys of TAILOR_ACTIONS and CUSTOMER_ACTIONS. Seeded
+accounts are named ``loadtest-...`` and deleted afterwards. Point
+DATABASE_URL at a scratch copy of the database; the run writes to it. The
+local server is addressed as 127.0.0.1, which ALLOWED_HOSTS must accept.
+"""
+
+import json
+import multiprocessing
+import random
+import socketserver
+import threading
+import time
+import uuid
+from datetime import timedelta
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import HTTPCookieProcessor, HTTPRedirectHandler, Request, build_opener
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connections
+from django.utils import timezone
+
+PASSWORD = 'loadtest-password'
+USERNAME_PREFIX = 'loadtest-'
+REQUEST_TIMEOUT = 60
+DEFAULTS = {
+    'duration': 60,
+    'ramp_up': 10,
+    'tailors': 4,
+    'customers_per_tailor': 25,
+    'orders_per_customer': 2,
+    'portal_users_per_tailor': 5,
+}
+TASK_NAMES = ('Cut Fabric', 'Stitch', 'First Fitting', 'Finishing')
+
+
+class ScenarioError(ValueError):
+    pass
+
+
+# --- Server ---
+
+class _ThreadingWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def _serve(port_queue):
+    from the_digital_thread.wsgi import application
+
+    server = make_server('127.0.0.1', 0, application, server_class=_ThreadingWSGIServer, handler_class=_QuietHandler)
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+def start_server():
+    """ Serve the WSGI application in a child process. Returns (process, base url). """
+    # The child must open its own connections, not share ours.
+    connections.close_all()
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(port_queue,), daemon=True)
+    process.start()
+    return process, f'http://127.0.0.1:{port_queue.get(timeout=30)}'
+
+
+# --- Scenario and seed data ---
+
+def load_scenario(path):
+    with open(path, encoding='utf-8') as f:
+        scenario = dict(DEFAULTS, **json.load(f))
+    if not scenario.get('scenarios'):
+        raise ScenarioError("The scenario file has no 'scenarios'.")
+    for spec in scenario['scenarios']:
+        if spec.get('role') not in ('tailor', 'customer'):
+            raise ScenarioError(f"Scenario {spec.get('name')!r}: role must be 'tailor' or 'customer'.")
+        actions = TAILOR_ACTIONS if spec['role'] == 'tailor' else CUSTOMER_ACTIONS
+        unknown = set(spec.get('actions', {})) - set(actions)
+        if unknown or not spec.get('actions'):
+            raise ScenarioError(
+                f"Scenario {spec.get('name')!r}: unknown or missing actions {sorted(unknown)}; "
+                f"choose from {sorted(actions)}."
+            )
+        spec.setdefault('name', spec['role'])
+        spec.setdefault('users', 1)
+        spec.setdefault('think_time', [0.5, 2.0])
+    return scenario
+
+
+def seed(scenario):
+    """
+    Create the tailors, customers, orders, tasks and portal logins the
+    simulated users act on. Returns {'prefix', 'tailors': [...],
+    'customers': [...]}, one dict per account with the ids its actions need.
+    """
+    from tailor_app.models import Customer, Order, OrderTask, TaskDefinition, WorkflowTemplate
+
+    run = uuid.uuid4().hex[:6]
+    prefix = f'{USERNAME_PREFIX}{run}-'
+    password = make_password(PASSWORD)
+    today = timezone.localdate()
+    tailors, customers = [], []
+    for t in range(scenario['tailors']):
+        tailor = User.objects.create(username=f'{prefix}tailor-{t}', password=password)
+        template = WorkflowTemplate.objects.create(tailor=tailor, name='Load test workflow')
+        definitions = TaskDefinition.objects.bulk_create([
+            TaskDefinition(template=template, name=name, order=i) for i, name in enumerate(TASK_NAMES)
+        ])
+        order_ids = []
+        for n in range(scenario['customers_per_tailor']):
+            account = None
+            if n < scenario['portal_users_per_tailor']:
+                account = User.objects.create(username=f'{prefix}client-{t}-{n}', password=password)
+            customer = Customer.objects.create(
+                tailor=tailor, client_account=account, name=f'Load Test {t}-{n}', phone=f'{run}{t:03d}{n:05d}'[:15],
+            )
+            for k in range(scenario['orders_per_customer']):
+                order = Order.objects.create(
+                    customer=customer, item=f'Suit {k}', status='In Progress',
+                    due_date=today + timedelta(days=7 + (n + k) % 30), price=1000,
+                )
+                OrderTask.objects.bulk_create([OrderTask(order=order, task_definition=d) for d in definitions])
+                order_ids.append(order.pk)
+            if account:
+                customers.append({'username': account.username, 'tailor_id': tailor.pk})
+        tailors.append({
+            'username': tailor.username,
+            'order_ids': order_ids,
+            'task_ids': list(OrderTask.objects.filter(order_id__in=order_ids).values_list('id', flat=True)),
+        })
+    return {'prefix': prefix, 'tailors': tailors, 'customers': customers}
+
+
+def cleanup(prefix=USERNAME_PREFIX):
+    """ Delete the seeded accounts with their customers, orders, tasks and appointments. """
+    from tailor_app.models import Appointment, Customer
+
+    # Deleting these leaves sync tombstones pointing at the tailor, so they
+    # have to go before the tailor does; the tombstones then cascade with it.
+    Appointment.objects.filter(tailor__username__startswith=prefix).delete()
+    Customer.objects.filter(tailor__username__startswith=prefix).delete()
+    return User.objects.filter(username__startswith=prefix).delete()[0]
+
+
+# --- Simulated users ---
+
+class _NoRedirect(HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Session:
+    """ One browser: a cookie jar and a CSRF token, not following redirects. """
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies), _NoRedirect)
+
+    def csrf_token(self):
+        return next((cookie.value for cookie in self.cookies if cookie.name == 'csrftoken'), '')
+
+    def request(self, method, path, data=None):
+        """ Returns the status code; raises URLError/OSError if the server can't be reached. """
+        body = None
+        headers = {}
+        if method == 'POST':
+            data = dict(data or {}, csrfmiddlewaretoken=self.csrf_token())
+            body = urlencode(data).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        request = Request(self.base_url + path, data=body, method=method, headers=headers)
+        try:
+            with self.opener.open(request, timeout=REQUEST_TIMEOUT) as response:
+                response.read()
+                return response.status
+        except HTTPError as e:
+            e.read()
+            return e.code
+
+
+def _login(session, account, rng):
+    session.request('GET', '/accounts/login/')
+    return 'POST', '/accounts/login/', {'username': account['username'], 'password': PASSWORD}, (302,)
+
+
+def _get(path):
+    return lambda session, account, rng: ('GET', path, None, (200,))
+
+
+def _order_detail(session, account, rng):
+    return 'GET', f"/orders/{rng.choice(account['order_ids'])}/", None, (200,)
+
+
+def _edit_order(session, account, rng):
+    due = timezone.localdate() + timedelta(days=rng.randint(7, 60))
+    return 'POST', f"/orders/{rng.choice(account['order_ids'])}/edit/", {
+        'item': 'Suit', 'status': 'In Progress', 'due_date': due.isoformat(), 'price': rng.randint(800, 3000),
+        'notes': 'Edited under load', 'fabric_details': '',
+        'materials-TOTAL_FORMS': 0, 'materials-INITIAL_FORMS': 0,
+    }, (302,)
+
+
+def _toggle_task(session, account, rng):
+    # Completing the last open task of an order fires check_order_completion.
+    data = {'is_completed': 'on'} if rng.random() < 0.7 else {}
+    return 'POST', f"/tasks/{rng.choice(account['task_ids'])}/update/", data, (302,)
+
+
+def _request_appointment(session, account, rng):
+    start = timezone.localtime().replace(minute=0, second=0, microsecond=0) + timedelta(
+        days=rng.randint(1, 90), hours=rng.randint(0, 8),
+    )
+    start = start.replace(hour=10) if start.hour < 10 or start.hour > 17 else start
+    return 'POST', '/portal/appointments/request/', {
+        'title': 'Fitting', 'notes': 'Requested under load',
+        'start_time': start.strftime('%Y-%m-%dT%H:%M'),
+        'end_time': (start + timedelta(minutes=30)).strftime('%Y-%m-%dT%H:%M'),
+    }, (302,)
+
+
+TAILOR_ACTIONS = {
+    'login': _login,
+    'dashboard': _get('/'),
+    'customer_list': _get('/customers/'),
+    'order_detail': _order_detail,
+    'edit_order': _edit_order,
+    'toggle_task': _toggle_task,
+    'production_board': _get('/production/'),
+    'reports': _get('/reports/'),
+    'calendar': _get('/calendar/'),
+}
+CUSTOMER_ACTIONS = {
+    'login': _login,
+    'portal_dashboard': _get('/portal/dashboard/'),
+    'portal_orders': _get('/portal/orders/'),
+    'request_appointment': _request_appointment,
+}
+
+
+class Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}   # (scenario, action) -> [seconds, ...]
+        self.errors = {}    # (scenario, action) -> {status or exception name: count}
+
+    def add(self, scenario, action, seconds, error=None):
+        key = (scenario, action)
+        with self.lock:
+            self.samples.setdefault(key, []).append(seconds)
+            if error is not None:
+                errors = self.errors.setdefault(key, {})
+                errors[error] = errors.get(error, 0) + 1
+
+
+def _run_user(base_url, spec, account, actions, start_at, stop_at, results, seed_value):
+    rng = random.Random(seed_value)
+    names = list(spec['actions'])
+    weights = [spec['actions'][name] for name in names]
+    session = Session(base_url)
+    time.sleep(max(0, start_at - time.monotonic()))
+    action = 'login'
+    while time.monotonic() < stop_at:
+        method, path, data, ok = actions[action](session, account, rng)
+        began = time.perf_counter()
+        try:
+            status = session.request(method, path, data)
+            error = None if status in ok else status
+        except (URLError, OSError) as e:
+            error = type(e).__name__
+        results.add(spec['name'], action, time.perf_counter() - began, error)
+        time.sleep(rng.uniform(*spec['think_time']))
+        action = rng.choices(names, weights)[0]
+
+
+def run(scenario, base_url, accounts):
+    """ Drive traffic for scenario['duration'] seconds. Returns (Results, elapsed seconds). """
+    results = Results()
+    threads = []
+    users = [(spec, n) for spec in scenario['scenarios'] for n in range(spec['users'])]
+    started = time.monotonic()
+    stop_at = started + scenario['duration']
+    step = scenario['ramp_up'] / max(1, len(users))
+    for i, (spec, n) in enumerate(users):
+        pool = accounts['tailors'] if spec['role'] == 'tailor' else accounts['customers']
+        if not pool:
+            raise ScenarioError(f"Scenario {spec['name']!r} needs {spec['role']} accounts; the seed has none.")
+        actions = TAILOR_ACTIONS if spec['role'] == 'tailor' else CUSTOMER_ACTIONS
+        thread = threading.Thread(
+            target=_run_user,
+            args=(base_url, spec, pool[n % len(pool)], actions, started + i * step, stop_at, results, i),
+            daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    return results, time.monotonic() - started
+
+
+def percentile(ordered, q):
+    """ Nearest-rank percentile of an already sorted list. """
+    return ordered[min(len(ordered) - 1, max(0, int(round(len(ordered) * q / 100 + 0.5)) - 1))]
+
+
+def summarize(results, elapsed):
+    """ Rows of per-(scenario, action) statistics, plus one 'all' row per scenario. """
+    rows = []
+    for scenario in sorted({key[0] for key in results.samples}):
+        keys = sorted(key for key in results.samples if key[0] == scenario)
+        groups = [(key[1], results.samples[key], results.errors.get(key, {})) for key in keys]
+        everything = [s for _, samples, _ in groups for s in samples]
+        all_errors = {}
+        for _, _, errors in groups:
+            for error, count in errors.items():
+                all_errors[error] = all_errors.get(error, 0) + count
+        for action, samples, errors in groups + [('all', everything, all_errors)]:
+            ordered = sorted(samples)
+            failed = sum(errors.values())
+            rows.append({
+                'scenario': scenario, 'action': action, 'requests': len(ordered),
+                'rps': len(ordered) / elapsed,
+                'p50_ms': percentile(ordered, 50) * 1000,
+                'p90_ms': percentile(ordered, 90) * 1000,
+                'p99_ms': percentile(ordered, 99) * 1000,
+                'max_ms': ordered[-1] * 1000,
+                'error_rate': failed / len(ordered),
+                'errors': errors,
+            })
+    return rows
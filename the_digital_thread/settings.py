@@ -14,6 +14,8 @@ import os
 from pathlib import Path
 import environ
 
+from .database import database_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -53,11 +55,19 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its total covers everything below (the_digital_thread/instrumentation.py)
+    'the_digital_thread.instrumentation.InstrumentationMiddleware',
+    'the_digital_thread.slow_requests.SlowRequestMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Collected static files, precompressed (the_digital_thread/staticfiles.py)
+    'the_digital_thread.staticfiles.StaticFilesMiddleware',
+    # Brotli/gzip for HTML and JSON, streamed pages included (the_digital_thread/compression.py)
+    'the_digital_thread.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.RoleMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -86,12 +96,62 @@ WSGI_APPLICATION = 'the_digital_thread.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+# Configured from DATABASE_URL (defaults to db.sqlite3). SQLite gets WAL and
+# tuning pragmas, PostgreSQL gets persistent or pooled connections.
+# See the_digital_thread/database.py for the supported variables.
+DATABASES = database_settings(env, BASE_DIR)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Bounded in-process LRU by default; point CACHE_URL at redis:// or
+# pymemcache:// to share the cache between workers.
+CACHES = {
+    'default': env.cache_url('CACHE_URL', default='locmemcache://digital-thread'),
 }
+# MAX_ENTRIES is understood by the built-in backends only; Redis and
+# memcached clients get OPTIONS as keyword arguments and reject it.
+if CACHES['default']['BACKEND'].rsplit('.', 1)[0] in (
+    'django.core.cache.backends.locmem',
+    'django.core.cache.backends.filebased',
+    'django.core.cache.backends.db',
+):
+    CACHES['default'].setdefault('OPTIONS', {}).setdefault(
+        'MAX_ENTRIES', env.int('CACHE_MAX_ENTRIES', default=5000)
+    )
+
+# Per-tailor list and fragment caching (tailor_app/cache.py)
+TENANT_CACHE_ALIAS = 'default'
+TENANT_CACHE_TIMEOUT = env.int('TENANT_CACHE_TIMEOUT', default=600)
+
+# Workshop capacity for the production scheduler (tailor_app/production.py):
+# minutes of work per working day, and working weekdays (Monday=0).
+WORKSHOP_DAILY_MINUTES = env.int('WORKSHOP_DAILY_MINUTES', default=480)
+WORKSHOP_DAYS = env.list('WORKSHOP_DAYS', cast=int, default=[0, 1, 2, 3, 4, 5])
+
+# Closed orders and past appointments older than this many days are moved to
+# the archive tables by `manage.py archive_records` (tailor_app/archive.py).
+ARCHIVE_AFTER_DAYS = env.int('ARCHIVE_AFTER_DAYS', default=365)
+
+# Request timing: Server-Timing headers and per-route histograms served at
+# /metrics (the_digital_thread/instrumentation.py). Off means no overhead.
+# Scrapers authenticate with `Authorization: Bearer <METRICS_TOKEN>`.
+INSTRUMENTATION_ENABLED = env.bool('INSTRUMENTATION_ENABLED', default=False)
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+
+# Requests slower than SLOW_REQUEST_MS are written with their SQL and query
+# plans to SLOW_REQUEST_LOG, a rotating JSONL file; empty turns it off
+# (the_digital_thread/slow_requests.py, `manage.py slow_requests`).
+SLOW_REQUEST_LOG = env('SLOW_REQUEST_LOG', default='')
+SLOW_REQUEST_MS = env.int('SLOW_REQUEST_MS', default=1000)
+SLOW_REQUEST_EXPLAIN = env.int('SLOW_REQUEST_EXPLAIN', default=3)
+SLOW_REQUEST_LOG_MAX_BYTES = env.int('SLOW_REQUEST_LOG_MAX_BYTES', default=10 * 1024 * 1024)
+SLOW_REQUEST_LOG_BACKUPS = env.int('SLOW_REQUEST_LOG_BACKUPS', default=5)
+
+# HTML and JSON responses of at least this many bytes are sent Brotli- or
+# gzip-encoded (the_digital_thread/compression.py); 0 turns it off.
+COMPRESS_MIN_BYTES = env.int('COMPRESS_MIN_BYTES', default=1024)
 
 
 # Password validation
@@ -139,6 +199,15 @@ STATICFILES_DIRS = [
 # Directory where collectstatic will copy all files
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# collectstatic purges unused Tailwind classes, writes content-hashed copies
+# and .gz/.br variants; StaticFilesMiddleware serves them with immutable
+# caching (the_digital_thread/staticfiles.py). With DEBUG off, run
+# collectstatic before starting the server, or pages render without assets.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'the_digital_thread.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+
 
 # MEDIA FILES (User uploads)
 MEDIA_URL = 'media/'
@@ -0,0 +1,243 @@
+# the_digital_thread/slow_requests.py
+
+"""
+Slow-request recorder.
+
+With SLOW_REQUEST_LOG set to a file path, ``SlowRequestMiddleware`` keeps the
+SQL of every request (statement, parameters, database alias, duration) and,
+when the request took longer than SLOW_REQUEST_MS, appends one JSON line to
+that file with:
+
+* when, method, path, route and view name, the resolved URL kwargs, the
+  query string (never the POST body), the user id and status code
+* total time, SQL time and every statement in execution order, with its
+  parameters redacted: strings and bytes always, every value in statements on
+  SENSITIVE_TABLES (session keys, password hashes); numbers and dates are kept
+* the EXPLAIN output of the SLOW_REQUEST_EXPLAIN slowest SELECTs, run on the
+  same connection right after the response is built
+
+A streamed page (tailor_app/streaming.py) is timed, and its SQL kept, until
+its last chunk has been sent.
+
+The raw parameters stay in memory, only for EXPLAIN. The file rotates at SLOW_REQUEST_LOG_MAX_BYTES, keeping
+SLOW_REQUEST_LOG_BACKUPS old files (``slow.jsonl.1``, ...). Each worker
+process writes to it through its own handler, so give each one its own file
+if they rotate often. ``manage.py slow_requests`` summarizes the worst
+endpoints and queries over a time range.
+
+With SLOW_REQUEST_LOG empty (the default) the middleware removes itself at
+startup.
+"""
+
+import json
+import logging
+import re
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.utils import timezone
+
+from .instrumentation import stream_within
+
+# More statements than this in one request are counted but not kept.
+MAX_STATEMENTS = 1000
+REDACTED = '<redacted>'
+SENSITIVE_TABLES = ('django_session', 'auth_user')
+
+logger = logging.getLogger('the_digital_thread.slow_requests')
+logger.propagate = False
+
+
+class _Encoder(DjangoJSONEncoder):
+    def default(self, o):
+        try:
+            return super().default(o)
+        except TypeError:
+            return repr(o)
+
+
+def _param(value, sensitive):
+    if sensitive or isinstance(value, (str, bytes, memoryview)):
+        return REDACTED
+    return value
+
+
+def _params(sql, params):
+    """ ``params`` as they may be written to the log; see the module docstring. """
+    if params is None:
+        return None
+    sensitive = any(table in sql for table in SENSITIVE_TABLES)
+    if isinstance(params, dict):
+        return {key: _param(value, sensitive) for key, value in params.items()}
+    return [_param(value, sensitive) for value in params]
+
+
+class _QueryRecorder:
+    def __init__(self, alias):
+        self.alias = alias
+        self.statements = []
+        self.count = 0
+        self.total = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.total += duration
+            if len(self.statements) < MAX_STATEMENTS:
+                self.statements.append((start, self.alias, sql, None if many else params, duration))
+
+
+@contextmanager
+def _recording(recorders):
+    with ExitStack() as stack:
+        for recorder in recorders:
+            stack.enter_context(connections[recorder.alias].execute_wrapper(recorder))
+        yield
+
+
+def explain(alias, sql, params):
+    """ The database's plan for one SELECT, as a list of lines. """
+    connection = connections[alias]
+    prefix = connection.ops.explain_query_prefix()
+    with connection.cursor() as cursor:
+        cursor.execute(f'{prefix} {sql}', params)
+        return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+
+
+def _explain_slowest(statements, limit):
+    selects = sorted(
+        (s for s in statements if s['sql'].lstrip()[:6].upper() == 'SELECT' and s['params'] is not None),
+        key=lambda s: s['ms'], reverse=True,
+    )
+    plans = []
+    for statement in selects[:limit]:
+        try:
+            plan = explain(statement['alias'], statement['sql'], statement['raw_params'])
+        except Exception as e:
+            plan = [f'EXPLAIN failed: {e}']
+        plans.append({'sql': statement['sql'], 'ms': statement['ms'], 'plan': plan})
+    return plans
+
+
+class SlowRequestMiddleware:
+    """
+    Log requests slower than SLOW_REQUEST_MS with their SQL and query plans;
+    see the module docstring. Put it near the top of MIDDLEWARE.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SLOW_REQUEST_LOG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = settings.SLOW_REQUEST_MS / 1000
+        if not logger.handlers:
+            path = Path(settings.SLOW_REQUEST_LOG)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            handler = RotatingFileHandler(
+                path, maxBytes=settings.SLOW_REQUEST_LOG_MAX_BYTES,
+                backupCount=settings.SLOW_REQUEST_LOG_BACKUPS, encoding='utf-8',
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+
+    def __call__(self, request):
+        recorders = [_QueryRecorder(alias) for alias in connections]
+        start = time.perf_counter()
+        with _recording(recorders):
+            response = self.get_response(request)
+
+        def finish():
+            total = time.perf_counter() - start
+            if total >= self.threshold:
+                self.record(request, response, total, recorders)
+
+        if response.streaming and not response.is_async:
+            # The rows of a streamed page are read after this returns.
+            stream_within(response, lambda: _recording(recorders), finish)
+        else:
+            finish()
+        return response
+
+    def record(self, request, response, total, recorders):
+        statements = sorted(
+            (statement for recorder in recorders for statement in recorder.statements),
+            key=lambda statement: statement[0],
+        )
+        statements = [
+            {
+                'alias': alias, 'sql': sql, 'ms': round(duration * 1000, 3),
+                'params': _params(sql, params), 'raw_params': params,
+            }
+            for _, alias, sql, params, duration in statements
+        ]
+        plans = _explain_slowest(statements, settings.SLOW_REQUEST_EXPLAIN)
+        for statement in statements:
+            del statement['raw_params']
+
+        match = request.resolver_match
+        user = getattr(request, 'user', None)
+        entry = {
+            'at': timezone.now(),
+            'method': request.method,
+            'path': request.path,
+            'route': match.route if match else None,
+            'view': match.view_name if match else None,
+            'kwargs': match.kwargs if match else {},
+            'query': request.GET.dict(),
+            'user_id': user.pk if user is not None and user.is_authenticated else None,
+            'status': response.status_code,
+            'ms': round(total * 1000, 3),
+            'sql_count': sum(recorder.count for recorder in recorders),
+            'sql_ms': round(sum(recorder.total for recorder in recorders) * 1000, 3),
+            'statements': statements,
+            'explain': plans,
+        }
+        logger.info(json.dumps(entry, cls=_Encoder))
+
+
+# --- Reading the log ---
+
+_IN_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+
+
+def normalize_sql(sql):
+    """ Collapse IN (%s, %s, ...) lists so the same query with different list lengths groups together. """
+    return _IN_LIST.sub('(...)', sql)
+
+
+def log_files(path):
+    """ The log and its rotated backups, oldest first. """
+    path = Path(path)
+    backups = sorted(
+        (p for p in path.parent.glob(path.name + '.*') if p.suffix[1:].isdigit()),
+        key=lambda p: int(p.suffix[1:]), reverse=True,
+    )
+    return backups + ([path] if path.exists() else [])
+
+
+def read_entries(path, since=None, until=None):
+    """ Logged requests in [since, until), skipping lines that don't parse (e.g. cut off by a crash). """
+    for file in log_files(path):
+        with open(file, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    at = datetime.fromisoformat(entry['at'])
+                except (ValueError, KeyError, TypeError):
+                    continue
+                if (since and at < since) or (until and at >= until):
+                    continue
+                entry['at'] = at
+                yield entry
@@ -0,0 +1,283 @@
+# the_digital_thread/staticfiles.py
+
+"""
+Static asset pipeline.
+
+``collectstatic`` goes through ``CompressedManifestStaticFilesStorage``:
+
+1. the CSS files in PURGE_CSS (the Tailwind build) lose every rule whose
+   class selectors use a class that appears nowhere in the project's
+   templates, JavaScript or Python (forms set widget classes)
+2. every file is copied under a content-hashed name (``tailwind.output.3f2a9c1b7e4d.css``)
+   and ``{% static %}`` points at it, via Django's ManifestStaticFilesStorage
+3. text assets get ``.gz`` and, with the ``brotli`` package installed,
+   ``.br`` siblings, written only when smaller than the original
+
+``StaticFilesMiddleware`` serves STATIC_ROOT by itself, before sessions and
+auth run: Brotli, then gzip, then the plain file, whichever the client
+accepts, with ``Cache-Control: immutable`` for a year on hashed names (a
+changed file gets a new name) and a short max-age otherwise. It indexes
+STATIC_ROOT when the worker starts, so run collectstatic before starting
+workers. Paths it doesn't know fall through to the rest of the stack.
+
+Without a collectstatic run ``{% static %}`` falls back to the unhashed
+name, so pages still render and only the assets are missing.
+"""
+
+import gzip
+import mimetypes
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.files.base import ContentFile
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponseNotAllowed
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_SUFFIXES = ('.css', '.js', '.svg', '.json', '.map', '.txt', '.html', '.xml')
+MIN_COMPRESS_BYTES = 256
+PURGE_CSS = ('css/tailwind.output.css',)
+CONTENT_SUFFIXES = ('.html', '.js', '.py')
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+MUTABLE_MAX_AGE = 60
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+# --- Tailwind purge ---
+
+_CLASS = re.compile(r'\.((?:\\.|[\w-])+)')
+_TOKEN = re.compile(r'''[^\s"'`<>=]+''')
+
+
+def used_tokens(root, skip=()):
+    """ Every word-like token in the project's templates, scripts and Python files. """
+    tokens = set()
+    skip = {Path(path).resolve() for path in skip}
+    for directory, dirs, files in os.walk(root):
+        dirs[:] = [
+            d for d in dirs
+            if not d.startswith('.') and d not in ('node_modules', '__pycache__')
+            and Path(directory, d).resolve() not in skip
+        ]
+        for name in files:
+            if name.endswith(CONTENT_SUFFIXES):
+                with open(Path(directory, name), encoding='utf-8', errors='ignore') as f:
+                    tokens.update(_TOKEN.findall(f.read()))
+    # Split on the characters templates wrap classes in, e.g. {'hidden': !open}
+    tokens.update(part for token in list(tokens) for part in re.split(r'[{}(),;\[\]!]', token) if part)
+    return tokens
+
+
+def _blocks(css):
+    """
+    Split CSS into top-level pieces: ('rule', prelude, body) for ``x { ... }``
+    and ('text', text, None) for everything else (statements, whitespace).
+    """
+    pieces, i, start, depth, quote, prelude_start = [], 0, 0, 0, None, 0
+    while i < len(css):
+        ch = css[i]
+        if quote:
+            if ch == '\\':
+                i += 1
+            elif ch == quote:
+                quote = None
+        elif css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            i = len(css) if end < 0 else end + 1
+        elif ch in '"\'':
+            quote = ch
+        elif ch == '{':
+            if depth == 0:
+                start = i
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                prelude = css[prelude_start:start]
+                leading = prelude[:len(prelude) - len(prelude.lstrip())]
+                if leading:
+                    pieces.append(('text', leading, None))
+                pieces.append(('rule', prelude.strip(), css[start + 1:i]))
+                prelude_start = i + 1
+        elif ch == ';' and depth == 0:
+            pieces.append(('text', css[prelude_start:i + 1], None))
+            prelude_start = i + 1
+        i += 1
+    if prelude_start < len(css):
+        pieces.append(('text', css[prelude_start:], None))
+    return pieces
+
+
+def _unescape(name):
+    return re.sub(r'\\(.)', r'\1', name)
+
+
+def _selector_used(selector, used):
+    classes = [_unescape(name) for name in _CLASS.findall(selector)]
+    return all(name in used for name in classes)
+
+
+def purge_css(css, used):
+    """ ``css`` without the rules whose every selector needs a class not in ``used``. """
+    out = []
+    for kind, prelude, body in _blocks(css):
+        if kind == 'text':
+            out.append(prelude)
+        elif prelude.startswith(('@media', '@supports', '@layer', '@container')):
+            inner = purge_css(body, used)
+            if inner.strip():
+                out.append(f'{prelude} {{{inner}}}')
+        elif prelude.startswith('@') or '.' not in prelude:
+            out.append(f'{prelude} {{{body}}}')
+        elif any(_selector_used(selector, used) for selector in prelude.split(',')):
+            out.append(f'{prelude} {{{body}}}')
+    return re.sub(r'\n{3,}', '\n\n', ''.join(out))
+
+
+# --- Storage ---
+
+def compress(content):
+    """ {encoding suffix: bytes} for the encodings that actually shrink ``content``. """
+    variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(content, quality=11)
+    return {suffix: data for suffix, data in variants.items() if len(data) < len(content)}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # A file that isn't in the manifest (collectstatic not run yet, or run
+    # before the file was added) gets its plain URL instead of failing every
+    # page that links it; the asset itself 404s until collectstatic runs.
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Not collected either, so there's nothing to hash.
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            self.purge(paths)
+        compressed = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            yield name, hashed_name, processed
+            if dry_run or isinstance(processed, Exception):
+                continue
+            # Files that reference others come through once per pass.
+            for target in (name, hashed_name):
+                if target and target not in compressed:
+                    compressed.add(target)
+                    self.compress_variants(target)
+
+    def purge(self, paths):
+        targets = [name for name in PURGE_CSS if name in paths]
+        if not targets:
+            return
+        used = used_tokens(settings.BASE_DIR, skip=[settings.STATIC_ROOT])
+        for name in targets:
+            # Always from the source: the collected copy is already purged, and
+            # collectstatic skips the copy when it's newer than the source.
+            source_storage, source_path = paths[name]
+            with source_storage.open(source_path) as f:
+                css = f.read().decode('utf-8')
+            self.delete(name)
+            self.save(name, ContentFile(purge_css(css, used).encode('utf-8')))
+            # Hash and copy the purged file rather than the source.
+            paths[name] = (self, name)
+
+    def compress_variants(self, name):
+        if not name.endswith(COMPRESSIBLE_SUFFIXES) or not self.exists(name):
+            return
+        with self.open(name) as f:
+            content = f.read()
+        if len(content) < MIN_COMPRESS_BYTES:
+            return
+        for suffix, data in compress(content).items():
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self.save(name + suffix, ContentFile(data))
+
+
+# --- Serving ---
+
+def _accepted(header):
+    """ Content codings the client accepts (q > 0), from Accept-Encoding. """
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticFilesMiddleware:
+    """
+    Serve collected static files with precompressed variants and long-lived
+    caching; see the module docstring. Put it right after SecurityMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = '/' + settings.STATIC_URL.lstrip('/')
+        self.files = self.index(Path(settings.STATIC_ROOT))
+        if not self.files:
+            raise MiddlewareNotUsed
+
+    def index(self, root):
+        """ {url path: (file, content type, immutable, {encoding: file})} for everything under ``root``. """
+        if not root.is_dir():
+            return {}
+        hashed = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        files = {}
+        for path in root.rglob('*'):
+            if not path.is_file() or path.suffix in ('.gz', '.br'):
+                continue
+            name = path.relative_to(root).as_posix()
+            content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+            if content_type.startswith('text/') or content_type in ('application/javascript', 'image/svg+xml'):
+                content_type += '; charset=utf-8'
+            variants = {
+                encoding: path.with_name(path.name + suffix)
+                for encoding, suffix in ENCODINGS
+                if path.with_name(path.name + suffix).is_file()
+            }
+            files[self.prefix + name] = (path, content_type, name in hashed, variants)
+        return files
+
+    def __call__(self, request):
+        entry = self.files.get(request.path_info) if request.path_info.startswith(self.prefix) else None
+        if entry is None:
+            return self.get_response(request)
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+
+        path, content_type, immutable, variants = entry
+        accepted = _accepted(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        encoding = next((e for e, _ in ENCODINGS if e in variants and e in accepted), None)
+        response = FileResponse(open(variants[encoding] if encoding else path, 'rb'), content_type=content_type)
+        del response['Content-Disposition']
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if variants:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        response['Cache-Control'] = (
+            f'public, max-age={IMMUTABLE_MAX_AGE}, immutable' if immutable else f'public, max-age={MUTABLE_MAX_AGE}'
+        )
+        return response
@@ -5,6 +5,8 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from .instrumentation import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('accounts/', include('accounts.urls')),
@@ -12,6 +14,9 @@ urlpatterns = [
     path('', include('tailor_app.urls')),
 ]
 
+if settings.INSTRUMENTATION_ENABLED:
+    urlpatterns.insert(0, path('metrics', metrics_view, name='metrics'))
+
 # This is crucial for serving user-uploaded media files during development
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATICFILES_DIRS[0])